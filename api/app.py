@@ -1,8 +1,29 @@
+import atexit
+import logging
 from flask import Flask, jsonify
 from flask_cors import CORS
+from database.json_codec import install_json_provider
+from database.query_stats import install_query_stats
+from database.db_manager import install_read_your_writes
+from api.routes.event_routes import event_bp
+from api.routes.internal_routes import internal_bp
+from controllers import bank_controller
+from controllers.bank_controller import BankController
+
+logging.basicConfig(level=logging.INFO)
 
 app = Flask(__name__)
 CORS(app)
+install_json_provider(app)
+install_query_stats(app)
+install_read_your_writes(app)
+app.register_blueprint(event_bp, url_prefix='/api')
+app.register_blueprint(internal_bp)
+
+# In ledger mode snapshots are written in the background, one compactor per process
+if bank_controller.LEDGER_MODE:
+    BankController.start_ledger_compactor()
+    atexit.register(BankController.stop_ledger_compactor)
 
 @app.route('/')
 def home():
@@ -0,0 +1,230 @@
+"""
+ASGI entry point: the banking operations served by AsyncBankController
+
+Run with an ASGI server, e.g.:
+
+    uvicorn api.asgi:app --workers 2
+
+Requires sqlalchemy[asyncio], asyncpg (or psycopg, see DB_ASYNC_DRIVER) and
+starlette. Responses are the same dicts and status codes BankController
+returns to the Flask app.
+"""
+
+import logging
+from contextlib import asynccontextmanager
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Match, Route
+from controllers import bank_controller
+from controllers.async_bank_controller import AsyncBankController
+from database import export
+from database.json_codec import dumps
+from database import query_stats
+from api.middleware.auth import decode_token
+
+
+def json_response(payload, status=200):
+    return Response(dumps(payload), status_code=status, media_type='application/json')
+
+
+def current_user(request):
+    """Token payload from the Authorization header, or None"""
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    return decode_token(auth_header.split(' ')[1])
+
+
+def authenticated(handler):
+    """Reject requests without a valid token; the handler gets the user as second argument"""
+    async def endpoint(request):
+        user = current_user(request)
+        if not user:
+            return json_response({'error': 'Token is missing or invalid'}, 401)
+        return await handler(request, user)
+    return endpoint
+
+
+async def owned_account(account_id, user):
+    """(account, None) if the user owns it, else (None, error response)"""
+    result, status = await AsyncBankController.get_account(account_id=account_id)
+    if status != 200:
+        return None, json_response(result, status)
+    if result['account']['user_id'] != str(user['user_id']):
+        return None, json_response({'error': 'Account not found'}, 404)
+    return result['account'], None
+
+
+async def read_json(request):
+    try:
+        data = await request.json()
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+
+async def health(request):
+    return json_response({'status': 'healthy', 'service': 'banking-api-async'})
+
+
+@authenticated
+async def list_accounts(request, user):
+    result = await AsyncBankController.get_user_accounts(str(user['user_id']))
+    # A list on success, (error, status) on failure
+    if isinstance(result, tuple):
+        return json_response(*result)
+    return json_response({'accounts': result, 'total': len(result)})
+
+
+@authenticated
+async def create_account(request, user):
+    data = await read_json(request) or {}
+    result, status = await AsyncBankController.create_account(
+        str(user['user_id']),
+        data.get('account_type', 'checking'),
+        data.get('initial_balance', 0.0)
+    )
+    return json_response(result, status)
+
+
+@authenticated
+async def account_detail(request, user):
+    account, error = await owned_account(request.path_params['account_id'], user)
+    return error or json_response({'account': account})
+
+
+@authenticated
+async def account_transactions(request, user):
+    account_id = request.path_params['account_id']
+    _, error = await owned_account(account_id, user)
+    if error:
+        return error
+    try:
+        limit = int(request.query_params.get('limit', 50))
+        offset = int(request.query_params.get('offset', 0))
+    except ValueError:
+        return json_response({'error': 'limit and offset must be integers'}, 400)
+    result, status = await AsyncBankController.get_account_transactions(
+        account_id, limit=limit, offset=offset, cursor=request.query_params.get('cursor')
+    )
+    return json_response(result, status)
+
+
+@authenticated
+async def export_transactions(request, user):
+    account_id = request.path_params['account_id']
+    _, error = await owned_account(account_id, user)
+    if error:
+        return error
+    fmt = request.query_params.get('format', 'ndjson')
+    chunks, status = await AsyncBankController.export_account_transactions(account_id, fmt)
+    if status != 200:
+        return json_response(chunks, status)
+    return StreamingResponse(chunks, media_type=export.CONTENT_TYPES[fmt])
+
+
+def movement(method):
+    """Deposit / withdraw endpoint on an account of the current user"""
+    @authenticated
+    async def endpoint(request, user):
+        data = await read_json(request)
+        if data is None or 'account_id' not in data or 'amount' not in data:
+            return json_response({'error': 'account_id and amount are required'}, 400)
+        _, error = await owned_account(data['account_id'], user)
+        if error:
+            return error
+        result, status = await method(data['account_id'], data['amount'], data.get('description', ''))
+        return json_response(result, status)
+    return endpoint
+
+
+@authenticated
+async def transfer(request, user):
+    data = await read_json(request)
+    if data is None or not {'from_account_id', 'to_account_id', 'amount'} <= data.keys():
+        return json_response({'error': 'from_account_id, to_account_id and amount are required'}, 400)
+    _, error = await owned_account(data['from_account_id'], user)
+    if error:
+        return error
+    result, status = await AsyncBankController.transfer_funds(
+        data['from_account_id'], data['to_account_id'], data['amount'], data.get('description', '')
+    )
+    return json_response(result, status)
+
+
+@authenticated
+async def transfer_batch(request, user):
+    data = await read_json(request)
+    transfers = data.get('transfers') if data else None
+    if not isinstance(transfers, list):
+        return json_response({'error': 'transfers must be a list'}, 400)
+    for source in {item.get('from_account_id') for item in transfers if isinstance(item, dict)}:
+        _, error = await owned_account(source, user)
+        if error:
+            return error
+    result, status = await AsyncBankController.transfer_funds_batch(transfers)
+    return json_response(result, status)
+
+
+@authenticated
+async def summary(request, user):
+    result, status = await AsyncBankController.get_bank_summary()
+    return json_response(result, status)
+
+
+def route_label(scope):
+    """'METHOD /path/{param}' of the matching route, so metrics don't grow per account id"""
+    for route in routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return f"{scope['method']} {route.path}"
+    return 'unmatched'
+
+
+async def count_queries(request, call_next):
+    """Per-request query count and DB time (X-DB-* headers with SQL_DEBUG_HEADERS=true)"""
+    token = query_stats.begin(route_label(request.scope))
+    try:
+        response = await call_next(request)
+        if query_stats.DEBUG_HEADERS:
+            response.headers.update(query_stats.current().headers())
+        return response
+    finally:
+        query_stats.finish(token)
+
+
+routes = [
+    Route('/api/health', health),
+    Route('/api/accounts', list_accounts, methods=['GET']),
+    Route('/api/accounts', create_account, methods=['POST']),
+    Route('/api/accounts/{account_id}', account_detail, methods=['GET']),
+    Route('/api/accounts/{account_id}/transactions', account_transactions, methods=['GET']),
+    Route('/api/accounts/{account_id}/export', export_transactions, methods=['GET']),
+    Route('/api/deposit', movement(AsyncBankController.deposit_funds), methods=['POST']),
+    Route('/api/withdraw', movement(AsyncBankController.withdraw_funds), methods=['POST']),
+    Route('/api/transfer', transfer, methods=['POST']),
+    Route('/api/transfers/batch', transfer_batch, methods=['POST']),
+    Route('/api/summary', summary, methods=['GET']),
+]
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """Ledger snapshots are compacted by a background thread for the lifetime of the worker"""
+    if bank_controller.LEDGER_MODE:
+        bank_controller.BankController.start_ledger_compactor()
+    try:
+        yield
+    finally:
+        bank_controller.BankController.stop_ledger_compactor()
+
+
+logging.basicConfig(level=logging.INFO)
+
+app = Starlette(
+    routes=routes,
+    middleware=[Middleware(BaseHTTPMiddleware, dispatch=count_queries)],
+    lifespan=lifespan
+)
@@ -3,6 +3,7 @@ Handles JWT token generation and validation
 """
 
 import jwt
+import hmac
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify, current_app
@@ -84,6 +85,26 @@ def token_required(f):
     return decorated
 
 
+def internal_required(f):
+    """Decorator for operational endpoints (metrics): not for end users.
+
+    User tokens carry no role, so these endpoints require the shared secret in
+    INTERNAL_API_TOKEN, sent by the scraper in the X-Internal-Token header.
+    Without INTERNAL_API_TOKEN configured the endpoints are not exposed.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = os.getenv('INTERNAL_API_TOKEN')
+        if not expected:
+            return jsonify({'error': 'Not found'}), 404
+        provided = request.headers.get('X-Internal-Token', '')
+        if not hmac.compare_digest(provided.encode(), expected.encode()):
+            return jsonify({'error': 'Internal token is missing or invalid'}), 403
+        return f(*args, **kwargs)
+    
+    return decorated
+
+
 def get_current_user():
     """Get current authenticated user from request context"""
     return getattr(request, 'current_user', None)
@@ -0,0 +1,55 @@
+"""
+Server-Sent Events: pushes balance changes and new transactions to the dashboard
+"""
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from controllers.bank_controller import BankController
+from database.events import event_bus, get_bridge, sse_stream
+from api.middleware.auth import decode_token, token_required
+
+event_bp = Blueprint('events', __name__)
+
+
+def _stream_user():
+    """User from the Authorization header or, for EventSource (no custom headers), ?token="""
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header.split(' ')[1] if auth_header.startswith('Bearer ') else request.args.get('token')
+    return decode_token(token) if token else None
+
+
+@event_bp.route('/events', methods=['GET'])
+def stream_events():
+    """Stream 'transaction', 'balance' and 'account' events for the user's accounts"""
+    current_user = _stream_user()
+    if not current_user:
+        return jsonify({'error': 'Token is missing or invalid'}), 401
+
+    user_id = str(current_user['user_id'])
+    accounts = BankController.get_user_accounts(user_id)
+    # A list on success, (error, status) on failure
+    if isinstance(accounts, tuple):
+        error, status = accounts
+        return jsonify(error), status
+
+    # One DB read on connect; afterwards the connection only waits on its in-memory queue
+    get_bridge()
+    subscription = event_bus.subscribe(
+        f"user:{user_id}", *(f"account:{account['id']}" for account in accounts)
+    )
+
+    def follow_new_accounts(event):
+        if event['type'] == 'account':
+            subscription.subscribe(f"account:{event['data']['id']}")
+
+    return Response(
+        stream_with_context(sse_stream(subscription, on_event=follow_new_accounts)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@event_bp.route('/events/stats', methods=['GET'])
+@token_required
+def event_stats():
+    """Subscribers and delivery counters of this worker"""
+    return jsonify({'bridge': get_bridge().name, **event_bus.stats()}), 200
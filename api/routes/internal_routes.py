@@ -0,0 +1,24 @@
+"""
+Internal operational endpoints (connection pool and SQL metrics)
+"""
+
+from flask import Blueprint, jsonify
+from database.db_manager import pool_stats
+from database import query_stats
+from api.middleware.auth import internal_required
+
+internal_bp = Blueprint('internal', __name__, url_prefix='/api/internal')
+
+
+@internal_bp.route('/pool', methods=['GET'])
+@internal_required
+def get_pool_stats():
+    """Driver, pool settings and per-engine checked-out / overflow / wait time / connects per second"""
+    return jsonify(pool_stats()), 200
+
+
+@internal_bp.route('/queries', methods=['GET'])
+@internal_required
+def get_query_stats():
+    """Queries and DB time per endpoint, plus recent slow queries with their captured plans"""
+    return jsonify(query_stats.snapshot()), 200
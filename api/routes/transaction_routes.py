@@ -3,15 +3,26 @@ Handles deposits, withdrawals, and transfers
 """
 
 from flask import Blueprint, request, jsonify
-from database.db_manager import DatabaseManager
+from database.db_manager import DatabaseManager, get_engine
+from database.idempotency import IdempotencyStore, SQLIdempotencyBackend, idempotent
 from models.transaction import Transaction
+from database.id_allocator import next_transaction_code
+from database.entity_cache import entity_cache
 from api.middleware.auth import token_required, get_current_user
 
 transaction_bp = Blueprint('transaction', __name__)
 
+# Respuestas guardadas por Idempotency-Key (LRU en memoria + tabla idempotency_keys)
+idempotency_store = IdempotencyStore(SQLIdempotencyBackend(lambda: get_engine().raw_connection()))
+
+
+def _idempotency_scope(*args, **kwargs):
+    return get_current_user()['user_id']
+
 
 @transaction_bp.route('/deposit', methods=['POST'])
 @token_required
+@idempotent(idempotency_store, scope=_idempotency_scope)
 def deposit():
     """Deposit money into an account"""
     try:
@@ -50,6 +61,7 @@ def deposit():
         if db.update_account_balance(account_number, new_balance):
             # Create transaction record
             trans = Transaction(
+                transaction_code=next_transaction_code('DEP'),
                 account_number=account_number,
                 transaction_type="deposit",
                 amount=amount,
@@ -75,6 +87,7 @@ def deposit():
 
 @transaction_bp.route('/withdraw', methods=['POST'])
 @token_required
+@idempotent(idempotency_store, scope=_idempotency_scope)
 def withdraw():
     """Withdraw money from an account"""
     try:
@@ -120,6 +133,7 @@ def withdraw():
         if db.update_account_balance(account_number, new_balance):
             # Create transaction record
             trans = Transaction(
+                transaction_code=next_transaction_code('WDL'),
                 account_number=account_number,
                 transaction_type="withdrawal",
                 amount=amount,
@@ -143,8 +157,23 @@ def withdraw():
         return jsonify({'error': f'Withdrawal failed: {str(e)}'}), 500
 
 
+def _account_owner(db, account_number):
+    """Cached account number -> owner lookup for read-only ownership checks (no balance)"""
+    def load():
+        account = db.get_account_by_number(account_number)
+        if not account:
+            return None
+        return {'account_number': account['account_number'], 'owner_id': account['owner_id']}
+    
+    return entity_cache.get_or_load(
+        'account_owner', 'id', account_number, load,
+        lambda data: (data['account_number'], {})
+    )
+
+
 @transaction_bp.route('/transfer', methods=['POST'])
 @token_required
+@idempotent(idempotency_store, scope=_idempotency_scope)
 def transfer():
     """Transfer money between accounts"""
     try:
@@ -247,7 +276,7 @@ def get_transactions(account_number):
         db = DatabaseManager()
         
         # Verify account ownership
-        account_data = db.get_account_by_number(account_number)
+        account_data = _account_owner(db, account_number)
         
         if not account_data:
             db.close()
@@ -1,10 +1,8 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from database.db_manager import db_session
+from database import bank_stats
 from models.account import Account
-from models.user import User
-from models.transaction import Transaction
-from sqlalchemy import func
 
 account_bp = Blueprint('accounts', __name__, url_prefix='/api/accounts')
 
@@ -31,15 +29,11 @@ stats_bp = Blueprint('stats', __name__, url_prefix='/api')
 @stats_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_stats():
-    with db_session() as session:
-        users = session.query(User).count()
-        accounts = session.query(Account).count()
-        total_balance = session.query(func.sum(Account.balance)).scalar() or 0.0
-        # Opcional: transacciones
-        transactions = session.query(Transaction).count()
+    with db_session(readonly=True) as session:
+        stats = bank_stats.read(session)
         return jsonify({
-            'users': users,
-            'accounts': accounts,
-            'total_balance': float(total_balance),
-            'transactions': transactions
+            'users': stats['users'],
+            'accounts': stats['accounts'],
+            'total_balance': float(stats['total_balance']),
+            'transactions': stats['transactions']
         })
@@ -1,20 +1,30 @@
 # backend/app.py
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, url_for
 from flask_cors import CORS
 import psycopg2
 from psycopg2.extras import RealDictCursor, DictCursor
 import jwt
+import hmac
 import datetime
+import atexit
 from functools import wraps
 import os
 from dotenv import load_dotenv
 from werkzeug.security import generate_password_hash, check_password_hash
+from database.idempotency import IdempotencyStore, SQLIdempotencyBackend, idempotent
+from database.pagination import InvalidCursorError, clamp_page_size, decode_cursor, paginate
+from database.export import CONTENT_TYPES, NDJSON, attachment_name, stream_rows
+from database.json_codec import install_json_provider
+from database.conn_pool import ConnectionPool
+from database.etag import ACCOUNT_VERSION_SQL, OWNER_ACCOUNTS_VERSION_SQL, conditional_response, make_etag
+from database.transfer_pipeline import PartitionedWorkerPool
 
 # Cargar variables de entorno
 load_dotenv()
 
 app = Flask(__name__)
 CORS(app)  # Permite peticiones desde el frontend
+install_json_provider(app)  # jsonify con orjson si está instalado
 
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'tu-clave-secreta-super-segura')
 
@@ -35,15 +45,45 @@ else:
         'port': os.getenv('DB_PORT', '5432')
     }
 
-# Función helper para conectar a la BD
-def get_db_connection():
+# Conexiones reutilizadas desde un pool en lugar de abrir una por petición
+def _connect():
     if isinstance(DB_CONFIG, str):
         # DATABASE_URL string
-        conn = psycopg2.connect(DB_CONFIG, cursor_factory=RealDictCursor)
-    else:
-        # Diccionario de configuración
-        conn = psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
-    return conn
+        return psycopg2.connect(DB_CONFIG, cursor_factory=RealDictCursor)
+    # Diccionario de configuración
+    return psycopg2.connect(**DB_CONFIG, cursor_factory=RealDictCursor)
+
+db_pool = ConnectionPool(
+    _connect,
+    min_size=int(os.getenv('DB_POOL_MIN_SIZE', 1)),
+    max_size=int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+    acquire_timeout=float(os.getenv('DB_POOL_TIMEOUT_SECONDS', 5)),
+    health_check_after=float(os.getenv('DB_POOL_HEALTH_CHECK_SECONDS', 30)),
+    leak_timeout=float(os.getenv('DB_POOL_LEAK_SECONDS', 60))
+)
+
+# Con BANK_LEDGER_MODE=true los asientos del libro mayor (esquema de BankController)
+# se compactan en segundo plano también desde este proceso
+if os.getenv('BANK_LEDGER_MODE', 'false').lower() == 'true':
+    from controllers.bank_controller import BankController
+    BankController.start_ledger_compactor()
+    atexit.register(BankController.stop_ledger_compactor)
+
+# Función helper para conectar a la BD: conexión prestada, conn.close() la devuelve al pool
+def get_db_connection():
+    return db_pool.acquire()
+
+# with db_connection() as conn: ... garantiza la devolución también en los errores
+db_connection = db_pool.connection
+
+# Respuestas de /api/transfer guardadas por Idempotency-Key (LRU en memoria + tabla idempotency_keys)
+idempotency_store = IdempotencyStore(SQLIdempotencyBackend(db_pool.acquire))
+
+def accounts_etag(cur, owner_id, *params):
+    """ETag de las cuentas de un usuario (y su historial) con una sola consulta por índice"""
+    cur.execute(OWNER_ACCOUNTS_VERSION_SQL, (owner_id,))
+    version = cur.fetchone()
+    return make_etag(owner_id, version['accounts'], version['version'], version['last_account'], *params)
 
 # Decorador para verificar JWT
 def token_required(f):
@@ -73,12 +113,34 @@ def token_required(f):
     
     return decorated
 
+# Decorador para los endpoints operativos (métricas): el JWT de usuario no lleva
+# rol, así que se exige el secreto compartido INTERNAL_API_TOKEN en la cabecera
+# X-Internal-Token. Sin INTERNAL_API_TOKEN configurado no se exponen.
+def internal_required(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        expected = os.getenv('INTERNAL_API_TOKEN')
+        if not expected:
+            return jsonify({'message': 'No encontrado'}), 404
+        provided = request.headers.get('X-Internal-Token', '')
+        if not hmac.compare_digest(provided.encode(), expected.encode()):
+            return jsonify({'message': 'Token interno faltante o inválido'}), 403
+        return f(*args, **kwargs)
+    
+    return decorated
+
 # ==================== ENDPOINTS ====================
 
 @app.route('/api/health', methods=['GET'])
 def health():
     return jsonify({'status': 'ok'}), 200
 
+@app.route('/api/internal/pool', methods=['GET'])
+@internal_required
+def pool_stats():
+    # Mismo formato que /api/internal/pool de la API con SQLAlchemy
+    return jsonify({'driver': 'psycopg2', 'pools': {'primary': db_pool.stats()}}), 200
+
 @app.route('/api/register', methods=['POST'])
 def register():
     try:
@@ -90,36 +152,35 @@ def register():
         if not all([username, password, email]):
             return jsonify({'error': 'Missing required fields'}), 400
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        # Verificar si el usuario ya existe
-        cur.execute('SELECT * FROM users WHERE username = %s OR email = %s', (username, email))
-        if cur.fetchone():
-            return jsonify({'error': 'User already exists'}), 409
-        
-        # Hash del password
-        password_hash = generate_password_hash(password)
-        
-        # Insertar usuario
-        cur.execute(
-            'INSERT INTO users (username, password_hash, email) VALUES (%s, %s, %s) RETURNING user_id',
-            (username, password_hash, email)
-        )
-        user_id = cur.fetchone()['user_id']
-        
-        # Crear cuenta de ahorros por defecto
-        cur.execute(
-            'INSERT INTO accounts (owner_id, account_type, balance) VALUES (%s, %s, %s)',
-            (user_id, 'Ahorros', 1000.00)
-        )
-        
-        conn.commit()
-        cur.close()
-        conn.close()
-        
-        return jsonify({'message': 'User registered successfully', 'user_id': user_id}), 201
-        
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Verificar si el usuario ya existe
+            cur.execute('SELECT * FROM users WHERE username = %s OR email = %s', (username, email))
+            if cur.fetchone():
+                return jsonify({'error': 'User already exists'}), 409
+            
+            # Hash del password
+            password_hash = generate_password_hash(password)
+            
+            # Insertar usuario
+            cur.execute(
+                'INSERT INTO users (username, password_hash, email) VALUES (%s, %s, %s) RETURNING user_id',
+                (username, password_hash, email)
+            )
+            user_id = cur.fetchone()['user_id']
+            
+            # Crear cuenta de ahorros por defecto
+            cur.execute(
+                'INSERT INTO accounts (owner_id, account_type, balance) VALUES (%s, %s, %s)',
+                (user_id, 'Ahorros', 1000.00)
+            )
+            
+            conn.commit()
+            cur.close()
+            
+            return jsonify({'message': 'User registered successfully', 'user_id': user_id}), 201
+            
     except Exception as e:
         print(f"Register error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -131,34 +192,33 @@ def login():
         username = data.get('username')
         password = data.get('password')
         
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute('SELECT * FROM users WHERE username = %s', (username,))
-        user = cur.fetchone()
-        
-        cur.close()
-        conn.close()
-        
-        if user and check_password_hash(user['password_hash'], password):
-            token = jwt.encode({
-                'user_id': user['user_id'],
-                'username': user['username'],
-                'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
-            }, app.config['SECRET_KEY'])
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            cur.execute('SELECT * FROM users WHERE username = %s', (username,))
+            user = cur.fetchone()
             
-            return jsonify({
-                'message': 'Login exitoso',
-                'token': token,
-                'user': {
+            cur.close()
+            
+            if user and check_password_hash(user['password_hash'], password):
+                token = jwt.encode({
                     'user_id': user['user_id'],
                     'username': user['username'],
-                    'email': user['email']
-                }
-            }), 200
-        else:
-            return jsonify({'message': 'Credenciales inválidas'}), 401
-            
+                    'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=24)
+                }, app.config['SECRET_KEY'])
+                
+                return jsonify({
+                    'message': 'Login exitoso',
+                    'token': token,
+                    'user': {
+                        'user_id': user['user_id'],
+                        'username': user['username'],
+                        'email': user['email']
+                    }
+                }), 200
+            else:
+                return jsonify({'message': 'Credenciales inválidas'}), 401
+                
     except Exception as e:
         print(f"Login error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -167,99 +227,109 @@ def login():
 @token_required
 def get_accounts(current_user):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        cur.execute(
-            'SELECT * FROM accounts WHERE owner_id = %s AND is_active = TRUE ORDER BY created_at',
-            (current_user['user_id'],)
-        )
-        accounts = cur.fetchall()
-        
-        cur.close()
-        conn.close()
-        
-        accounts_list = []
-        for acc in accounts:
-            accounts_list.append({
-                'account_number': acc['account_number'],
-                'account_type': acc['account_type'],
-                'balance': float(acc['balance']),
-                'is_active': acc['is_active'],
-                'created_at': acc['created_at'].isoformat()
-            })
-        
-        return jsonify({'accounts': accounts_list}), 200
-        
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            def build():
+                cur.execute(
+                    'SELECT * FROM accounts WHERE owner_id = %s AND is_active = TRUE ORDER BY created_at',
+                    (current_user['user_id'],)
+                )
+                accounts_list = []
+                for acc in cur.fetchall():
+                    accounts_list.append({
+                        'account_number': acc['account_number'],
+                        'account_type': acc['account_type'],
+                        'balance': acc['balance'],
+                        'is_active': acc['is_active'],
+                        'created_at': acc['created_at']
+                    })
+                return jsonify({'accounts': accounts_list}), 200
+            
+            # Si las cuentas no cambiaron desde el último poll: 304 sin consultar ni serializar
+            response = conditional_response(accounts_etag(cur, current_user['user_id'], 'accounts'), build)
+            
+            cur.close()
+            return response
+            
     except Exception as e:
         print(f"Get accounts error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/transfer', methods=['POST'])
+@app.route('/api/accounts/<int:account_number>', methods=['GET'])
 @token_required
-def transfer(current_user):
+def get_account(current_user, account_number):
     try:
-        data = request.get_json()
-        
-        if not data:
-            return jsonify({'message': 'No data provided'}), 400
-        
-        from_account = data.get('from_account')
-        to_account = data.get('to_account')
-        amount = data.get('amount')
-        description = data.get('description', 'Transferencia')
-        
-        if not all([from_account, to_account, amount]):
-            return jsonify({'message': 'Faltan datos requeridos'}), 400
-        
-        # Validaciones
-        try:
-            from_account = int(from_account)
-            to_account = int(to_account)
-            amount = float(amount)
-        except ValueError:
-            return jsonify({'message': 'Tipos de datos inválidos'}), 400
-        
-        if amount <= 0:
-            return jsonify({'message': 'El monto debe ser mayor a 0'}), 400
-        
-        if amount > 10000:
-            return jsonify({'message': 'El monto máximo por transferencia es $10,000'}), 400
-        
-        if from_account == to_account:
-            return jsonify({'message': 'No puedes transferir a la misma cuenta'}), 400
-        
-        conn = get_db_connection()
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            # Validador: owner_id y versión de la fila (el trigger la incrementa en cada UPDATE)
+            cur.execute(ACCOUNT_VERSION_SQL, (account_number,))
+            version = cur.fetchone()
+            if not version or version['owner_id'] != current_user['user_id']:
+                cur.close()
+                return jsonify({'error': 'Cuenta no encontrada'}), 404
+            
+            def build():
+                cur.execute('SELECT * FROM accounts WHERE account_number = %s', (account_number,))
+                acc = cur.fetchone()
+                return jsonify({'account': {
+                    'account_number': acc['account_number'],
+                    'account_type': acc['account_type'],
+                    'balance': acc['balance'],
+                    'is_active': acc['is_active'],
+                    'created_at': acc['created_at']
+                }}), 200
+            
+            # Si la cuenta no cambió desde el último poll: 304 sin leerla ni serializarla
+            response = conditional_response(make_etag('account', account_number, version['version']), build)
+            
+            cur.close()
+            return response
+            
+    except Exception as e:
+        print(f"Get account error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Transferencias asíncronas (Prefer: respond-async o ASYNC_TRANSFERS=true):
+# workers particionados por cuenta origen dentro de este proceso
+transfer_pool = PartitionedWorkerPool()
+
+def wants_async_transfer():
+    if os.getenv('ASYNC_TRANSFERS', 'false').lower() == 'true':
+        return True
+    return 'respond-async' in request.headers.get('Prefer', '')
+
+# Ambas cuentas bloqueadas en orden de account_number: transferencias cruzadas
+# (A->B y B->A) esperan en el lock en lugar de provocar un deadlock
+LOCK_TRANSFER_ACCOUNTS_SQL = '''
+    SELECT account_number, owner_id, balance
+      FROM accounts
+     WHERE account_number IN (%s, %s)
+     ORDER BY account_number
+       FOR UPDATE
+'''
+
+def execute_transfer(user_id, from_account, to_account, amount, description):
+    """Transferencia ya validada; devuelve (cuerpo, código). Corre en la petición o en un worker"""
+    with db_connection() as conn:
         cur = conn.cursor()
+        cur.execute(LOCK_TRANSFER_ACCOUNTS_SQL, (from_account, to_account))
+        cuentas = {row['account_number']: row for row in cur.fetchall()}
+        cuenta_origen = cuentas.get(from_account)
         
-        # Verificar cuenta origen
-        cur.execute(
-            'SELECT balance FROM accounts WHERE account_number = %s AND owner_id = %s',
-            (from_account, current_user['user_id'])
-        )
-        cuenta_origen = cur.fetchone()
-        
-        if not cuenta_origen:
+        # Al salir sin commit la conexión vuelve al pool con rollback
+        if not cuenta_origen or cuenta_origen['owner_id'] != user_id:
             cur.close()
-            conn.close()
-            return jsonify({'message': 'Cuenta origen no válida'}), 403
+            return {'message': 'Cuenta origen no válida'}, 403
         
         if cuenta_origen['balance'] < amount:
             cur.close()
-            conn.close()
-            return jsonify({'message': f'Saldo insuficiente. Disponible: ${float(cuenta_origen["balance"]):,.2f}'}), 400
-        
-        # Verificar cuenta destino
-        cur.execute(
-            'SELECT account_number FROM accounts WHERE account_number = %s',
-            (to_account,)
-        )
-        cuenta_destino = cur.fetchone()
+            return {'message': f'Saldo insuficiente. Disponible: ${float(cuenta_origen["balance"]):,.2f}'}, 400
         
-        if not cuenta_destino:
+        if to_account not in cuentas:
             cur.close()
-            conn.close()
-            return jsonify({'message': 'Cuenta destino no existe'}), 404
+            return {'message': 'Cuenta destino no existe'}, 404
         
         # Realizar transferencia
         cur.execute(
@@ -277,83 +347,259 @@ def transfer(current_user):
             INSERT INTO transactions 
             (from_account_id, to_account_id, amount, transaction_type, description)
             VALUES (%s, %s, %s, %s, %s)
+            RETURNING transaction_id
             ''',
-            (from_account, to_account, amount, 'Transferencia', description)
+            (from_account, to_account, amount, 'TRANSFER', description)
         )
+        transaction_id = cur.fetchone()['transaction_id']
         
         conn.commit()
         cur.close()
-        conn.close()
         
-        return jsonify({
+        return {
             'message': 'Transferencia exitosa',
             'transaction': {
+                'transaction_id': transaction_id,
                 'from_account': from_account,
                 'to_account': to_account,
                 'amount': amount,
                 'description': description
             }
-        }), 200
-        
-    except Exception as e:
-        print(f"Transfer error: {e}")
-        if 'conn' in locals():
-            conn.rollback()
-        return jsonify({'message': f'Error en transferencia: {str(e)}'}), 500
+        }, 200
 
-@app.route('/api/transactions', methods=['GET'])
+@app.route('/api/transfer', methods=['POST'])
 @token_required
-def get_transactions(current_user):
+@idempotent(idempotency_store, scope=lambda current_user: current_user['user_id'])
+def transfer(current_user):
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
+        data = request.get_json()
         
-        # Obtener cuentas del usuario
-        cur.execute(
-            'SELECT account_number FROM accounts WHERE owner_id = %s',
-            (current_user['user_id'],)
-        )
-        accounts = cur.fetchall()
+        if not data:
+            return jsonify({'message': 'No data provided'}), 400
         
-        if not accounts:
-            cur.close()
-            conn.close()
-            return jsonify({'transactions': []}), 200
+        from_account = data.get('from_account')
+        to_account = data.get('to_account')
+        amount = data.get('amount')
+        description = data.get('description', 'Transferencia')
         
-        account_numbers = [acc['account_number'] for acc in accounts]
+        if not all([from_account, to_account, amount]):
+            return jsonify({'message': 'Faltan datos requeridos'}), 400
         
-        # Obtener transacciones relacionadas
-        placeholders = ','.join(['%s'] * len(account_numbers))
-        query = f'''
-            SELECT * FROM transactions 
-            WHERE from_account_id IN ({placeholders}) OR to_account_id IN ({placeholders})
-            ORDER BY timestamp DESC LIMIT 50
-        '''
+        # Validaciones
+        try:
+            from_account = int(from_account)
+            to_account = int(to_account)
+            amount = float(amount)
+        except ValueError:
+            return jsonify({'message': 'Tipos de datos inválidos'}), 400
         
-        cur.execute(query, account_numbers + account_numbers)
-        transactions = cur.fetchall()
+        if amount <= 0:
+            return jsonify({'message': 'El monto debe ser mayor a 0'}), 400
         
-        cur.close()
-        conn.close()
+        if amount > 10000:
+            return jsonify({'message': 'El monto máximo por transferencia es $10,000'}), 400
         
-        transactions_list = []
-        for t in transactions:
-            transactions_list.append({
-                'transaction_id': t['transaction_id'],
-                'from_account': t['from_account_id'],
-                'to_account': t['to_account_id'],
-                'amount': float(t['amount']),
-                'type': t['transaction_type'],
-                'description': t['description'],
-                'timestamp': t['timestamp'].isoformat()
-            })
+        if from_account == to_account:
+            return jsonify({'message': 'No puedes transferir a la misma cuenta'}), 400
         
-        return jsonify({'transactions': transactions_list}), 200
+        if not wants_async_transfer():
+            body, status = execute_transfer(current_user['user_id'], from_account, to_account, amount, description)
+            return jsonify(body), status
         
+        # Modo asíncrono: se encola en la partición de la cuenta origen y se responde 202
+        job_id = transfer_pool.submit(
+            from_account,
+            lambda: execute_transfer(current_user['user_id'], from_account, to_account, amount, description),
+            owner=current_user['user_id']
+        )
+        status_url = url_for('transfer_status', job_id=job_id)
+        response = jsonify({'job_id': job_id, 'status': 'queued', 'status_url': status_url})
+        response.headers['Location'] = status_url
+        return response, 202
+            
+    except Exception as e:
+        print(f"Transfer error: {e}")
+        return jsonify({'message': f'Error en transferencia: {str(e)}'}), 500
+
+@app.route('/api/transfers/<job_id>', methods=['GET'])
+@token_required
+def transfer_status(current_user, job_id):
+    job = transfer_pool.status(job_id)
+    
+    if not job or job['owner'] != current_user['user_id']:
+        return jsonify({'message': 'Transferencia no encontrada'}), 404
+    
+    return jsonify({
+        'job_id': job['job_id'],
+        'status': job['state'],
+        'status_code': job['status_code'],
+        'result': job['result']
+    }), 200
+
+@app.route('/api/transactions', methods=['GET'])
+@token_required
+def get_transactions(current_user):
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            
+            def build():
+                # Obtener cuentas del usuario
+                cur.execute(
+                    'SELECT account_number FROM accounts WHERE owner_id = %s',
+                    (current_user['user_id'],)
+                )
+                accounts = cur.fetchall()
+                
+                if not accounts:
+                    return jsonify({'transactions': [], 'next_cursor': None}), 200
+                
+                account_numbers = [acc['account_number'] for acc in accounts]
+                
+                # Obtener transacciones relacionadas (paginación por keyset con ?cursor=)
+                limit = clamp_page_size(request.args.get('limit', type=int))
+                cursor = request.args.get('cursor')
+                try:
+                    before = None
+                    if cursor:
+                        created_at, transaction_id = decode_cursor(cursor)
+                        before = (created_at, int(transaction_id))
+                except (InvalidCursorError, ValueError):
+                    return jsonify({'error': 'Cursor inválido'}), 400
+                
+                # Dos ramas (cargos y abonos) por cuenta, cada una leída en orden del
+                # índice (cuenta, created_at DESC, transaction_id DESC) y cortada en el
+                # LIMIT; solo se ordenan esas filas. La rama de abonos omite las
+                # transferencias entre cuentas propias, que ya salen como cargo.
+                keyset = ''
+                keyset_params = []
+                if before:
+                    keyset = 'AND (t.created_at, t.transaction_id) < (%s, %s)'
+                    keyset_params = list(before)
+                query = f'''
+                    SELECT * FROM (
+                        SELECT t.* FROM unnest(%s::int[]) AS a(account_number)
+                        CROSS JOIN LATERAL (
+                            SELECT * FROM transactions t
+                            WHERE t.from_account_id = a.account_number {keyset}
+                            ORDER BY t.created_at DESC, t.transaction_id DESC LIMIT %s
+                        ) t
+                        UNION ALL
+                        SELECT t.* FROM unnest(%s::int[]) AS a(account_number)
+                        CROSS JOIN LATERAL (
+                            SELECT * FROM transactions t
+                            WHERE t.to_account_id = a.account_number {keyset}
+                              AND (t.from_account_id IS NULL OR t.from_account_id <> ALL(%s::int[]))
+                            ORDER BY t.created_at DESC, t.transaction_id DESC LIMIT %s
+                        ) t
+                    ) history
+                    ORDER BY created_at DESC, transaction_id DESC LIMIT %s
+                '''
+                
+                page_size = limit + 1
+                cur.execute(query, (
+                    [account_numbers] + keyset_params + [page_size]
+                    + [account_numbers] + keyset_params + [account_numbers, page_size]
+                    + [page_size]
+                ))
+                transactions, next_cursor = paginate(
+                    cur.fetchall(), limit, lambda t: (t['created_at'], t['transaction_id'])
+                )
+                
+                transactions_list = []
+                for t in transactions:
+                    transactions_list.append({
+                        'transaction_id': t['transaction_id'],
+                        'from_account': t['from_account_id'],
+                        'to_account': t['to_account_id'],
+                        'amount': t['amount'],
+                        'type': t['transaction_type'],
+                        'description': t['description'],
+                        'timestamp': t['created_at']
+                    })
+                
+                return jsonify({'transactions': transactions_list, 'next_cursor': next_cursor}), 200
+            
+            # Historial de todas las cuentas del usuario: el mismo validador que /api/accounts
+            # (cada transacción actualiza el saldo y por tanto la versión de sus cuentas)
+            etag = accounts_etag(
+                cur, current_user['user_id'], 'transactions',
+                request.args.get('cursor'), request.args.get('limit')
+            )
+            response = conditional_response(etag, build)
+            
+            cur.close()
+            return response
+            
     except Exception as e:
         print(f"Transactions error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Exportación del historial completo: mismas ramas que /api/transactions, sin
+# LIMIT y en orden cronológico (el planner mezcla ambas con Merge Append)
+EXPORT_SQL = '''
+    SELECT * FROM (
+        SELECT * FROM transactions WHERE from_account_id = %s
+        UNION ALL
+        SELECT * FROM transactions
+        WHERE to_account_id = %s AND from_account_id IS DISTINCT FROM %s
+    ) history
+    ORDER BY created_at, transaction_id
+'''
+EXPORT_FIELDS = ('transaction_id', 'from_account', 'to_account', 'amount', 'type', 'description', 'timestamp')
+EXPORT_BATCH_SIZE = 2000
+
+@app.route('/api/transactions/export', methods=['GET'])
+@token_required
+def export_transactions(current_user):
+    fmt = request.args.get('format', NDJSON)
+    account_number = request.args.get('account', type=int)
+    
+    if fmt not in CONTENT_TYPES:
+        return jsonify({'error': f"Formato no soportado; usar {', '.join(CONTENT_TYPES)}"}), 400
+    if account_number is None:
+        return jsonify({'error': 'Parámetro account requerido'}), 400
+    
+    try:
+        with db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT owner_id FROM accounts WHERE account_number = %s', (account_number,))
+            account = cur.fetchone()
+            cur.close()
+    except Exception as e:
+        print(f"Export error: {e}")
+        return jsonify({'error': str(e)}), 500
+    
+    if not account or account['owner_id'] != current_user['user_id']:
+        return jsonify({'error': 'Cuenta no encontrada'}), 404
+    
+    def generate():
+        # La conexión se toma al empezar a enviar y vuelve al pool al terminar,
+        # si el cliente se desconecta (GeneratorExit) o si el error ocurre a
+        # mitad; una respuesta que nunca se itera no llega a tomar ninguna
+        with db_connection() as conn:
+            # Cursor con nombre = cursor del lado del servidor: psycopg2 trae
+            # EXPORT_BATCH_SIZE filas por viaje en lugar del resultado completo
+            cur = conn.cursor(name='transactions_export')
+            cur.itersize = EXPORT_BATCH_SIZE
+            cur.execute(EXPORT_SQL, (account_number, account_number, account_number))
+            rows = ({
+                'transaction_id': t['transaction_id'],
+                'from_account': t['from_account_id'],
+                'to_account': t['to_account_id'],
+                'amount': t['amount'],
+                'type': t['transaction_type'],
+                'description': t['description'],
+                'timestamp': t['created_at']
+            } for t in cur)
+            yield from stream_rows(rows, fmt, EXPORT_FIELDS)
+            cur.close()
+    
+    response = Response(stream_with_context(generate()), content_type=CONTENT_TYPES[fmt])
+    filename = attachment_name(f'transactions-{account_number}', fmt)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 if __name__ == '__main__':
     # Bind a 0.0.0.0 para que Docker pueda acceder
     app.run(host='0.0.0.0', port=5000, debug=True)
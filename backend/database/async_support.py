@@ -0,0 +1,56 @@
+"""
+database/async_support.py - Ejecutar el código síncrono de BankController sobre SQLAlchemy asyncio
+
+run_bound() ejecuta una función síncrona dentro de un greenlet de SQLAlchemy
+(greenlet_spawn, el mismo mecanismo de AsyncSession.run_sync) con un
+sessionmaker ligado al engine asíncrono. Mientras dura la llamada,
+db_session() crea sus sesiones con ese sessionmaker y cada consulta cede el
+control al event loop en lugar de bloquear un hilo, así que el mismo código
+de BankController sirve a la versión síncrona y a la asíncrona.
+
+Los puntos que esperan sin pasar por la base de datos (backoff de los
+reintentos, resultado del group commit) usan sleep() y wait_future(), que
+dentro de run_bound() esperan en el event loop y fuera se comportan como
+time.sleep y Future.result.
+"""
+
+import time
+import asyncio
+import contextvars
+
+_bound_sessionmaker = contextvars.ContextVar('bound_sessionmaker', default=None)
+
+
+def bound_sessionmaker():
+    """sessionmaker del engine asíncrono si estamos dentro de run_bound(), si no None."""
+    return _bound_sessionmaker.get()
+
+
+def sleep(delay):
+    if _bound_sessionmaker.get() is None:
+        time.sleep(delay)
+        return
+    from sqlalchemy.util import await_only
+    await_only(asyncio.sleep(delay))
+
+
+def wait_future(future):
+    """Resultado de un concurrent.futures.Future sin bloquear el event loop."""
+    if _bound_sessionmaker.get() is None:
+        return future.result()
+    from sqlalchemy.util import await_only
+    return await_only(asyncio.wrap_future(future))
+
+
+async def run_bound(session_factory, fn, *args, **kwargs):
+    """await fn(*args, **kwargs) con db_session() ligado a session_factory."""
+    from sqlalchemy.util import greenlet_spawn
+
+    def bound():
+        token = _bound_sessionmaker.set(session_factory)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _bound_sessionmaker.reset(token)
+
+    return await greenlet_spawn(bound)
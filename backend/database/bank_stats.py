@@ -0,0 +1,129 @@
+"""
+database/bank_stats.py - Contadores globales del banco mantenidos de forma incremental
+
+Cada escritura de BankController suma sus deltas (usuarios, cuentas,
+transacciones, saldo total) dentro de su propia transacción, así que los
+resúmenes leen una tabla de tamaño fijo en lugar de recorrer users, accounts y
+transactions completas.
+
+Los contadores están repartidos en BANK_STATS_SLOTS filas: cada escritura
+actualiza una fila al azar, de modo que las transacciones concurrentes no se
+serializan sobre una única fila caliente. La lectura suma todas las filas.
+
+reconcile() compara los contadores con un recorrido completo y corrige la
+diferencia; está pensado para ejecutarse de noche:
+
+    python -m database.bank_stats
+"""
+
+import os
+import random
+import logging
+from decimal import Decimal
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+STATS_SLOTS = int(os.getenv('BANK_STATS_SLOTS', 16))
+
+_RECORD_SQL = text("""
+    INSERT INTO bank_stats (slot, users, accounts, transactions, total_balance, updated_at)
+    VALUES (:slot, :users, :accounts, :transactions, :balance, CURRENT_TIMESTAMP)
+    ON CONFLICT (slot) DO UPDATE
+       SET users = bank_stats.users + EXCLUDED.users,
+           accounts = bank_stats.accounts + EXCLUDED.accounts,
+           transactions = bank_stats.transactions + EXCLUDED.transactions,
+           total_balance = bank_stats.total_balance + EXCLUDED.total_balance,
+           updated_at = EXCLUDED.updated_at
+""")
+
+_READ_SQL = text("""
+    SELECT COALESCE(SUM(users), 0) AS users,
+           COALESCE(SUM(accounts), 0) AS accounts,
+           COALESCE(SUM(transactions), 0) AS transactions,
+           COALESCE(SUM(total_balance), 0) AS total_balance
+      FROM bank_stats
+""")
+
+# Saldo total = saldos base + sub-saldos (striping) + asientos del libro mayor
+_FULL_SCAN_SQL = text("""
+    SELECT (SELECT COUNT(*) FROM users) AS users,
+           (SELECT COUNT(*) FROM accounts) AS accounts,
+           (SELECT COUNT(*) FROM transactions) AS transactions,
+           (SELECT COALESCE(SUM(balance), 0) FROM accounts)
+         + (SELECT COALESCE(SUM(balance), 0) FROM account_balance_slots)
+         + (SELECT COALESCE(SUM(amount), 0) FROM ledger_postings) AS total_balance
+""")
+
+FIELDS = ('users', 'accounts', 'transactions', 'total_balance')
+
+
+def record(session, users=0, accounts=0, transactions=0, balance=Decimal('0.00')):
+    """Sumar deltas a los contadores dentro de la transacción de la sesión.
+
+    Llamar una sola vez por transacción, al final del cuerpo, para que solo
+    se bloquee una fila de contadores y siempre después de las cuentas.
+    """
+    if not (users or accounts or transactions or balance):
+        return
+    session.execute(_RECORD_SQL, {
+        "slot": random.randrange(STATS_SLOTS),
+        "users": users,
+        "accounts": accounts,
+        "transactions": transactions,
+        "balance": balance
+    })
+
+
+def read(session):
+    """Totales actuales: suma de STATS_SLOTS filas, independiente del tamaño de las tablas."""
+    row = session.execute(_READ_SQL).first()
+    return {
+        'users': int(row.users),
+        'accounts': int(row.accounts),
+        'transactions': int(row.transactions),
+        'total_balance': Decimal(row.total_balance)
+    }
+
+
+def reconcile(session_factory=None, fix=True):
+    """Comparar los contadores con un recorrido completo y corregir la deriva.
+
+    Contadores y recorrido se leen en la misma instantánea (REPEATABLE READ),
+    así que la diferencia es exacta aunque haya escrituras en curso. La
+    corrección se suma como un delta más en otra transacción: los deltas
+    conmutan, de modo que no hace falta bloquear a los escritores.
+    Devuelve el dict de diferencias (vacío si todo cuadra).
+    """
+    if session_factory is None:
+        from database.db_manager import db_session as session_factory
+
+    with session_factory() as session:
+        session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+        counters = read(session)
+        actual = session.execute(_FULL_SCAN_SQL).first()._asdict()
+
+    drift = {
+        field: actual[field] - counters[field]
+        for field in FIELDS
+        if actual[field] != counters[field]
+    }
+    if not drift:
+        logger.info("Bank stats reconciled: no drift")
+        return drift
+
+    logger.warning(f"Bank stats drift detected: {drift}")
+    if fix:
+        with session_factory() as session:
+            record(
+                session,
+                users=drift.get('users', 0),
+                accounts=drift.get('accounts', 0),
+                transactions=drift.get('transactions', 0),
+                balance=drift.get('total_balance', Decimal('0.00'))
+            )
+    return drift
+
+
+if __name__ == "__main__":
+    print(f"Deriva corregida: {reconcile() or 'ninguna'}")
@@ -0,0 +1,325 @@
+"""
+database/conn_pool.py - Pool de conexiones DB-API (psycopg2 / pg8000) para backend/app.py
+
+En lugar de abrir una conexión (TCP + autenticación) por petición, las
+conexiones se reutilizan:
+
+- tamaño mínimo y máximo; si el pool está lleno, acquire() espera hasta
+  acquire_timeout y luego lanza PoolTimeoutError
+- health check: una conexión ociosa más de health_check_after segundos se
+  comprueba con un SELECT 1 antes de entregarla; las que fallan o superan
+  max_lifetime se cierran y se sustituyen
+- al devolverla se hace rollback, así la siguiente petición no hereda una
+  transacción abierta ni un error pendiente
+- leak detection: se guarda dónde se pidió cada conexión; leaks() lista las
+  retenidas más de leak_timeout y una conexión que se recolecta sin haberse
+  devuelto se registra en el log y libera su hueco
+
+acquire() devuelve un proxy: conn.close() la devuelve al pool, así que el
+código existente que llama a close() sigue funcionando. connection() es un
+context manager que garantiza la devolución.
+"""
+
+import time
+import logging
+import threading
+import traceback
+import weakref
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(Exception):
+    """No hubo conexión libre dentro de acquire_timeout."""
+
+
+def _ping(conn):
+    cur = conn.cursor()
+    cur.execute('SELECT 1')
+    cur.fetchone()
+    cur.close()
+    conn.rollback()
+
+
+class _Entry:
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn, now):
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """Proxy de una conexión prestada; close() la devuelve al pool."""
+
+    def __init__(self, pool, entry, stack):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_entry', entry)
+        object.__setattr__(self, '_stack', stack)
+        object.__setattr__(self, '_checked_out_at', pool._clock())
+
+    def __getattr__(self, name):
+        entry = self._entry
+        if entry is None:
+            raise AttributeError(f"connection already returned to the pool ({name})")
+        return getattr(entry.conn, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._entry.conn, name, value)
+
+    @property
+    def closed(self):
+        return self._entry is None or bool(getattr(self._entry.conn, 'closed', False))
+
+    def close(self):
+        self._pool._release(self)
+
+    def discard(self):
+        """Cerrar la conexión real en lugar de devolverla (p. ej. tras un error de red)."""
+        self._pool._release(self, discard=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __del__(self):
+        try:
+            if self._entry is not None:
+                self._pool._reclaim_leak(self)
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Pool thread-safe de conexiones creadas con connect()."""
+
+    def __init__(self, connect, min_size=1, max_size=10, acquire_timeout=5.0,
+                 health_check_after=30.0, max_lifetime=1800.0, max_idle=300.0,
+                 leak_timeout=60.0, track_stacks=True, ping=_ping, clock=time.monotonic):
+        if max_size < 1 or min_size > max_size:
+            raise ValueError("Pool sizes must satisfy 0 <= min_size <= max_size and max_size >= 1")
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.health_check_after = health_check_after
+        self.max_lifetime = max_lifetime
+        self.max_idle = max_idle
+        self.leak_timeout = leak_timeout
+        self.track_stacks = track_stacks
+        self._ping = ping
+        self._clock = clock
+
+        self._cond = threading.Condition()
+        self._idle = []
+        # Débil: un proxy olvidado se puede recolectar y su __del__ recupera el hueco
+        self._checked_out = weakref.WeakSet()
+        self._size = 0
+        self._waiting = 0
+        self._counters = {
+            'acquired': 0, 'connects': 0, 'discarded': 0, 'timeouts': 0,
+            'health_check_failures': 0, 'leaks_reclaimed': 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # ---- préstamo / devolución ----
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        started = self._clock()
+        deadline = started + timeout
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                entry = self._open_reserved()
+                break
+            if self._usable(entry):
+                break
+            self._close_entry(entry)
+
+        waited = self._clock() - started
+        stack = traceback.extract_stack(limit=8)[:-1] if self.track_stacks else None
+        proxy = PooledConnection(self, entry, stack)
+        with self._cond:
+            self._checked_out.add(proxy)
+            self._counters['acquired'] += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        return proxy
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Conexión prestada que siempre vuelve al pool (con rollback si hubo error)."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def _reserve(self, deadline):
+        """Una conexión ociosa, o None tras reservar un hueco para abrir una nueva."""
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    self._counters['timeouts'] += 1
+                    leaks = self._leaks_locked()
+                    break
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+        for leak in leaks:
+            logger.warning(f"Connection held for {leak['held_seconds']:.1f}s, acquired at:\n{leak['stack']}")
+        raise PoolTimeoutError(
+            f"No connection available within the pool timeout ({self.max_size} in use)"
+        )
+
+    def _open_reserved(self):
+        """Abrir una conexión para un hueco ya reservado (liberándolo si falla)."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            self._counters['connects'] += 1
+        return _Entry(conn, self._clock())
+
+    def _usable(self, entry):
+        now = self._clock()
+        if getattr(entry.conn, 'closed', False):
+            return False
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return False
+        if self.health_check_after is not None and now - entry.last_used > self.health_check_after:
+            try:
+                self._ping(entry.conn)
+            except Exception as e:
+                logger.warning(f"Discarding pooled connection that failed its health check: {e}")
+                with self._cond:
+                    self._counters['health_check_failures'] += 1
+                return False
+        return True
+
+    def _close_entry(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._counters['discarded'] += 1
+            self._cond.notify()
+
+    def _release(self, proxy, discard=False):
+        entry = proxy._entry
+        if entry is None:
+            return
+        object.__setattr__(proxy, '_entry', None)
+
+        if not discard:
+            try:
+                if getattr(entry.conn, 'closed', False):
+                    discard = True
+                else:
+                    entry.conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._cond:
+            self._checked_out.discard(proxy)
+        if discard:
+            self._close_entry(entry)
+            return
+
+        entry.last_used = self._clock()
+        with self._cond:
+            self._idle.append(entry)
+            expired = self._expired_idle_locked()
+            self._cond.notify()
+        for stale in expired:
+            self._close_entry(stale)
+
+    def _expired_idle_locked(self):
+        """Ociosas más de max_idle por encima de min_size (las más antiguas están al principio)."""
+        if not self.max_idle:
+            return []
+        now = self._clock()
+        expired = []
+        while (self._size - len(expired) > self.min_size and self._idle
+               and now - self._idle[0].last_used > self.max_idle):
+            expired.append(self._idle.pop(0))
+        return expired
+
+    def _reclaim_leak(self, proxy):
+        logger.warning(
+            "Pooled connection was garbage-collected without close(); acquired at:\n"
+            + (''.join(traceback.format_list(proxy._stack)) if proxy._stack else '(stack tracking disabled)')
+        )
+        with self._cond:
+            self._counters['leaks_reclaimed'] += 1
+        self._release(proxy, discard=True)
+
+    # ---- mantenimiento y observabilidad ----
+
+    def fill(self):
+        """Abrir conexiones hasta min_size (al arrancar la app)."""
+        while True:
+            with self._cond:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            entry = self._open_reserved()
+            with self._cond:
+                self._idle.insert(0, entry)
+                self._cond.notify()
+
+    def _leaks_locked(self):
+        now = self._clock()
+        return [{
+            'held_seconds': now - proxy._checked_out_at,
+            'stack': ''.join(traceback.format_list(proxy._stack)) if proxy._stack else None,
+        } for proxy in self._checked_out if now - proxy._checked_out_at > self.leak_timeout]
+
+    def leaks(self):
+        """Conexiones prestadas hace más de leak_timeout segundos, con dónde se pidieron."""
+        with self._cond:
+            return self._leaks_locked()
+
+    def stats(self):
+        with self._cond:
+            acquired = self._counters['acquired']
+            return {
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': len(self._checked_out),
+                'waiting': self._waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self._counters,
+                'avg_wait_ms': round(self._wait_total / acquired * 1000, 3) if acquired else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+                'suspected_leaks': len(self._leaks_locked()),
+            }
+
+    def close(self):
+        """Cerrar las conexiones ociosas (las prestadas se cierran al devolverse)."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self.min_size = 0
+        for entry in idle:
+            self._close_entry(entry)
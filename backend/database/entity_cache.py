@@ -0,0 +1,145 @@
+"""
+database/entity_cache.py - Caché read-through de usuarios y cuentas
+
+LRU acotado con TTL. Cada entidad se guarda una sola vez por (tipo, id) y se
+puede encontrar también por claves alternativas (username, email,
+account_number). invalidate() elimina la entidad junto con todos sus alias.
+
+Las escrituras de BankController invalidan las entidades que modifican en
+este proceso; lo que cambie otro proceso se ve, como tarde, al caducar el TTL.
+"""
+
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class EntityCache:
+    """Caché LRU con TTL y claves alternativas (thread-safe)."""
+
+    def __init__(self, max_entries=None, ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries or int(os.getenv('ENTITY_CACHE_SIZE', 10000))
+        self.ttl = ttl if ttl is not None else float(os.getenv('ENTITY_CACHE_TTL_SECONDS', 30))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # (kind, id) -> [expires_at, value, alias_keys]
+        self._entries = OrderedDict()
+        # (kind, key_name, key_value) -> (kind, id)
+        self._aliases = {}
+        # Contador de invalidaciones y última invalidación de cada entidad: un
+        # valor cargado antes de que se invalidara su entidad podría estar
+        # obsoleto y no se guarda. Si el registro desborda, las entidades ya
+        # olvidadas se comparan con la invalidación más reciente descartada.
+        self._generation = 0
+        self._invalidated = OrderedDict()
+        self._invalidated_floor = 0
+        self._started_at = clock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, kind, key_name, key_value):
+        """Valor cacheado o None. key_name 'id' busca por clave primaria."""
+        with self._lock:
+            primary = self._resolve(kind, key_name, key_value)
+            entry = self._entries.get(primary) if primary else None
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    self._remove(primary)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(primary)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind, entity_id, value, **aliases):
+        """Guardar value bajo (kind, entity_id) y bajo cada alias (p. ej. username=...)."""
+        self._put(kind, entity_id, value, aliases, None)
+
+    def _put(self, kind, entity_id, value, aliases, generation):
+        primary = (kind, str(entity_id))
+        alias_keys = [(kind, name, str(alias)) for name, alias in aliases.items() if alias is not None]
+        with self._lock:
+            if generation is not None and self._invalidated.get(primary, self._invalidated_floor) > generation:
+                return
+            self._remove(primary)
+            self._entries[primary] = [self._clock() + self.ttl, value, alias_keys]
+            for alias_key in alias_keys:
+                self._aliases[alias_key] = primary
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def get_or_load(self, kind, key_name, key_value, loader, index):
+        """Lectura read-through.
+
+        loader() consulta la base de datos y devuelve el valor o None (los
+        negativos no se cachean). index(value) devuelve (entity_id, aliases).
+        """
+        value = self.get(kind, key_name, key_value)
+        if value is not None:
+            return value
+        generation = self._generation
+        value = loader()
+        if value is not None:
+            entity_id, aliases = index(value)
+            self._put(kind, entity_id, value, aliases, generation)
+        return value
+
+    def invalidate(self, kind, entity_id):
+        primary = (kind, str(entity_id))
+        with self._lock:
+            self._generation += 1
+            self._invalidated[primary] = self._generation
+            self._invalidated.move_to_end(primary)
+            if len(self._invalidated) > self.max_entries:
+                _, self._invalidated_floor = self._invalidated.popitem(last=False)
+            if self._remove(primary):
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._invalidated.clear()
+            self._invalidated_floor = self._generation
+            self._entries.clear()
+            self._aliases.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            elapsed = max(self._clock() - self._started_at, 1e-9)
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                # Cada acierto es una lectura que no llegó a la base de datos
+                'db_reads_saved_per_second': self.hits / elapsed
+            }
+
+    def _resolve(self, kind, key_name, key_value):
+        if key_name == 'id':
+            return (kind, str(key_value))
+        return self._aliases.get((kind, key_name, str(key_value)))
+
+    def _remove(self, primary):
+        entry = self._entries.pop(primary, None)
+        if entry is None:
+            return False
+        for alias_key in entry[2]:
+            if self._aliases.get(alias_key) == primary:
+                del self._aliases[alias_key]
+        return True
+
+
+# Caché compartida del proceso
+entity_cache = EntityCache()
@@ -0,0 +1,64 @@
+"""
+database/etag.py - ETag / If-None-Match para respuestas de solo lectura
+
+El ETag se calcula a partir de un validador barato (la versión de la cuenta,
+o count/sum(version)/max(id) de las cuentas de un usuario) más los parámetros
+de la petición, sin construir el cuerpo. Si coincide con If-None-Match la
+respuesta es un 304 vacío y la consulta completa no se ejecuta.
+
+accounts.version la incrementa un trigger en cada UPDATE de la cuenta (ver
+init_postgres_tables.sql o la migración 008); toda transacción modifica el
+saldo de sus cuentas en la misma transacción de base de datos, así que la
+versión cubre también el historial.
+"""
+
+import hashlib
+
+# Validadores del esquema SERIAL (accounts.account_number / owner_id)
+ACCOUNT_VERSION_SQL = '''
+    SELECT owner_id, version FROM accounts WHERE account_number = %s
+'''
+
+# Alta de cuenta: count y max cambian; cualquier UPDATE: sum(version) crece
+OWNER_ACCOUNTS_VERSION_SQL = '''
+    SELECT COUNT(*) AS accounts,
+           COALESCE(SUM(version), 0) AS version,
+           COALESCE(MAX(account_number), 0) AS last_account
+    FROM accounts WHERE owner_id = %s
+'''
+
+
+def make_etag(*parts):
+    """ETag fuerte (entre comillas) derivado de las partes dadas."""
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match, etag):
+    """Comparación débil de If-None-Match (RFC 9110): admite listas, '*' y prefijos W/."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(','))
+    return any(tag.removeprefix('W/') == etag.removeprefix('W/') for tag in candidates)
+
+
+def conditional_response(etag, build):
+    """304 si la petición ya tiene etag; si no, la respuesta de build() con su ETag.
+
+    build() devuelve lo mismo que una vista Flask; solo las respuestas 200
+    llevan ETag.
+    """
+    from flask import request, make_response
+
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(build())
+        if response.status_code != 200:
+            return response
+    response.headers['ETag'] = etag
+    # El navegador puede guardar la respuesta pero debe revalidarla siempre
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
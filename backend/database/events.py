@@ -0,0 +1,370 @@
+"""
+database/events.py - Pub/sub en proceso para notificar saldos y transacciones (SSE)
+
+Las escrituras publican eventos por tema (p. ej. "account:<id>") y cada
+conexión SSE es una Subscription con una cola acotada en memoria. Un
+dashboard inactivo solo espera en su cola: no consulta la base de datos.
+
+Con varios workers, la publicación pasa por un puente:
+
+    LocalBridge     entrega directa al bus del proceso (un solo worker, tests)
+    PostgresBridge  NOTIFY en un canal; un único hilo por proceso hace LISTEN
+                    y reenvía cada notificación a su bus local, y otro envía
+                    los NOTIFY de una cola para no frenar a quien escribe
+
+EVENTS_BRIDGE=postgres activa el puente de PostgreSQL (por defecto local).
+"""
+
+import os
+import json
+import queue
+import select
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+LOCAL = 'local'
+POSTGRES = 'postgres'
+
+EVENTS_CHANNEL = os.getenv('EVENTS_CHANNEL', 'bank_events')
+
+# NOTIFY admite payloads de menos de 8000 bytes
+MAX_NOTIFY_PAYLOAD = 7900
+
+RESYNC = 'resync'
+
+# Marca de fin para el hilo que envía los NOTIFY
+_STOP = object()
+
+
+class Subscription:
+    """Cola acotada de eventos de uno o varios temas.
+
+    Si el consumidor se retrasa más de max_pending eventos se descartan los
+    más antiguos y el siguiente get() devuelve un evento RESYNC para que el
+    cliente recargue su estado.
+    """
+
+    def __init__(self, bus, max_pending):
+        self._bus = bus
+        self._events = deque()
+        self._max_pending = max_pending
+        self._ready = threading.Condition()
+        self._overflowed = False
+        self.topics = set()
+        self.closed = False
+
+    def _deliver(self, event):
+        with self._ready:
+            if len(self._events) >= self._max_pending:
+                self._events.popleft()
+                self._overflowed = True
+            self._events.append(event)
+            self._ready.notify()
+        return self._overflowed
+
+    def get(self, timeout=None):
+        """Siguiente evento {'type', 'topic', 'data'}, o None si vence timeout."""
+        with self._ready:
+            if not self._events and not self.closed:
+                self._ready.wait(timeout)
+            if self._overflowed:
+                self._overflowed = False
+                self._events.clear()
+                return {'type': RESYNC, 'topic': None, 'data': None}
+            return self._events.popleft() if self._events else None
+
+    def subscribe(self, *topics):
+        self._bus._add(self, topics)
+
+    def close(self):
+        self._bus._remove(self)
+        with self._ready:
+            self.closed = True
+            self._ready.notify_all()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class EventBus:
+    """Reparto de eventos entre las suscripciones del proceso."""
+
+    def __init__(self):
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._published = 0
+        self._delivered = 0
+        self._overflows = 0
+
+    def subscribe(self, *topics, max_pending=100):
+        subscription = Subscription(self, max_pending)
+        self._add(subscription, topics)
+        return subscription
+
+    def _add(self, subscription, topics):
+        with self._lock:
+            for topic in topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+                subscription.topics.add(topic)
+
+    def _remove(self, subscription):
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def publish(self, topic, event_type, data=None):
+        """Entregar el evento a las suscripciones del tema; devuelve cuántas lo recibieron."""
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+            self._published += 1
+        event = {'type': event_type, 'topic': topic, 'data': data}
+        overflows = sum(1 for subscription in subscribers if subscription._deliver(event))
+        with self._lock:
+            self._delivered += len(subscribers)
+            self._overflows += overflows
+        return len(subscribers)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'topics': len(self._topics),
+                'subscriptions': len({s for subs in self._topics.values() for s in subs}),
+                'published': self._published,
+                'delivered': self._delivered,
+                'overflows': self._overflows,
+            }
+
+
+class LocalBridge:
+    """Puente en memoria: publica directamente en el bus del proceso."""
+
+    name = LOCAL
+
+    def __init__(self, bus):
+        self.bus = bus
+
+    def publish(self, topic, event_type, data=None):
+        self.bus.publish(topic, event_type, data)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _driver_connection(conn):
+    """Conexión DBAPI real detrás del proxy del pool de SQLAlchemy."""
+    return getattr(conn, 'driver_connection', None) or getattr(conn, 'connection', None) or conn
+
+
+def _drain_notifications(conn):
+    """Payloads pendientes (psycopg2: notifies, psycopg 3: notifies(), pg8000: notifications)."""
+    if callable(getattr(conn, 'notifies', None)):
+        return [notify.payload for notify in conn.notifies(timeout=0)]
+    if hasattr(conn, 'notifies'):
+        conn.poll()
+        payloads = [notify.payload for notify in conn.notifies]
+        conn.notifies.clear()
+        return payloads
+    payloads = []
+    while conn.notifications:
+        _, _, payload = conn.notifications.popleft()
+        payloads.append(payload)
+    return payloads
+
+
+class PostgresBridge:
+    """Puente LISTEN/NOTIFY para varios procesos.
+
+    connect() devuelve una conexión nueva (se usa una para LISTEN y otra para
+    NOTIFY). publish() solo encola el evento: el hilo events-notifier es el
+    único que usa la conexión de NOTIFY, así que las escrituras no esperan a
+    la red ni se serializan entre sí; si la cola se llena (base de datos
+    caída) los eventos se descartan y los clientes recargan al reconectar.
+    Con psycopg2 el hilo de escucha espera en select() sobre el
+    socket; con pg8000, que no expone el socket, hace un SELECT 1 cada
+    poll_interval para recibir las notificaciones. En ambos casos es una sola
+    conexión por proceso, independiente del número de clientes SSE.
+    """
+
+    name = POSTGRES
+
+    def __init__(self, bus, connect, channel=EVENTS_CHANNEL, poll_interval=1.0, reconnect_delay=2.0,
+                 max_queued=10000):
+        self.bus = bus
+        self._connect = connect
+        self.channel = channel
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._notify_conn = None
+        self._outbox = queue.Queue(maxsize=max_queued)
+        self._stopping = threading.Event()
+        self._thread = None
+        self._notifier = None
+
+    def _open(self):
+        # Se conserva el proxy del pool para que no vuelva al pool mientras se usa
+        handle = self._connect()
+        conn = _driver_connection(handle)
+        conn.autocommit = True
+        return handle, conn
+
+    def publish(self, topic, event_type, data=None):
+        payload = json.dumps({'topic': topic, 'type': event_type, 'data': data}, default=str)
+        if len(payload.encode('utf-8')) > MAX_NOTIFY_PAYLOAD:
+            # El cliente recarga el recurso; los datos no caben en la notificación
+            payload = json.dumps({'topic': topic, 'type': event_type, 'data': None})
+        try:
+            self._outbox.put_nowait(payload)
+        except queue.Full:
+            logger.warning(f"Event queue for {self.channel} is full; dropping {event_type} on {topic}")
+
+    def start(self):
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._listen_forever, name='events-listener', daemon=True)
+            self._thread.start()
+            self._notifier = threading.Thread(target=self._notify_forever, name='events-notifier', daemon=True)
+            self._notifier.start()
+
+    def stop(self):
+        """Detener ambos hilos; los eventos ya encolados se envían antes de cerrar."""
+        self._stopping.set()
+        if self._notifier is not None:
+            self._outbox.put(_STOP)
+            self._notifier.join(timeout=self.reconnect_delay + 1)
+            self._notifier = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.poll_interval + 1)
+            self._thread = None
+
+    def _notify_forever(self):
+        while True:
+            payload = self._outbox.get()
+            if payload is _STOP:
+                break
+            self._notify(payload)
+        if self._notify_conn is not None:
+            self._notify_conn[0].close()
+            self._notify_conn = None
+
+    def _notify(self, payload):
+        try:
+            if self._notify_conn is None:
+                self._notify_conn = self._open()
+            cursor = self._notify_conn[1].cursor()
+            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+            cursor.close()
+        except Exception as e:
+            self._notify_conn = None
+            logger.warning(f"Could not publish event on {self.channel}: {e}")
+
+    def _listen_forever(self):
+        while not self._stopping.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning(f"Event listener on {self.channel} lost its connection: {e}")
+                self._stopping.wait(self.reconnect_delay)
+
+    def _listen(self):
+        handle, conn = self._open()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f'LISTEN "{self.channel}"')
+            waitable = hasattr(conn, 'fileno')
+            while not self._stopping.is_set():
+                if waitable:
+                    select.select([conn], [], [], self.poll_interval)
+                else:
+                    self._stopping.wait(self.poll_interval)
+                    cursor.execute("SELECT 1")
+                    cursor.fetchall()
+                for payload in _drain_notifications(conn):
+                    self._dispatch(payload)
+        finally:
+            handle.close()
+
+    def _dispatch(self, payload):
+        try:
+            event = json.loads(payload)
+            self.bus.publish(event['topic'], event['type'], event.get('data'))
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring malformed event payload: {e}")
+
+
+def format_sse(event_type, data, event_id=None):
+    """Un mensaje Server-Sent Events (data en JSON en una sola línea)."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data, default=str, separators=(',', ':'))}")
+    return '\n'.join(lines) + '\n\n'
+
+
+def sse_stream(subscription, heartbeat=15.0, retry_ms=3000, on_event=None):
+    """Generador de texto SSE para una suscripción; cierra la suscripción al terminar.
+
+    Cada heartbeat segundos sin eventos envía un comentario para que proxies
+    y navegador mantengan la conexión. on_event(event) permite reaccionar a un
+    evento antes de enviarlo (p. ej. suscribirse a una cuenta nueva).
+    """
+    sequence = 0
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while not subscription.closed:
+            event = subscription.get(timeout=heartbeat)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            if on_event is not None:
+                on_event(event)
+            sequence += 1
+            yield format_sse(event['type'], event['data'], sequence)
+    finally:
+        subscription.close()
+
+
+event_bus = EventBus()
+_bridge = None
+_bridge_lock = threading.Lock()
+
+
+def _connect_primary():
+    from database.db_manager import get_engine
+    return get_engine().raw_connection()
+
+
+def get_bridge():
+    """Puente del proceso según EVENTS_BRIDGE (se arranca la primera vez que se pide)."""
+    global _bridge
+    if _bridge is None:
+        with _bridge_lock:
+            if _bridge is None:
+                if os.getenv('EVENTS_BRIDGE', LOCAL).lower() == POSTGRES:
+                    bridge = PostgresBridge(
+                        event_bus, _connect_primary,
+                        poll_interval=float(os.getenv('EVENTS_POLL_INTERVAL_SECONDS', 1))
+                    )
+                else:
+                    bridge = LocalBridge(event_bus)
+                bridge.start()
+                _bridge = bridge
+    return _bridge
+
+
+def publish(topic, event_type, data=None):
+    """Publicar en todos los procesos (a través del puente configurado)."""
+    get_bridge().publish(topic, event_type, data)
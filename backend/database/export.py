@@ -0,0 +1,74 @@
+"""
+database/export.py - Formateo en streaming de exportaciones (NDJSON / CSV)
+
+stream_rows() consume un iterable de filas (dicts) y produce trozos de texto
+de ~chunk_rows filas cada uno, así que la memoria usada no depende del número
+de filas: basta con que el iterable venga de un cursor del lado del servidor.
+"""
+
+import io
+import csv
+import json
+from datetime import datetime, date
+from decimal import Decimal
+from uuid import UUID
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+
+CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    CSV: 'text/csv; charset=utf-8',
+}
+
+FILE_EXTENSIONS = {
+    NDJSON: 'ndjson',
+    CSV: 'csv',
+}
+
+
+def _plain(value):
+    """Valor serializable de forma estable (fechas ISO, decimales exactos como texto)."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def stream_rows(rows, fmt, fields, chunk_rows=500):
+    """Generador de trozos de texto con las filas en el formato pedido.
+
+    fields fija las columnas y su orden (cabecera del CSV y claves del NDJSON).
+    """
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    buffer = io.StringIO()
+    if fmt == CSV:
+        writer = csv.writer(buffer)
+        writer.writerow(fields)
+
+        def write(row):
+            writer.writerow([_plain(row.get(field)) for field in fields])
+    else:
+        def write(row):
+            buffer.write(json.dumps({field: _plain(row.get(field)) for field in fields}, separators=(',', ':')))
+            buffer.write('\n')
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= chunk_rows:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def attachment_name(prefix, fmt):
+    return f"{prefix}.{FILE_EXTENSIONS[fmt]}"
@@ -0,0 +1,288 @@
+"""
+database/id_allocator.py - Generador de identificadores únicos, monótonos y ordenables (estilo Snowflake)
+
+Cada id es un entero de 63 bits:
+
+    | 41 bits: milisegundos desde EPOCH_MS | 10 bits: worker id | 12 bits: secuencia |
+
+Los ids son únicos entre procesos siempre que cada uno tenga un worker id
+distinto, y estrictamente crecientes dentro de cada hilo. Cada hilo reserva
+bloques de secuencias bajo el lock y los reparte sin lock, así que dos
+hilos del mismo proceso intercalan sus bloques y el orden entre ellos es
+aproximado (dentro del mismo milisegundo).
+
+El worker id sale, por orden, de:
+
+    ID_WORKER_ID          fijo; uno distinto por proceso (¡ojo con los workers
+                          creados con fork a partir del mismo entorno!)
+    ID_WORKER_LEASE=true  alquilado en la tabla id_worker_leases (migración
+                          006) y renovado en segundo plano; sirve con fork
+    derivado de host+pid  solo fuera de producción: con 1024 valores dos
+                          procesos pueden coincidir y repetir códigos
+
+Con FLASK_ENV=production y ninguna de las dos primeras opciones, el primer
+id falla en lugar de arriesgar duplicados.
+
+Los códigos de transacción (p. ej. "TXN-0172A3F4C1400000") llevan el id en
+hexadecimal de ancho fijo, así que también se ordenan como texto. next_id
+genera varios millones de ids por segundo por proceso; next_code se queda
+en torno a 1M/s, limitado por el formateo del texto en Python.
+"""
+
+import os
+import time
+import atexit
+import socket
+import logging
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z
+
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER_ID = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+TIMESTAMP_SHIFT = WORKER_BITS + SEQUENCE_BITS
+
+CODE_WIDTH = 16  # dígitos hexadecimales de un id de 64 bits
+
+
+def format_code(prefix, value):
+    """Código con prefijo y el id en hexadecimal de ancho fijo (orden de texto == orden numérico)."""
+    return f"{prefix}-{value:016X}"
+
+
+def derive_worker_id():
+    """Worker id derivado de host + pid, para cuando no se configura ID_WORKER_ID."""
+    key = f"{socket.gethostname()}:{os.getpid()}".encode()
+    return zlib.crc32(key) & MAX_WORKER_ID
+
+
+class SnowflakeAllocator:
+    """Asignador de ids thread-safe; no duerme nunca.
+
+    Si el reloj retrocede o se agotan las 4096 secuencias de un milisegundo,
+    el asignador toma prestado el milisegundo siguiente en lugar de esperar,
+    manteniendo la monotonía.
+
+    El lock solo se toma para reservar un bloque de hasta block_size
+    secuencias consecutivas; el hilo entrega luego esos ids sin sincronizar.
+    Un id lleva el milisegundo en que se reservó su bloque.
+    """
+
+    def __init__(self, worker_id, clock=time.time_ns, block_size=256):
+        if not 0 <= worker_id <= MAX_WORKER_ID:
+            raise ValueError(f"worker_id must be between 0 and {MAX_WORKER_ID}")
+        self.worker_id = worker_id
+        self.block_size = block_size
+        self._worker_bits = worker_id << SEQUENCE_BITS
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_ms = 0
+        self._sequence = 0
+
+    def _reserve(self):
+        """Reserva el siguiente bloque de secuencias para el hilo actual y devuelve su primer id."""
+        with self._lock:
+            now_ms = self._clock() // 1000000 - EPOCH_MS
+            if now_ms > self._last_ms:
+                self._last_ms = now_ms
+                self._sequence = 0
+            elif self._sequence > MAX_SEQUENCE:
+                self._last_ms += 1
+                self._sequence = 0
+            count = min(self.block_size, MAX_SEQUENCE + 1 - self._sequence)
+            first = (self._last_ms << TIMESTAMP_SHIFT) | self._worker_bits | self._sequence
+            self._sequence += count
+        block = iter(range(first, first + count))
+        self._local.block = block
+        return next(block)
+
+    def next_id(self):
+        """Siguiente id entero."""
+        try:
+            return next(self._local.block)
+        except (AttributeError, StopIteration):
+            return self._reserve()
+
+    def next_code(self, prefix):
+        """Siguiente código de transacción con prefijo, p. ej. next_code('DEP')."""
+        return f"{prefix}-{self.next_id():016X}"
+
+
+class WorkerLease:
+    """Worker id alquilado en id_worker_leases (migración 006).
+
+    acquire() toma el primer worker id libre o caducado bajo un advisory lock
+    y un hilo lo renueva cada ttl / 3. Si una renovación no encuentra la
+    fila (el proceso estuvo parado más de ttl y otro proceso la tomó), el
+    alquiler queda perdido y next_id() falla en lugar de generar duplicados.
+    connect devuelve una conexión DB-API nueva (paramstyle %s).
+    """
+
+    _ACQUIRE_SQL = """
+        INSERT INTO id_worker_leases (worker_id, owner, expires_at)
+        SELECT candidate, %s, now() + make_interval(secs => %s)
+          FROM generate_series(0, %s) AS candidate
+         WHERE NOT EXISTS (
+               SELECT 1 FROM id_worker_leases
+                WHERE worker_id = candidate AND expires_at > now())
+         ORDER BY candidate
+         LIMIT 1
+        ON CONFLICT (worker_id) DO UPDATE
+           SET owner = EXCLUDED.owner, expires_at = EXCLUDED.expires_at
+        RETURNING worker_id
+    """
+    _RENEW_SQL = """
+        UPDATE id_worker_leases SET expires_at = now() + make_interval(secs => %s)
+         WHERE worker_id = %s AND owner = %s
+    """
+    _LOCK_KEY = 0x1D_A110C  # advisory lock que serializa las altas
+
+    def __init__(self, connect, ttl=60.0, owner=None):
+        self.connect = connect
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        self.worker_id = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _run(self, sql, params):
+        conn = self.connect()
+        try:
+            cur = conn.cursor()
+            cur.execute('SELECT pg_advisory_xact_lock(%s)', (self._LOCK_KEY,))
+            cur.execute(sql, params)
+            row = cur.fetchone() if cur.description else None
+            count = cur.rowcount
+            conn.commit()
+            return row, count
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def acquire(self):
+        row, _ = self._run(self._ACQUIRE_SQL, (self.owner, self.ttl, MAX_WORKER_ID))
+        if row is None:
+            raise RuntimeError(f"No free worker id in id_worker_leases (all {MAX_WORKER_ID + 1} leased)")
+        self.worker_id = row[0]
+        self._thread = threading.Thread(target=self._renew_forever, name='id-worker-lease', daemon=True)
+        self._thread.start()
+        logger.info(f"Leased worker id {self.worker_id} as {self.owner}")
+        return self.worker_id
+
+    def renew(self):
+        _, count = self._run(self._RENEW_SQL, (self.ttl, self.worker_id, self.owner))
+        if count != 1:
+            self.lost = True
+            logger.error(f"Lease of worker id {self.worker_id} was lost; refusing to allocate ids")
+        return not self.lost
+
+    def _renew_forever(self):
+        while not self._stop.wait(self.ttl / 3) and not self.lost:
+            try:
+                self.renew()
+            except Exception as e:
+                # Se reintenta en el siguiente ciclo; el alquiler aguanta hasta ttl
+                logger.warning(f"Could not renew worker id lease: {e}")
+
+    def release(self):
+        self._stop.set()
+        if self.worker_id is not None and not self.lost:
+            self._run("DELETE FROM id_worker_leases WHERE worker_id = %s AND owner = %s",
+                      (self.worker_id, self.owner))
+
+
+class LeasedAllocator(SnowflakeAllocator):
+    """SnowflakeAllocator cuyo worker id viene de un WorkerLease."""
+
+    def __init__(self, lease, **kwargs):
+        super().__init__(lease.acquire(), **kwargs)
+        self.lease = lease
+
+    def _reserve(self):
+        if self.lease.lost:
+            raise RuntimeError(f"Worker id {self.worker_id} lease lost; ids could collide")
+        return super()._reserve()
+
+
+def _configured_worker_id():
+    value = os.getenv('ID_WORKER_ID')
+    return int(value) if value not in (None, '') else None
+
+
+_allocator = None
+_allocator_lock = threading.Lock()
+
+
+def _production():
+    return os.getenv('FLASK_ENV', '').lower() == 'production'
+
+
+def _lease_connect():
+    from database.db_manager import get_engine
+    return get_engine().raw_connection()
+
+
+def get_allocator():
+    """Devuelve el asignador del proceso, creándolo en el primer uso."""
+    global _allocator
+    if _allocator is None:
+        with _allocator_lock:
+            if _allocator is None:
+                worker_id = _configured_worker_id()
+                if worker_id is not None:
+                    _allocator = SnowflakeAllocator(worker_id)
+                elif os.getenv('ID_WORKER_LEASE', 'false').lower() == 'true':
+                    lease = WorkerLease(_lease_connect, ttl=float(os.getenv('ID_WORKER_LEASE_TTL', 60)))
+                    _allocator = LeasedAllocator(lease)
+                    atexit.register(lease.release)
+                elif _production():
+                    raise RuntimeError(
+                        "ID_WORKER_ID is not set: configure a distinct ID_WORKER_ID per process "
+                        "or ID_WORKER_LEASE=true; a derived worker id can collide between processes"
+                    )
+                else:
+                    worker_id = derive_worker_id()
+                    logger.warning(
+                        f"ID_WORKER_ID not set; using derived worker id {worker_id}. "
+                        "Configure ID_WORKER_ID or ID_WORKER_LEASE=true to guarantee uniqueness."
+                    )
+                    _allocator = SnowflakeAllocator(worker_id)
+    return _allocator
+
+
+def set_allocator(allocator):
+    """Sustituye el asignador del proceso (cualquier objeto con next_id/next_code)."""
+    global _allocator
+    with _allocator_lock:
+        _allocator = allocator
+
+
+def next_transaction_id():
+    return get_allocator().next_id()
+
+
+def next_transaction_code(prefix):
+    return get_allocator().next_code(prefix)
+
+
+def _reset_after_fork():
+    # Un hijo creado con fork heredaría el estado y el worker id del padre:
+    # el derivado se vuelve a derivar desde el nuevo pid y el alquilado se
+    # vuelve a alquilar (el hilo de renovación no sobrevive al fork).
+    global _allocator, _allocator_lock
+    _allocator_lock = threading.Lock()
+    if isinstance(_allocator, SnowflakeAllocator) and _configured_worker_id() is None:
+        _allocator = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
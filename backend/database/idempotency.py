@@ -0,0 +1,268 @@
+"""
+database/idempotency.py - Soporte de Idempotency-Key para endpoints que mueven dinero
+
+Una petición repetida con la misma clave recibe la respuesta guardada sin
+volver a ejecutar la escritura. El almacén tiene un LRU en memoria con TTL
+delante y una tabla (idempotency_keys) detrás, compartida entre procesos.
+
+Una clave en curso solo se reserva por `lease` segundos: si el proceso que
+la tenía muere, otro reintento puede ejecutarla pasado ese plazo en lugar de
+esperar el TTL completo de las respuestas guardadas.
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+NEW = 'new'
+REPLAY = 'replay'
+IN_PROGRESS = 'in_progress'
+MISMATCH = 'mismatch'
+
+
+class SQLIdempotencyBackend:
+    """Tabla idempotency_keys accedida por DB-API (psycopg2 o pg8000, paramstyle %s).
+
+    connection_factory devuelve una conexión nueva (o prestada de un pool);
+    el backend la cierra al terminar cada operación.
+    """
+
+    PURGE_EVERY = 1000
+
+    def __init__(self, connection_factory):
+        self._connection_factory = connection_factory
+        self._claims = 0
+
+    def _run(self, sql, params, fetch=False):
+        conn = self._connection_factory()
+        try:
+            cur = conn.cursor()
+            cur.execute(sql, params)
+            row = cur.fetchone() if fetch else None
+            conn.commit()
+            cur.close()
+            return row
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def claim(self, key, fingerprint, lease):
+        """Reserva la clave por `lease` segundos. Devuelve None si se reservó, o (fingerprint, status, body) existente."""
+        self._claims += 1
+        if self._claims % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+        # Fechas calculadas en PostgreSQL (timestamptz, migración 007): mismo
+        # reloj que la comparación y sin depender de la zona de la sesión
+        claimed = self._run(
+            '''
+            INSERT INTO idempotency_keys (key, fingerprint, created_at, expires_at)
+            VALUES (%s, %s, now(), now() + make_interval(secs => %s))
+            ON CONFLICT (key) DO UPDATE
+               SET fingerprint = EXCLUDED.fingerprint, status_code = NULL,
+                   response_body = NULL, created_at = EXCLUDED.created_at,
+                   expires_at = EXCLUDED.expires_at
+             WHERE idempotency_keys.expires_at < now()
+            RETURNING key
+            ''',
+            (key, fingerprint, lease),
+            fetch=True
+        )
+        if claimed:
+            return None
+        row = self._run(
+            'SELECT fingerprint, status_code, response_body FROM idempotency_keys WHERE key = %s',
+            (key,),
+            fetch=True
+        )
+        if row is None:
+            # La fila caducó y se purgó entre ambas consultas: volver a intentarlo
+            return self.claim(key, fingerprint, lease)
+        return tuple(row.values()) if isinstance(row, dict) else tuple(row)
+
+    def save(self, key, status, body, ttl):
+        self._run(
+            '''
+            UPDATE idempotency_keys
+               SET status_code = %s, response_body = %s, expires_at = now() + make_interval(secs => %s)
+             WHERE key = %s
+            ''',
+            (status, body, ttl, key)
+        )
+
+    def release(self, key):
+        self._run('DELETE FROM idempotency_keys WHERE key = %s AND status_code IS NULL', (key,))
+
+    def purge_expired(self):
+        self._run('DELETE FROM idempotency_keys WHERE expires_at < now()', ())
+
+
+class IdempotencyStore:
+    """LRU acotado con TTL delante de un backend opcional (thread-safe)."""
+
+    def __init__(self, backend=None, max_entries=None, ttl=None, lease=None, clock=time.monotonic):
+        self.backend = backend
+        self.max_entries = max_entries or int(os.getenv('IDEMPOTENCY_CACHE_SIZE', 10000))
+        self.ttl = ttl or int(os.getenv('IDEMPOTENCY_TTL_SECONDS', 86400))
+        # Reserva de una clave en curso; debe superar la duración máxima de una petición
+        self.lease = lease or int(os.getenv('IDEMPOTENCY_LEASE_SECONDS', 60))
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> [expires_at, fingerprint, status, body]; status None = en curso en este proceso
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get_local(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put_local(self, key, fingerprint, status, body):
+        ttl = self.lease if status is None else self.ttl
+        self._entries[key] = [self._clock() + ttl, fingerprint, status, body]
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def begin(self, key, fingerprint):
+        """Devuelve (estado, (status, body)) con estado NEW, REPLAY, IN_PROGRESS o MISMATCH."""
+        with self._lock:
+            entry = self._get_local(key)
+            if entry is not None:
+                self.hits += 1
+                return self._classify(fingerprint, entry[1], entry[2], entry[3])
+            self.misses += 1
+            # Reservar localmente antes de ir al backend para frenar duplicados del mismo proceso
+            self._put_local(key, fingerprint, None, None)
+
+        existing = None
+        if self.backend is not None:
+            try:
+                existing = self.backend.claim(key, fingerprint, self.lease)
+            except Exception:
+                with self._lock:
+                    self._entries.pop(key, None)
+                raise
+
+        if existing is None:
+            return NEW, None
+
+        stored_fingerprint, status, body = existing
+        with self._lock:
+            if status is None:
+                self._entries.pop(key, None)
+            else:
+                self._put_local(key, stored_fingerprint, status, body)
+        return self._classify(fingerprint, stored_fingerprint, status, body)
+
+    @staticmethod
+    def _classify(fingerprint, stored_fingerprint, status, body):
+        if stored_fingerprint != fingerprint:
+            return MISMATCH, None
+        if status is None:
+            return IN_PROGRESS, None
+        return REPLAY, (status, body)
+
+    def complete(self, key, fingerprint, status, body):
+        """Guarda la respuesta final de una clave reservada con begin()."""
+        if self.backend is not None:
+            self.backend.save(key, status, body, self.ttl)
+        with self._lock:
+            self._put_local(key, fingerprint, status, body)
+
+    def abandon(self, key):
+        """Libera una clave reservada cuya ejecución falló, para permitir reintentos."""
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.backend is not None:
+            try:
+                self.backend.release(key)
+            except Exception as e:
+                logger.error(f"Could not release idempotency key: {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def request_fingerprint(method, path, body):
+    """Huella de la petición: una misma clave con otro contenido es un error del cliente."""
+    digest = hashlib.sha256()
+    digest.update(method.encode())
+    digest.update(b'\0')
+    digest.update(path.encode())
+    digest.update(b'\0')
+    digest.update(body or b'')
+    return digest.hexdigest()
+
+
+def idempotent(store, scope):
+    """Decorador Flask: aplica Idempotency-Key al endpoint.
+
+    scope(*args, **kwargs) devuelve el identificador del llamante (p. ej. el
+    user_id), de forma que dos usuarios no compartan claves. Las respuestas
+    5xx no se guardan, para que el cliente pueda reintentar de verdad.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            from flask import request, jsonify, current_app
+
+            client_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if not client_key:
+                return f(*args, **kwargs)
+            if len(client_key) > MAX_KEY_LENGTH:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} must be at most {MAX_KEY_LENGTH} characters'}), 400
+
+            key = f"{scope(*args, **kwargs)}:{request.path}:{client_key}"
+            fingerprint = request_fingerprint(request.method, request.path, request.get_data())
+            state, stored = store.begin(key, fingerprint)
+
+            if state == REPLAY:
+                status, body = stored
+                response = current_app.response_class(body, status=status, mimetype='application/json')
+                response.headers['Idempotent-Replayed'] = 'true'
+                return response
+            if state == IN_PROGRESS:
+                return jsonify({'error': 'A request with this Idempotency-Key is already in progress'}), 409
+            if state == MISMATCH:
+                return jsonify({'error': f'{IDEMPOTENCY_HEADER} was already used with a different request'}), 422
+
+            try:
+                response = current_app.make_response(f(*args, **kwargs))
+            except Exception:
+                store.abandon(key)
+                raise
+
+            if response.status_code >= 500:
+                store.abandon(key)
+            else:
+                store.complete(key, fingerprint, response.status_code, response.get_data(as_text=True))
+            return response
+
+        return decorated
+    return decorator
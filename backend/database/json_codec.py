@@ -0,0 +1,100 @@
+"""
+database/json_codec.py - Serialización JSON de las respuestas (orjson si está instalado)
+
+dumps() devuelve bytes listos para el cuerpo de la respuesta. Con orjson
+(extensión en C) los UUID y datetime se codifican de forma nativa y sin pasar
+por un dict intermedio; sin orjson se usa el json de la librería estándar con
+las mismas reglas, así que el formato no depende del backend:
+
+    datetime / date -> ISO 8601
+    UUID            -> texto
+    Decimal         -> número JSON (exacto con orjson.Fragment, float si no)
+
+JSON_BACKEND=json fuerza la librería estándar aunque orjson esté disponible.
+"""
+
+import os
+import json
+from datetime import datetime, date
+from decimal import Decimal
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+ORJSON = 'orjson'
+STDLIB = 'json'
+
+JSON_BACKEND = os.getenv('JSON_BACKEND', 'auto')
+
+BACKEND = ORJSON if orjson is not None and JSON_BACKEND != STDLIB else STDLIB
+
+# orjson >= 3.9 permite insertar JSON ya formado; así un Decimal sale con sus dígitos exactos
+_Fragment = getattr(orjson, 'Fragment', None)
+
+
+def _decimal(value):
+    if _Fragment is not None and value.is_finite():
+        return _Fragment(str(value))
+    return float(value)
+
+
+def _default_orjson(value):
+    if isinstance(value, Decimal):
+        return _decimal(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _default_stdlib(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _orjson_options(sort_keys):
+    options = orjson.OPT_NON_STR_KEYS
+    if sort_keys:
+        options |= orjson.OPT_SORT_KEYS
+    return options
+
+
+def dumps(obj, sort_keys=False, backend=None):
+    """obj serializado como bytes UTF-8 (compacto)."""
+    if (backend or BACKEND) == ORJSON:
+        return orjson.dumps(obj, default=_default_orjson, option=_orjson_options(sort_keys))
+    return json.dumps(
+        obj, default=_default_stdlib, sort_keys=sort_keys,
+        ensure_ascii=False, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def loads(data, backend=None):
+    if (backend or BACKEND) == ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def install_json_provider(app):
+    """Sustituir el proveedor JSON de la app Flask (jsonify, request.get_json) por este codec."""
+    from flask.json.provider import DefaultJSONProvider
+
+    class CodecJSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            return dumps(obj, sort_keys=kwargs.get('sort_keys', False)).decode('utf-8')
+
+        def loads(self, s, **kwargs):
+            return loads(s)
+
+        def response(self, *args, **kwargs):
+            # Los bytes van directos al cuerpo, sin pasar por str
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(dumps(obj) + b'\n', mimetype=self.mimetype)
+
+    app.json = CodecJSONProvider(app)
+    return app.json
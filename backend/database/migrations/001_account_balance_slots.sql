@@ -0,0 +1,16 @@
+-- ============================================
+-- 001 - Saldo repartido (striping) para cuentas con mucha concurrencia
+-- ============================================
+-- accounts.balance_slots = 0 significa cuenta normal; K > 0 significa que los
+-- abonos se reparten entre K filas de account_balance_slots y el saldo
+-- reportado es accounts.balance + SUM(account_balance_slots.balance).
+
+ALTER TABLE accounts
+    ADD COLUMN IF NOT EXISTS balance_slots INTEGER NOT NULL DEFAULT 0;
+
+CREATE TABLE IF NOT EXISTS account_balance_slots (
+    account_id UUID NOT NULL REFERENCES accounts(id) ON DELETE CASCADE,
+    slot SMALLINT NOT NULL,
+    balance DECIMAL(15,2) NOT NULL DEFAULT 0.00 CHECK (balance >= 0),
+    PRIMARY KEY (account_id, slot)
+);
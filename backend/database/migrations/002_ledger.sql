@@ -0,0 +1,28 @@
+-- ============================================
+-- 002 - Libro mayor append-only con snapshots de saldo
+-- ============================================
+-- Con BANK_LEDGER_MODE=true los saldos no se modifican en accounts: cada
+-- movimiento inserta un asiento y el saldo es
+--   último snapshot (o accounts.balance si no hay) + SUM(asientos posteriores).
+
+CREATE TABLE IF NOT EXISTS ledger_postings (
+    id BIGSERIAL PRIMARY KEY,
+    account_id UUID NOT NULL REFERENCES accounts(id),
+    transaction_code VARCHAR(50) NOT NULL,
+    amount DECIMAL(15,2) NOT NULL CHECK (amount <> 0),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ledger_postings_account_id ON ledger_postings(account_id, id);
+CREATE INDEX IF NOT EXISTS idx_ledger_postings_account_created ON ledger_postings(account_id, created_at);
+
+CREATE TABLE IF NOT EXISTS balance_snapshots (
+    account_id UUID NOT NULL REFERENCES accounts(id),
+    posting_id BIGINT NOT NULL,
+    balance DECIMAL(15,2) NOT NULL,
+    covered_at TIMESTAMP NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (account_id, posting_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_balance_snapshots_account_covered ON balance_snapshots(account_id, covered_at);
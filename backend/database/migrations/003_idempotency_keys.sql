@@ -0,0 +1,16 @@
+-- ============================================
+-- 003 - Claves de idempotencia para endpoints que mueven dinero
+-- ============================================
+-- status_code NULL = petición en curso; las filas caducadas se reutilizan
+-- al reservar la misma clave y se purgan periódicamente.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(512) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
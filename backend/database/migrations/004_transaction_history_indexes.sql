@@ -0,0 +1,16 @@
+-- ============================================
+-- 004 - Índices compuestos para el historial de transacciones por cuenta
+-- ============================================
+-- La consulta de historial une dos ramas (cargos y abonos), cada una leída en
+-- orden de estos índices y cortada en el LIMIT, sin el BitmapOr más Sort de
+-- todo el histórico que requería el filtro con OR.
+--
+-- CONCURRENTLY no bloquea escrituras, pero no puede ejecutarse dentro de una
+-- transacción: aplicar este fichero con psql en modo autocommit.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_from_created
+    ON transactions (from_account_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transactions_to_created
+    ON transactions (to_account_id, created_at DESC, id DESC);
+
@@ -0,0 +1,27 @@
+-- ============================================
+-- 005 - Contadores globales del banco (bank_stats)
+-- ============================================
+-- BankController suma sus deltas en una fila al azar dentro de cada
+-- transacción; los resúmenes leen SUM(...) de estas pocas filas en lugar de
+-- recorrer users, accounts y transactions. database/bank_stats.reconcile()
+-- corrige cualquier deriva frente a un recorrido completo.
+
+CREATE TABLE IF NOT EXISTS bank_stats (
+    slot SMALLINT PRIMARY KEY,
+    users BIGINT NOT NULL DEFAULT 0,
+    accounts BIGINT NOT NULL DEFAULT 0,
+    transactions BIGINT NOT NULL DEFAULT 0,
+    total_balance DECIMAL(20,2) NOT NULL DEFAULT 0.00,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Valores iniciales a partir de los datos existentes (fila 0)
+INSERT INTO bank_stats (slot, users, accounts, transactions, total_balance)
+SELECT 0,
+       (SELECT COUNT(*) FROM users),
+       (SELECT COUNT(*) FROM accounts),
+       (SELECT COUNT(*) FROM transactions),
+       (SELECT COALESCE(SUM(balance), 0) FROM accounts)
+     + (SELECT COALESCE(SUM(balance), 0) FROM account_balance_slots)
+     + (SELECT COALESCE(SUM(amount), 0) FROM ledger_postings)
+ON CONFLICT (slot) DO NOTHING;
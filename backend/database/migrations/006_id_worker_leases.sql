@@ -0,0 +1,12 @@
+-- ============================================
+-- 006 - Alquiler de worker ids del generador de ids (id_worker_leases)
+-- ============================================
+-- Con ID_WORKER_LEASE=true cada proceso toma aquí un worker id libre o
+-- caducado y lo renueva en segundo plano (database/id_allocator.WorkerLease),
+-- así dos procesos vivos nunca comparten worker id ni generan el mismo id.
+
+CREATE TABLE IF NOT EXISTS id_worker_leases (
+    worker_id INTEGER PRIMARY KEY CHECK (worker_id BETWEEN 0 AND 1023),
+    owner TEXT NOT NULL,
+    expires_at TIMESTAMPTZ NOT NULL
+);
@@ -0,0 +1,19 @@
+-- ============================================
+-- 007 - idempotency_keys con timestamptz y reserva corta para peticiones en curso
+-- ============================================
+-- Las fechas las calcula ahora PostgreSQL (now() + intervalo) y se comparan
+-- como instantes, sin depender de la zona horaria de la sesión. Mientras una
+-- petición está en curso (status_code NULL) expires_at es la reserva corta
+-- (IDEMPOTENCY_LEASE_SECONDS); al guardar la respuesta pasa al TTL completo.
+
+DO $$
+BEGIN
+    IF (SELECT data_type FROM information_schema.columns
+         WHERE table_name = 'idempotency_keys' AND column_name = 'expires_at') = 'timestamp without time zone' THEN
+        -- expires_at se escribía con datetime.utcnow(); created_at con la hora de la sesión
+        ALTER TABLE idempotency_keys
+            ALTER COLUMN expires_at TYPE TIMESTAMPTZ USING expires_at AT TIME ZONE 'UTC',
+            ALTER COLUMN created_at TYPE TIMESTAMPTZ;
+    END IF;
+END
+$$;
@@ -0,0 +1,22 @@
+-- ============================================
+-- 008 - Versión de la cuenta para ETag / If-None-Match
+-- ============================================
+-- database/etag.py usa accounts.version como validador barato: el trigger la
+-- incrementa en cada UPDATE que cambia la fila. Toda transacción actualiza el
+-- saldo de sus cuentas, así que también cubre el historial.
+-- (Las bases creadas con init_postgres_tables.sql ya la tienen; es idempotente.)
+
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_account_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_accounts_version ON accounts;
+CREATE TRIGGER trg_accounts_version
+    BEFORE UPDATE ON accounts
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION bump_account_version();
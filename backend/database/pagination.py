@@ -0,0 +1,55 @@
+"""
+database/pagination.py - Cursores opacos para paginación por keyset
+
+Un cursor codifica la clave de orden (created_at, id) de la última fila de
+una página. La siguiente página pide las filas estrictamente anteriores a esa
+clave, así que el coste no depende de la profundidad (a diferencia de OFFSET,
+que obliga a leer y descartar todas las filas previas).
+"""
+
+import json
+import base64
+import binascii
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidCursorError(ValueError):
+    """El cursor no es válido (manipulado o de otra versión)"""
+
+
+def encode_cursor(created_at, row_id):
+    """Cursor opaco (base64 url-safe) para la clave (created_at, id)."""
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Devuelve (created_at, id) con el id como texto; lanza InvalidCursorError."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+
+
+def clamp_page_size(limit, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Tamaño de página dentro de [1, maximum]."""
+    if limit is None:
+        return default
+    return max(1, min(int(limit), maximum))
+
+
+def paginate(rows, limit, key):
+    """Recorta rows (consultadas con LIMIT limit + 1) y devuelve (página, siguiente cursor).
+
+    key(row) devuelve (created_at, id) de una fila. El cursor es None cuando
+    no hay más filas, sin necesidad de una consulta extra vacía.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(*key(page[-1]))
@@ -0,0 +1,67 @@
+"""
+database/pool_stats.py - Métricas del pool de conexiones de SQLAlchemy
+
+PoolStats acumula lo que pasa en el pool (conexiones nuevas, checkouts,
+invalidaciones y cuánto se esperó por cada conexión) y snapshot() lo
+combina con el estado actual del pool (checked out, overflow...). La tasa
+de conexiones nuevas se calcula sobre una ventana deslizante: si crece, el
+pool es pequeño o pool_recycle demasiado corto.
+"""
+
+import time
+import threading
+from collections import deque
+
+
+class PoolStats:
+    """Contadores thread-safe de un pool; window en segundos para connects_per_second."""
+
+    def __init__(self, window=60.0, clock=time.monotonic):
+        self.window = window
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = clock()
+        self._connect_times = deque()
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _trim(self, now):
+        while self._connect_times and now - self._connect_times[0] > self.window:
+            self._connect_times.popleft()
+
+    def record_connect(self):
+        with self._lock:
+            now = self._clock()
+            self.connects += 1
+            self._connect_times.append(now)
+            self._trim(now)
+
+    def record_checkout(self, waited):
+        """Un checkout que tardó waited segundos en conseguir conexión (incluye abrirla)."""
+        with self._lock:
+            self.checkouts += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+
+    def record_invalidate(self):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self, **pool_state):
+        """Contadores + estado del pool (p. ej. size, checked_out, overflow)."""
+        with self._lock:
+            now = self._clock()
+            self._trim(now)
+            span = min(self.window, now - self._started) or 1.0
+            return {
+                **pool_state,
+                'connects': self.connects,
+                'connects_per_second': round(len(self._connect_times) / span, 3),
+                'checkouts': self.checkouts,
+                'invalidations': self.invalidations,
+                'avg_wait_ms': round(self._wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                'max_wait_ms': round(self._wait_max * 1000, 3),
+            }
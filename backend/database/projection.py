@@ -0,0 +1,43 @@
+"""
+database/projection.py - Codificadores precompilados de filas (tuplas) a dicts JSON
+
+Las consultas de listado seleccionan solo las columnas necesarias como tuplas,
+sin hidratar objetos ORM, y cada tupla se convierte con una función generada
+una sola vez para la proyección: las conversiones (UUID a texto, Decimal a
+float, datetime a ISO) quedan escritas en línea en lugar de resolverse fila a
+fila con getattr y comprobaciones genéricas.
+"""
+
+AS_IS = 'as_is'
+STR = 'str'
+ISO = 'iso'
+FLOAT = 'float'
+
+# Mismas reglas que los to_dict() de los modelos
+_TEMPLATES = {
+    AS_IS: '{v}',
+    STR: '(None if {v} is None else _str({v}))',
+    ISO: '(None if {v} is None else {v}.isoformat())',
+    FLOAT: '(_float({v}) if {v} else 0.0)',
+}
+
+
+def compile_row_encoder(fields, name='encode_row'):
+    """Genera encode(row) -> dict para filas con las columnas en el orden de fields.
+
+    fields es una secuencia de (clave, conversión) con conversión en AS_IS,
+    STR, ISO o FLOAT. La fila puede tener columnas extra al final (p. ej. las
+    que solo se usan para decidir algo); el codificador las ignora.
+    """
+    items = []
+    for index, (key, conversion) in enumerate(fields):
+        if conversion not in _TEMPLATES:
+            raise ValueError(f"Unknown conversion for {key!r}: {conversion}")
+        items.append(f"{key!r}: {_TEMPLATES[conversion].format(v=f'row[{index}]')}")
+
+    source = f"def {name}(row, _str=str, _float=float):\n    return {{{', '.join(items)}}}\n"
+    namespace = {}
+    exec(compile(source, f"<projection {name}>", 'exec'), namespace)
+    encoder = namespace[name]
+    encoder.__source__ = source
+    return encoder
@@ -0,0 +1,364 @@
+"""
+database/query_stats.py - Instrumentación SQL por petición y log de consultas lentas
+
+instrument_engine() engancha before/after_cursor_execute de un engine y
+cada sentencia se anota en:
+
+- la petición en curso (RequestStats en un ContextVar): número de consultas,
+  tiempo total en la base de datos y la sentencia más lenta. Con
+  SQL_DEBUG_HEADERS=true (o la app en debug) se devuelve en las cabeceras
+  X-DB-Query-Count, X-DB-Time-Ms y X-DB-Slowest-Ms
+- las métricas acumuladas por endpoint (metrics.snapshot())
+- el log de consultas lentas si tarda más de DB_SLOW_QUERY_MS
+
+Para las consultas lentas se captura el plan en un hilo aparte con su propia
+conexión: EXPLAIN (ANALYZE, BUFFERS) solo para los SELECT de tablas sin
+bloqueos que no llaman a más funciones que las de analyzable() y EXPLAIN a
+secas para el resto (ANALYZE ejecutaría de nuevo la escritura, el bloqueo o
+la función volátil, p. ej. pg_advisory_xact_lock o nextval). Los engines
+asíncronos no capturan planes. La captura
+está limitada a DB_EXPLAIN_PER_MINUTE planes, una vez por sentencia cada
+DB_EXPLAIN_COOLDOWN_SECONDS y con una cola acotada: si se satura, el plan se
+omite en lugar de añadir carga. Los parámetros nunca se escriben en el log.
+"""
+
+import os
+import re
+import time
+import queue
+import logging
+import threading
+import contextvars
+from collections import deque
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('database.slow_queries')
+
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', 200))
+EXPLAIN_PER_MINUTE = int(os.getenv('DB_EXPLAIN_PER_MINUTE', 6))
+EXPLAIN_COOLDOWN_SECONDS = float(os.getenv('DB_EXPLAIN_COOLDOWN_SECONDS', 300))
+EXPLAIN_TIMEOUT_MS = int(os.getenv('DB_EXPLAIN_TIMEOUT_MS', 5000))
+DEBUG_HEADERS = os.getenv('SQL_DEBUG_HEADERS', 'false').lower() == 'true'
+
+_LOCKING = re.compile(r'\bFOR\s+(NO\s+KEY\s+)?(UPDATE|SHARE|KEY\s+SHARE)\b', re.IGNORECASE)
+_SELECT_INTO = re.compile(r'\bINTO\b', re.IGNORECASE)
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"")
+_CALLS = re.compile(r'([A-Za-z_][A-Za-z0-9_.]*)\s*\(')
+
+# Lo que puede ir delante de un paréntesis en un SELECT que EXPLAIN ANALYZE
+# repite sin efectos: palabras clave, tipos y funciones inmutables o estables
+_SAFE_CALLS = frozenset('''
+    select from join on using where and or not in exists any all some values lateral as
+    over filter within partition by when then else case distinct
+    count sum min max avg bool_and bool_or array_agg string_agg json_agg jsonb_agg
+    row_number rank dense_rank lag lead first_value last_value
+    coalesce nullif greatest least cast extract date_trunc abs round floor ceil
+    lower upper length substring trim concat to_char
+    numeric decimal varchar char timestamp
+'''.split())
+
+
+def _short(statement, limit=500):
+    statement = ' '.join(statement.split())
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+class RequestStats:
+    """Consultas de una petición"""
+
+    __slots__ = ('endpoint', 'queries', 'total', 'slowest', 'slowest_statement')
+
+    def __init__(self, endpoint=None):
+        self.endpoint = endpoint
+        self.queries = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+
+    def record(self, statement, duration):
+        self.queries += 1
+        self.total += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+
+    def headers(self):
+        return {
+            'X-DB-Query-Count': str(self.queries),
+            'X-DB-Time-Ms': f"{self.total * 1000:.2f}",
+            'X-DB-Slowest-Ms': f"{self.slowest * 1000:.2f}",
+        }
+
+
+class QueryMetrics:
+    """Totales por endpoint (peticiones, consultas, tiempo en BD y peor petición)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        self.queries = 0
+        self.total = 0.0
+
+    def record_query(self, duration):
+        with self._lock:
+            self.queries += 1
+            self.total += duration
+
+    def record_request(self, stats):
+        with self._lock:
+            entry = self._endpoints.setdefault(stats.endpoint or 'unknown', {
+                'requests': 0, 'queries': 0, 'db_time': 0.0, 'max_queries': 0,
+                'slowest': 0.0, 'slowest_statement': None,
+            })
+            entry['requests'] += 1
+            entry['queries'] += stats.queries
+            entry['db_time'] += stats.total
+            entry['max_queries'] = max(entry['max_queries'], stats.queries)
+            if stats.slowest > entry['slowest']:
+                entry['slowest'] = stats.slowest
+                entry['slowest_statement'] = _short(stats.slowest_statement)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'queries': self.queries,
+                'db_time_ms': round(self.total * 1000, 3),
+                'endpoints': {
+                    name: {
+                        'requests': entry['requests'],
+                        'queries': entry['queries'],
+                        'avg_queries': round(entry['queries'] / entry['requests'], 2),
+                        'max_queries': entry['max_queries'],
+                        'avg_db_time_ms': round(entry['db_time'] / entry['requests'] * 1000, 3),
+                        'slowest_ms': round(entry['slowest'] * 1000, 3),
+                        'slowest_statement': entry['slowest_statement'],
+                    }
+                    for name, entry in self._endpoints.items()
+                },
+            }
+
+
+class SlowQueryLog:
+    """Últimas consultas lentas con su plan, capturado con límite de frecuencia.
+
+    explain(statement, parameters) devuelve el plan como texto; se ejecuta en
+    un único hilo de fondo con una cola de como mucho max_queued capturas.
+    """
+
+    def __init__(self, threshold=SLOW_QUERY_MS / 1000, explains_per_minute=EXPLAIN_PER_MINUTE,
+                 cooldown=EXPLAIN_COOLDOWN_SECONDS, capacity=50, max_queued=4, clock=time.monotonic):
+        self.threshold = threshold
+        self.explains_per_minute = explains_per_minute
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = deque(maxlen=capacity)
+        self._explain_times = deque()
+        self._last_explained = {}
+        self._queue = queue.Queue(max_queued)
+        self._worker = None
+        self._counters = {'slow_queries': 0, 'explains': 0, 'explains_skipped': 0, 'explain_errors': 0}
+
+    def _allow_explain(self, statement):
+        now = self._clock()
+        while self._explain_times and now - self._explain_times[0] > 60:
+            self._explain_times.popleft()
+        last = self._last_explained.get(statement)
+        if len(self._explain_times) >= self.explains_per_minute or (last is not None and now - last < self.cooldown):
+            return False
+        self._explain_times.append(now)
+        self._last_explained[statement] = now
+        if len(self._last_explained) > 1000:
+            self._last_explained = {
+                key: at for key, at in self._last_explained.items() if now - at < self.cooldown
+            }
+        return True
+
+    def record(self, statement, parameters, duration, endpoint=None, explain=None):
+        """Anotar una consulta si supera el umbral; devuelve la entrada o None."""
+        if duration < self.threshold:
+            return None
+        entry = {
+            'statement': _short(statement),
+            'duration_ms': round(duration * 1000, 3),
+            'endpoint': endpoint,
+            'at': time.time(),
+            'plan': None,
+        }
+        with self._lock:
+            self._counters['slow_queries'] += 1
+            self._entries.append(entry)
+            capture = explain is not None and self._allow_explain(statement)
+        slow_logger.warning(f"Slow query ({entry['duration_ms']} ms, {endpoint or '-'}): {entry['statement']}")
+        if capture:
+            self._submit(entry, explain, statement, parameters)
+        return entry
+
+    def _submit(self, entry, explain, statement, parameters):
+        try:
+            self._queue.put_nowait((entry, explain, statement, parameters))
+        except queue.Full:
+            with self._lock:
+                self._counters['explains_skipped'] += 1
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._explain_forever, name='slow-query-explain', daemon=True)
+                self._worker.start()
+
+    def _explain_forever(self):
+        while True:
+            entry, explain, statement, parameters = self._queue.get()
+            try:
+                entry['plan'] = explain(statement, parameters)
+                with self._lock:
+                    self._counters['explains'] += 1
+                slow_logger.warning(f"Plan for slow query ({entry['duration_ms']} ms):\n{entry['plan']}")
+            except Exception as e:
+                with self._lock:
+                    self._counters['explain_errors'] += 1
+                logger.warning(f"Could not capture plan for slow query: {e}")
+            finally:
+                self._queue.task_done()
+
+    def wait_idle(self):
+        """Esperar a que terminen las capturas encoladas (tests y scripts)."""
+        self._queue.join()
+
+    def recent(self, limit=20):
+        with self._lock:
+            return list(self._entries)[-limit:][::-1]
+
+    def stats(self):
+        with self._lock:
+            return {'threshold_ms': round(self.threshold * 1000, 3), **self._counters}
+
+
+def analyzable(statement):
+    """True si EXPLAIN ANALYZE puede repetir la sentencia sin efectos.
+
+    Lista blanca: un SELECT (no WITH, que puede llevar escrituras) sin FOR
+    UPDATE/SHARE ni INTO cuyas llamadas estén todas en _SAFE_CALLS.
+    """
+    head = statement.lstrip().split(None, 1)
+    if not head or head[0].upper() != 'SELECT':
+        return False
+    code = _LITERALS.sub("''", statement)
+    if _LOCKING.search(code) or _SELECT_INTO.search(code):
+        return False
+    return all(name.lower() in _SAFE_CALLS for name in _CALLS.findall(code))
+
+
+def make_explainer(connect, timeout_ms=EXPLAIN_TIMEOUT_MS):
+    """explain(statement, parameters) con una conexión DBAPI nueva de connect()."""
+    def explain(statement, parameters):
+        prefix = 'EXPLAIN (ANALYZE, BUFFERS) ' if analyzable(statement) else 'EXPLAIN '
+        conn = connect()
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+            cursor.execute(prefix + statement, parameters)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+            cursor.close()
+            return plan
+        finally:
+            # Nada de lo que haya hecho ANALYZE debe quedar
+            conn.rollback()
+            conn.close()
+    return explain
+
+
+_current = contextvars.ContextVar('request_query_stats', default=None)
+metrics = QueryMetrics()
+slow_log = SlowQueryLog()
+
+
+def begin(endpoint=None):
+    """Empezar a contar las consultas de la petición actual; devuelve el token para finish()."""
+    return _current.set(RequestStats(endpoint))
+
+
+def current():
+    return _current.get()
+
+
+def finish(token):
+    """Cerrar la petición: acumula sus totales por endpoint y devuelve su RequestStats."""
+    stats = _current.get()
+    _current.reset(token)
+    if stats is not None:
+        metrics.record_request(stats)
+    return stats
+
+
+def record(statement, parameters, duration, explain=None):
+    metrics.record_query(duration)
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    slow_log.record(statement, parameters, duration, stats.endpoint if stats else None, explain)
+
+
+def instrument_engine(target):
+    """Medir cada sentencia de target (un Engine, o el sync_engine de uno asíncrono).
+
+    Los planes se capturan con target.raw_connection desde el hilo de fondo;
+    con un engine asíncrono esa conexión solo se puede usar dentro de su event
+    loop (y su paramstyle no es el del primario síncrono), así que ahí solo se
+    miden las consultas.
+    """
+    from sqlalchemy import event
+
+    explain = None if target.dialect.is_async else make_explainer(target.raw_connection)
+
+    @event.listens_for(target, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(target, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        # executemany no tiene un único juego de parámetros que explicar
+        record(statement, parameters, time.perf_counter() - started, None if executemany else explain)
+
+    @event.listens_for(target, 'handle_error')
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started'):
+            conn.info['query_started'].pop()
+
+    return target
+
+
+def snapshot():
+    """Métricas y consultas lentas recientes para /api/internal/queries."""
+    return {**metrics.snapshot(), 'slow_log': slow_log.stats(), 'slow_queries': slow_log.recent()}
+
+
+def install_query_stats(app, headers=None):
+    """Contar las consultas de cada petición de una app Flask.
+
+    headers=True añade las cabeceras X-DB-*; por defecto solo con
+    SQL_DEBUG_HEADERS=true o app.debug.
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _begin_query_stats():
+        g._query_stats_token = begin(request.endpoint)
+
+    @app.after_request
+    def _query_stats_headers(response):
+        stats = current()
+        if stats is not None and (headers or (headers is None and (DEBUG_HEADERS or app.debug))):
+            response.headers.update(stats.headers())
+        return response
+
+    @app.teardown_request
+    def _finish_query_stats(exc):
+        # teardown también se ejecuta si la vista lanzó una excepción
+        token = g.pop('_query_stats_token', None)
+        if token is not None:
+            finish(token)
+
+    return app
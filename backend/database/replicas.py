@@ -0,0 +1,229 @@
+"""
+database/replicas.py - Selección de réplica de lectura
+
+ReplicaRouter decide, para cada sesión de solo lectura, qué réplica usar o si
+hay que ir al primario:
+
+- Selección por turnos (round_robin) o por menos conexiones en uso
+  (least_connections).
+- Una réplica cuyo retraso supera max_lag, o que falló hace menos de
+  down_cooldown segundos, no se elige; si no queda ninguna, se lee del primario.
+  El retraso lo mide un hilo en segundo plano (start()), nunca la petición.
+- Read-your-writes: tras mark_write(clave), las lecturas con esa misma clave
+  (p. ej. el usuario o la cuenta) van al primario durante sticky_seconds.
+  Esa marca es del proceso; para que valga entre workers (gunicorn) el cliente
+  devuelve la hora de su última escritura (cookie o cabecera, ver
+  begin_request / note_write) y sus lecturas van al primario mientras sea
+  reciente.
+
+El router no conoce SQLAlchemy: cada réplica aporta sus propias funciones
+para medir el retraso y las conexiones en uso.
+"""
+
+import time
+import logging
+import threading
+import contextvars
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = 'round_robin'
+LEAST_CONNECTIONS = 'least_connections'
+
+# Marca de escritura que viaja con el cliente: epoch (segundos) de su última escritura
+WRITE_MARKER_COOKIE = 'db_last_write'
+WRITE_MARKER_HEADER = 'X-DB-Last-Write'
+
+# (marca recibida del cliente, hora de la escritura hecha en esta petición)
+_request_marker = contextvars.ContextVar('replica_write_marker', default=None)
+
+
+def parse_marker(value):
+    """Epoch de la marca recibida, o None si falta o no es válida."""
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def begin_request(marker):
+    """Asociar a la petición en curso la marca que envía el cliente; devuelve el token para end_request."""
+    return _request_marker.set([parse_marker(marker), None])
+
+
+def end_request(token):
+    _request_marker.reset(token)
+
+
+def note_write(wall_clock=time.time):
+    """Registrar que la petición en curso escribió en el primario."""
+    state = _request_marker.get()
+    if state is not None:
+        state[1] = wall_clock()
+
+
+def request_write_marker():
+    """Marca que hay que devolver al cliente si la petición en curso escribió, o None."""
+    state = _request_marker.get()
+    return None if state is None else state[1]
+
+
+def client_wrote_within(seconds, wall_clock=time.time):
+    """True si el cliente de la petición en curso escribió hace menos de `seconds`."""
+    state = _request_marker.get()
+    if state is None:
+        return False
+    written_at = state[1] or state[0]
+    return written_at is not None and wall_clock() - written_at < seconds
+
+
+class Replica:
+    """Una réplica: probe_lag() -> segundos de retraso, in_use() -> conexiones prestadas."""
+
+    def __init__(self, name, probe_lag, in_use=lambda: 0):
+        self.name = name
+        self.probe_lag = probe_lag
+        self.in_use = in_use
+        self.lag = None
+        self.checked_at = None
+        self.down_until = 0.0
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Elige réplica para una lectura; None significa usar el primario (thread-safe)."""
+
+    def __init__(self, replicas, strategy=ROUND_ROBIN, max_lag=5.0, lag_check_interval=1.0,
+                 sticky_seconds=None, down_cooldown=30.0, max_sticky_keys=100000,
+                 clock=time.monotonic, wall_clock=time.time):
+        if strategy not in (ROUND_ROBIN, LEAST_CONNECTIONS):
+            raise ValueError(f"Unknown replica selection strategy: {strategy}")
+        self.replicas = list(replicas)
+        self.strategy = strategy
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        # Por defecto la ventana de stickiness cubre el retraso máximo tolerado
+        self.sticky_seconds = max_lag if sticky_seconds is None else sticky_seconds
+        self.down_cooldown = down_cooldown
+        self.max_sticky_keys = max_sticky_keys
+        self._clock = clock
+        self._wall_clock = wall_clock
+        self._lock = threading.Lock()
+        self._next = 0
+        self._recent_writes = OrderedDict()
+        self._stop = threading.Event()
+        self._thread = None
+        self.primary_reads = 0
+
+    def start(self):
+        """Medir el retraso de las réplicas en un hilo cada lag_check_interval segundos."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._refresh_forever, name='replica-lag', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _refresh_forever(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.lag_check_interval)
+
+    def refresh(self):
+        """Medir ahora el retraso de cada réplica disponible."""
+        for index, replica in enumerate(self.replicas):
+            if replica.down_until > self._clock():
+                continue
+            try:
+                lag = float(replica.probe_lag() or 0.0)
+            except Exception as e:
+                logger.error(f"Replica {replica.name} lag probe failed: {e}")
+                replica.lag = None
+                self.mark_down(index)
+            else:
+                replica.lag = lag
+            finally:
+                replica.checked_at = self._clock()
+
+    def choose(self, sticky_key=None):
+        """Índice de la réplica elegida, o None para leer del primario."""
+        if sticky_key is not None and self.wrote_recently(sticky_key):
+            return self._primary()
+        if client_wrote_within(self.sticky_seconds, self._wall_clock):
+            return self._primary()
+
+        candidates = [index for index in self._ordered() if self._is_usable(index)]
+        if not candidates:
+            return self._primary()
+
+        if self.strategy == LEAST_CONNECTIONS:
+            chosen = min(candidates, key=lambda index: self.replicas[index].in_use())
+        else:
+            chosen = candidates[0]
+        self.replicas[chosen].reads += 1
+        return chosen
+
+    def mark_write(self, key):
+        """Registrar una escritura: las lecturas con esta clave irán al primario un rato."""
+        if key is None:
+            return
+        key = str(key)
+        with self._lock:
+            self._recent_writes[key] = self._clock() + self.sticky_seconds
+            self._recent_writes.move_to_end(key)
+            while len(self._recent_writes) > self.max_sticky_keys:
+                self._recent_writes.popitem(last=False)
+
+    def wrote_recently(self, key):
+        """True si hubo un mark_write(key) dentro de la ventana de stickiness."""
+        key = str(key)
+        with self._lock:
+            expires_at = self._recent_writes.get(key)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._recent_writes[key]
+                return False
+            return True
+
+    def mark_down(self, index):
+        """Excluir una réplica durante down_cooldown segundos (p. ej. tras un error de conexión)."""
+        replica = self.replicas[index]
+        replica.down_until = self._clock() + self.down_cooldown
+        logger.warning(f"Replica {replica.name} marked down for {self.down_cooldown:.0f}s")
+
+    def stats(self):
+        return {
+            'primary_reads': self.primary_reads,
+            'replicas': [{
+                'name': replica.name,
+                'reads': replica.reads,
+                'lag': replica.lag,
+                'down': replica.down_until > self._clock(),
+                'in_use': replica.in_use()
+            } for replica in self.replicas]
+        }
+
+    def _primary(self):
+        self.primary_reads += 1
+        return None
+
+    def _ordered(self):
+        # Rotar el punto de partida para repartir en turnos
+        with self._lock:
+            start = self._next
+            self._next = (self._next + 1) % max(len(self.replicas), 1)
+        return [(start + offset) % len(self.replicas) for offset in range(len(self.replicas))]
+
+    def _is_usable(self, index):
+        replica = self.replicas[index]
+        now = self._clock()
+        if replica.down_until > now or replica.lag is None:
+            return False
+        # Una medida antigua (el hilo se paró o la réplica no responde) no vale
+        if now - replica.checked_at > max(3 * self.lag_check_interval, self.max_lag):
+            return False
+        return replica.lag <= self.max_lag
@@ -0,0 +1,176 @@
+"""
+database/retry.py - Reintento automático de transacciones ante deadlocks y fallos de serialización
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from dataclasses import dataclass
+from database import async_support
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATEs de PostgreSQL que indican que la transacción puede repetirse tal cual
+RETRYABLE_SQLSTATES = {
+    '40001': 'serialization_failure',
+    '40P01': 'deadlock_detected',
+}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Presupuesto de reintentos para una operación."""
+    max_attempts: int = 5          # intentos totales (incluye el primero)
+    base_delay: float = 0.005      # segundos; se duplica en cada reintento
+    max_delay: float = 0.25        # tope del backoff por reintento
+    max_elapsed: float = 2.0       # tiempo total máximo dedicado a la operación
+
+    def backoff(self, attempt):
+        """Backoff exponencial con jitter completo para el reintento número `attempt`."""
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+DEFAULT_POLICY = RetryPolicy(
+    max_attempts=int(os.getenv('DB_RETRY_MAX_ATTEMPTS', 5)),
+    base_delay=float(os.getenv('DB_RETRY_BASE_DELAY_MS', 5)) / 1000,
+    max_delay=float(os.getenv('DB_RETRY_MAX_DELAY_MS', 250)) / 1000,
+    max_elapsed=float(os.getenv('DB_RETRY_BUDGET_MS', 2000)) / 1000,
+)
+
+_policies = {}
+_policies_lock = threading.Lock()
+
+
+def set_retry_policy(operation, policy):
+    """Define el presupuesto de reintentos de una operación concreta."""
+    with _policies_lock:
+        _policies[operation] = policy
+
+
+def get_retry_policy(operation):
+    """Devuelve la política de una operación, o la política por defecto."""
+    return _policies.get(operation, DEFAULT_POLICY)
+
+
+def get_sqlstate(exc):
+    """Extrae el SQLSTATE de una excepción de SQLAlchemy o del driver (pg8000, psycopg2, psycopg 3)."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        # psycopg2 expone pgcode, psycopg 3 expone sqlstate
+        code = getattr(exc, 'pgcode', None) or getattr(exc, 'sqlstate', None)
+        if code:
+            return code
+        # pg8000 pasa un dict con los campos del error como primer argumento
+        args = getattr(exc, 'args', ())
+        if args and isinstance(args[0], dict) and args[0].get('C'):
+            return args[0]['C']
+        # SQLAlchemy envuelve la excepción del driver en .orig
+        exc = getattr(exc, 'orig', None) or exc.__cause__
+    return None
+
+
+def is_retryable(exc):
+    """True si la excepción corresponde a un deadlock o a un fallo de serialización."""
+    return get_sqlstate(exc) in RETRYABLE_SQLSTATES
+
+
+class RetryExhaustedError(Exception):
+    """Se agotó el presupuesto de reintentos; la excepción original queda en __cause__."""
+
+    def __init__(self, operation, attempts):
+        super().__init__(f"{operation} failed after {attempts} attempts")
+        self.operation = operation
+        self.attempts = attempts
+
+
+class RetryStats:
+    """Contadores de reintentos por operación (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def _entry(self, operation):
+        entry = self._ops.get(operation)
+        if entry is None:
+            entry = self._ops[operation] = {
+                'calls': 0,
+                'retries': 0,
+                'exhausted': 0,
+                'max_attempts_used': 0,
+                'by_sqlstate': {},
+            }
+        return entry
+
+    def record_retry(self, operation, sqlstate):
+        with self._lock:
+            entry = self._entry(operation)
+            entry['retries'] += 1
+            entry['by_sqlstate'][sqlstate] = entry['by_sqlstate'].get(sqlstate, 0) + 1
+
+    def record_finish(self, operation, attempts, exhausted=False):
+        with self._lock:
+            entry = self._entry(operation)
+            entry['calls'] += 1
+            entry['max_attempts_used'] = max(entry['max_attempts_used'], attempts)
+            if exhausted:
+                entry['exhausted'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                op: dict(entry, by_sqlstate=dict(entry['by_sqlstate']))
+                for op, entry in self._ops.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+
+retry_stats = RetryStats()
+
+
+def run_transaction(fn, operation='default', policy=None, session_factory=None, sleep=async_support.sleep):
+    """Ejecuta fn(session) dentro de una transacción, repitiéndola ante errores reintentables.
+
+    Cada intento abre una sesión nueva, por lo que fn no debe tener efectos
+    fuera de la base de datos. Los errores no reintentables se propagan tal
+    cual; si se agota el presupuesto se lanza RetryExhaustedError.
+    """
+    if session_factory is None:
+        from database.db_manager import db_session as session_factory
+
+    policy = policy or get_retry_policy(operation)
+    started = time.monotonic()
+    attempt = 0
+
+    while True:
+        attempt += 1
+        try:
+            with session_factory() as session:
+                result = fn(session)
+            retry_stats.record_finish(operation, attempt)
+            return result
+        except Exception as e:
+            sqlstate = get_sqlstate(e)
+            if sqlstate not in RETRYABLE_SQLSTATES:
+                raise
+
+            delay = policy.backoff(attempt)
+            elapsed = time.monotonic() - started
+            if attempt >= policy.max_attempts or elapsed + delay > policy.max_elapsed:
+                retry_stats.record_finish(operation, attempt, exhausted=True)
+                logger.error(f"{operation}: retry budget exhausted after {attempt} attempts ({sqlstate})")
+                raise RetryExhaustedError(operation, attempt) from e
+
+            retry_stats.record_retry(operation, sqlstate)
+            logger.warning(
+                f"{operation}: {RETRYABLE_SQLSTATES[sqlstate]} on attempt {attempt}, "
+                f"retrying in {delay * 1000:.1f} ms"
+            )
+            sleep(delay)
@@ -0,0 +1,498 @@
+"""
+database/synthetic.py - Datos sintéticos a escala de producción cargados con COPY
+
+Genera usuarios, cuentas y transacciones para reproducir problemas de
+rendimiento con volúmenes reales (millones de filas) y los envía a
+PostgreSQL con COPY FROM STDIN, mucho más rápido que INSERT fila a fila.
+
+Entiende los dos esquemas del repositorio:
+
+    uuid    models/ (users.id, accounts.id UUID, transaction_code...)
+    serial  init_postgres_tables.sql (user_id, account_number, transaction_id)
+
+La generación es determinista y se reparte por rangos de índices: cualquier
+trozo [lo, hi) de cualquier tabla se genera sin estado compartido, así que
+varios procesos pueden cargar trozos en paralelo y dos ejecuciones con la
+misma semilla producen exactamente los mismos datos. Los ids (UUID o
+SERIAL) y el dueño de cada cuenta se derivan del índice.
+
+La actividad está sesgada como en producción: unas pocas cuentas concentran
+la mayoría de las transacciones (ley de potencias, DatasetSpec.activity_skew)
+y los pagos van sobre todo a un pequeño grupo de cuentas "comercio".
+Los saldos son aleatorios y no cuadran con el historial generado.
+
+El CLI está en benchmarks/load_dataset.py.
+"""
+
+import gzip
+import math
+import time
+import random
+import hashlib
+import os
+from dataclasses import dataclass, field
+
+UUID_SCHEMA = 'uuid'
+SERIAL_SCHEMA = 'serial'
+
+USERS = 'users'
+ACCOUNTS = 'accounts'
+TRANSACTIONS = 'transactions'
+TABLES = (USERS, ACCOUNTS, TRANSACTIONS)
+
+_M64 = (1 << 64) - 1
+
+FIRST_NAMES = ('Ana', 'Luis', 'María', 'Carlos', 'Lucía', 'Jorge', 'Sofía', 'Pablo', 'Elena', 'Diego')
+LAST_NAMES = ('García', 'Martínez', 'López', 'Sánchez', 'Pérez', 'Gómez', 'Díaz', 'Ruiz', 'Torres', 'Romero')
+DESCRIPTIONS = {
+    'deposit': ('Nómina', 'Ingreso en efectivo', 'Devolución'),
+    'withdrawal': ('Cajero', 'Retiro en ventanilla'),
+    'transfer': ('Transferencia', 'Alquiler', 'Préstamo', 'Reparto de gastos'),
+    'payment': ('Pago con tarjeta', 'Compra online', 'Suscripción', 'Factura'),
+}
+
+# (tipo, peso, mu y sigma del importe log-normal)
+KINDS = (
+    ('deposit', 20, 5.5, 1.0),
+    ('withdrawal', 15, 4.0, 0.8),
+    ('transfer', 30, 4.5, 1.2),
+    ('payment', 35, 3.2, 1.0),
+)
+
+
+def _mix64(value):
+    """Finalizador de splitmix64: biyectivo en 64 bits y bien distribuido."""
+    value = (value + 0x9E3779B97F4A7C15) & _M64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _M64
+    return value ^ (value >> 31)
+
+
+def _permutation(n, salt):
+    """rank -> índice, una permutación de [0, n) (multiplicativa, sin tablas)."""
+    step = 0x9E3779B1
+    while math.gcd(step, n) != 1:
+        step += 2
+    offset = _mix64(salt) % n
+    return lambda rank: (rank * step + offset) % n
+
+
+def password_hash(password, iterations=600000):
+    """Hash compatible con werkzeug.security.check_password_hash (se calcula una vez)."""
+    salt = hashlib.sha256(password.encode()).hexdigest()[:16]
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+    return f"pbkdf2:sha256:{iterations}${salt}${digest}"
+
+
+@dataclass
+class DatasetSpec:
+    """Tamaño y forma del conjunto de datos.
+
+    activity_skew > 1 concentra la actividad: con 3, el 1% de las cuentas
+    más activas participa en ~20% de las transacciones y el 10% en ~46%.
+    merchant_ratio es la fracción de cuentas comercio y merchant_share la
+    parte de las transacciones que son pagos a comercios.
+    """
+
+    users: int
+    transactions: int
+    accounts_per_user: float = 2.0
+    seed: int = 1
+    days: int = 365
+    activity_skew: float = 3.0
+    merchant_ratio: float = 0.001
+    merchant_share: float = 0.35
+    end: float = field(default_factory=lambda: float(int(time.time())))
+    password_hash: str = ''
+
+    @property
+    def accounts(self):
+        return max(1, round(self.users * self.accounts_per_user))
+
+    @property
+    def merchants(self):
+        return max(1, int(self.accounts * self.merchant_ratio))
+
+
+def _timestamp(epoch):
+    whole = int(epoch)
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(whole)) + f".{int((epoch - whole) * 1e6):06d}"
+
+
+class _Generator:
+    """Filas de un esquema como tuplas en el orden de columns[tabla]."""
+
+    columns = {}
+    account_types = ()
+
+    def __init__(self, spec, offsets=None):
+        self.spec = spec
+        self.offsets = offsets or {}
+        self._salt = _mix64(spec.seed)
+        # rango de actividad -> cuenta; rango entre comercios -> cuenta
+        self._by_activity = _permutation(spec.accounts, self._salt ^ 1)
+        self._merchant = _permutation(spec.accounts, self._salt ^ 2)
+        kinds = [kind for kind, *_ in KINDS if kind != 'payment']
+        weights = [weight for kind, weight, *_ in KINDS if kind != 'payment']
+        self._kinds, self._weights = kinds, weights
+        self._amounts = {kind: (mu, sigma) for kind, _, mu, sigma in KINDS}
+        self._start = spec.end - spec.days * 86400
+
+    # ---- ids y relaciones derivadas del índice ----
+
+    def owner(self, account_index):
+        return _mix64(account_index ^ self._salt) % self.spec.users
+
+    def _uuid(self, kind, index):
+        high = _mix64(index ^ (kind << 56) ^ self._salt)
+        digits = f"{high:016x}{_mix64(high ^ index):016x}"
+        return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+    def _skewed(self, rng, permutation, n):
+        return permutation(min(n - 1, int(n * rng.random() ** self.spec.activity_skew)))
+
+    def _rng(self, table, lo):
+        return random.Random(f"{self.spec.seed}:{table}:{lo}")
+
+    # ---- filas ----
+
+    def rows(self, table, lo, hi):
+        return getattr(self, f"_{table}")(lo, hi)
+
+    def _movements(self, lo, hi):
+        """(índice, tipo, origen, destino, importe, descripción, fecha) de las transacciones [lo, hi)."""
+        spec = self.spec
+        rng = self._rng(TRANSACTIONS, lo)
+        n = spec.accounts
+        span = (spec.end - self._start) / max(spec.transactions, 1)
+        for index in range(lo, hi):
+            if rng.random() < spec.merchant_share:
+                kind = 'payment'
+                source = self._skewed(rng, self._by_activity, n)
+                target = self._merchant(min(spec.merchants - 1, int(spec.merchants * rng.random() ** 2)))
+            else:
+                kind = rng.choices(self._kinds, self._weights)[0]
+                source = target = None
+                if kind in ('withdrawal', 'transfer'):
+                    source = self._skewed(rng, self._by_activity, n)
+                if kind in ('deposit', 'transfer'):
+                    target = self._skewed(rng, self._by_activity, n)
+                    if target == source:
+                        target = (target + 1) % n
+            if source is not None and source == target:
+                source = (source + 1) % n
+            mu, sigma = self._amounts[kind]
+            amount = max(0.01, min(round(rng.lognormvariate(mu, sigma), 2), 1000000.0))
+            created_at = self._start + (index + rng.random()) * span
+            yield index, kind, source, target, amount, rng.choice(DESCRIPTIONS[kind]), created_at
+
+    def _profile(self, rng, index):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        username = f"s{self.spec.seed}_{index}"
+        created = self._start - rng.random() * 365 * 86400
+        return first, last, username, f"{username}@example.test", created
+
+    def _balance(self, rng):
+        return f"{min(round(rng.lognormvariate(7.0, 1.5), 2), 10000000.0):.2f}"
+
+
+class UuidGenerator(_Generator):
+    """Esquema de models/ (SQLAlchemy, claves UUID)."""
+
+    columns = {
+        USERS: ('id', 'username', 'email', 'password_hash', 'first_name', 'last_name',
+                'is_active', 'is_admin', 'created_at', 'updated_at'),
+        ACCOUNTS: ('id', 'account_number', 'user_id', 'account_type', 'balance', 'currency',
+                   'status', 'created_at', 'updated_at'),
+        TRANSACTIONS: ('id', 'transaction_code', 'from_account_id', 'to_account_id', 'amount',
+                       'transaction_type', 'description', 'status', 'created_at'),
+    }
+    account_types = ('checking', 'savings', 'business')
+
+    def user_id(self, index):
+        return self._uuid(1, index)
+
+    def account_id(self, index):
+        return self._uuid(2, index)
+
+    def _users(self, lo, hi):
+        rng = self._rng(USERS, lo)
+        for index in range(lo, hi):
+            first, last, username, email, created = self._profile(rng, index)
+            created_at = _timestamp(created)
+            yield (self.user_id(index), username, email, self.spec.password_hash, first, last,
+                   't', 'f', created_at, created_at)
+
+    def _accounts(self, lo, hi):
+        rng = self._rng(ACCOUNTS, lo)
+        for index in range(lo, hi):
+            created_at = _timestamp(self._start - rng.random() * 180 * 86400)
+            yield (self.account_id(index), f"9{self.spec.seed % 1000:03d}{index:012d}",
+                   self.user_id(self.owner(index)), rng.choice(self.account_types), self._balance(rng),
+                   'USD', 'active', created_at, created_at)
+
+    def _transactions(self, lo, hi):
+        for index, kind, source, target, amount, description, created in self._movements(lo, hi):
+            yield (self._uuid(3, index), f"SYN{self.spec.seed % 1000:03d}-{index:016X}",
+                   None if source is None else self.account_id(source),
+                   None if target is None else self.account_id(target),
+                   f"{amount:.2f}", kind, description, 'completed', _timestamp(created))
+
+
+class SerialGenerator(_Generator):
+    """Esquema de init_postgres_tables.sql (claves SERIAL, usado por backend/app.py)."""
+
+    columns = {
+        USERS: ('user_id', 'username', 'password_hash', 'email', 'created_at'),
+        ACCOUNTS: ('account_number', 'owner_id', 'account_type', 'balance', 'is_active', 'created_at'),
+        TRANSACTIONS: ('transaction_id', 'from_account_id', 'to_account_id', 'amount',
+                       'transaction_type', 'description', 'created_at'),
+    }
+    account_types = ('Ahorros', 'Corriente', 'Inversión')
+    transaction_types = {'deposit': 'DEPOSITO', 'withdrawal': 'RETIRO', 'transfer': 'TRANSFER', 'payment': 'PAGO'}
+
+    def _id(self, table, index):
+        return self.offsets.get(table, 0) + index + 1
+
+    def _users(self, lo, hi):
+        rng = self._rng(USERS, lo)
+        for index in range(lo, hi):
+            _, _, username, email, created = self._profile(rng, index)
+            yield self._id(USERS, index), username, self.spec.password_hash, email, _timestamp(created)
+
+    def _accounts(self, lo, hi):
+        rng = self._rng(ACCOUNTS, lo)
+        for index in range(lo, hi):
+            yield (self._id(ACCOUNTS, index), self._id(USERS, self.owner(index)),
+                   rng.choice(self.account_types), self._balance(rng), 't',
+                   _timestamp(self._start - rng.random() * 180 * 86400))
+
+    def _transactions(self, lo, hi):
+        for index, kind, source, target, amount, description, created in self._movements(lo, hi):
+            yield (self._id(TRANSACTIONS, index),
+                   None if source is None else self._id(ACCOUNTS, source),
+                   None if target is None else self._id(ACCOUNTS, target),
+                   f"{amount:.2f}", self.transaction_types[kind], description, _timestamp(created))
+
+
+GENERATORS = {UUID_SCHEMA: UuidGenerator, SERIAL_SCHEMA: SerialGenerator}
+
+
+def generator(schema, spec, offsets=None):
+    if schema not in GENERATORS:
+        raise ValueError(f"Unknown schema {schema!r}; use one of: {', '.join(GENERATORS)}")
+    return GENERATORS[schema](spec, offsets)
+
+
+def shards(total, size):
+    """Rangos [lo, hi) de como mucho size filas que cubren [0, total)."""
+    return [(lo, min(lo + size, total)) for lo in range(0, total, size)]
+
+
+# ========== Formato de texto de COPY ==========
+
+_COPY_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def copy_line(row):
+    """Una fila en el formato de texto de COPY (NULL = \\N)."""
+    return '\t'.join('\\N' if value is None else str(value).translate(_COPY_ESCAPES) for value in row) + '\n'
+
+
+def _trusted_line(row):
+    # Filas de los generadores: sus textos no llevan \\, tabuladores ni saltos de línea
+    return '\t'.join(['\\N' if value is None else str(value) for value in row]) + '\n'
+
+
+class CopyStream:
+    """Fichero de solo lectura sobre un iterable de filas, para COPY FROM STDIN.
+
+    Codifica las filas a medida que el driver pide datos: la memoria no
+    depende del tamaño del trozo. rows cuenta las filas entregadas.
+    escape=False omite el escapado (solo para filas de los generadores).
+    """
+
+    def __init__(self, rows, batch=1000, escape=True):
+        self._lines = map(copy_line if escape else _trusted_line, rows)
+        self._batch = batch
+        self._buffer = b''
+        self.rows = 0
+
+    def _fill(self, size):
+        parts = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            lines = [line for _, line in zip(range(self._batch), self._lines)]
+            if not lines:
+                break
+            self.rows += len(lines)
+            chunk = ''.join(lines).encode('utf-8')
+            parts.append(chunk)
+            length += len(chunk)
+        self._buffer = b''.join(parts)
+
+    def read(self, size=-1):
+        self._fill(size)
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+
+def copy_sql(schema, table):
+    return f"COPY {table} ({', '.join(GENERATORS[schema].columns[table])}) FROM STDIN"
+
+
+def copy_into(conn, sql, stream):
+    """COPY FROM STDIN con psycopg2 (copy_expert) o psycopg 3 (cursor.copy)."""
+    cursor = conn.cursor()
+    if hasattr(cursor, 'copy_expert'):
+        cursor.copy_expert(sql, stream, size=1 << 16)
+    else:
+        with cursor.copy(sql) as copy:
+            while True:
+                data = stream.read(1 << 16)
+                if not data:
+                    break
+                copy.write(data)
+    cursor.close()
+
+
+def connect(dsn):
+    """Conexión DB-API con psycopg2 o, si no está instalado, psycopg 3."""
+    dsn = dsn.replace('postgresql+psycopg2://', 'postgresql://').replace('postgresql+pg8000://', 'postgresql://')
+    try:
+        import psycopg2
+        return psycopg2.connect(dsn)
+    except ImportError:
+        import psycopg
+        return psycopg.connect(dsn)
+
+
+# ========== Trabajo de un proceso ==========
+
+def shard_path(directory, table, lo, compress):
+    return os.path.join(directory, f"{table}.{lo:012d}.copy" + ('.gz' if compress else ''))
+
+
+def run_shard(task):
+    """Generar el trozo [lo, hi) de una tabla y cargarlo y/o guardarlo en un fichero.
+
+    task es un dict (se envía a otro proceso): schema, spec, offsets, table,
+    lo, hi, dsn (None = no cargar), emit_dir (None = sin fichero), compress.
+    Devuelve (tabla, filas, segundos).
+    """
+    started = time.perf_counter()
+    gen = generator(task['schema'], task['spec'], task['offsets'])
+    rows = gen.rows(task['table'], task['lo'], task['hi'])
+
+    if task['emit_dir']:
+        path = shard_path(task['emit_dir'], task['table'], task['lo'], task['compress'])
+        opener = gzip.open if task['compress'] else open
+        with opener(path + '.tmp', 'wb') as out:
+            stream = CopyStream(rows, escape=False)
+            while True:
+                data = stream.read(1 << 20)
+                if not data:
+                    break
+                out.write(data)
+        os.replace(path + '.tmp', path)
+        if task['dsn'] is None:
+            return task['table'], stream.rows, time.perf_counter() - started
+        source = opener(path, 'rb')
+    else:
+        source = stream = CopyStream(rows, escape=False)
+
+    conn = connect(task['dsn'])
+    try:
+        cursor = conn.cursor()
+        # Datos regenerables: no hace falta esperar al fsync del WAL en cada commit
+        cursor.execute("SET synchronous_commit = off")
+        cursor.close()
+        copy_into(conn, copy_sql(task['schema'], task['table']), source)
+        conn.commit()
+    finally:
+        conn.close()
+        if source is not stream:
+            source.close()
+    return task['table'], stream.rows, time.perf_counter() - started
+
+
+def load_file(task):
+    """Cargar un fichero generado antes (task: schema, table, path, dsn). Devuelve (tabla, bytes, segundos)."""
+    started = time.perf_counter()
+    opener = gzip.open if task['path'].endswith('.gz') else open
+    conn = connect(task['dsn'])
+    try:
+        with opener(task['path'], 'rb') as source:
+            cursor = conn.cursor()
+            cursor.execute("SET synchronous_commit = off")
+            cursor.close()
+            copy_into(conn, copy_sql(task['schema'], task['table']), source)
+        conn.commit()
+    finally:
+        conn.close()
+    return task['table'], os.path.getsize(task['path']), time.perf_counter() - started
+
+
+# ========== Antes y después de la carga ==========
+
+_SERIAL_KEYS = {USERS: 'user_id', ACCOUNTS: 'account_number', TRANSACTIONS: 'transaction_id'}
+
+
+def serial_offsets(conn):
+    """Ids actuales más altos: las filas nuevas van a continuación."""
+    cursor = conn.cursor()
+    offsets = {}
+    for table, key in _SERIAL_KEYS.items():
+        cursor.execute(f"SELECT COALESCE(MAX({key}), 0) FROM {table}")
+        offsets[table] = cursor.fetchone()[0]
+    cursor.close()
+    return offsets
+
+
+_RECONCILE_STATS_SQL = """
+    INSERT INTO bank_stats (slot, users, accounts, transactions, total_balance, updated_at)
+    SELECT 0,
+           (SELECT COUNT(*) FROM users) - counters.users,
+           (SELECT COUNT(*) FROM accounts) - counters.accounts,
+           (SELECT COUNT(*) FROM transactions) - counters.transactions,
+           (SELECT COALESCE(SUM(balance), 0) FROM accounts)
+         + (SELECT COALESCE(SUM(balance), 0) FROM account_balance_slots)
+         + (SELECT COALESCE(SUM(amount), 0) FROM ledger_postings) - counters.total_balance,
+           CURRENT_TIMESTAMP
+      FROM (SELECT COALESCE(SUM(users), 0) AS users, COALESCE(SUM(accounts), 0) AS accounts,
+                   COALESCE(SUM(transactions), 0) AS transactions,
+                   COALESCE(SUM(total_balance), 0) AS total_balance
+              FROM bank_stats) AS counters
+    ON CONFLICT (slot) DO UPDATE
+       SET users = bank_stats.users + EXCLUDED.users,
+           accounts = bank_stats.accounts + EXCLUDED.accounts,
+           transactions = bank_stats.transactions + EXCLUDED.transactions,
+           total_balance = bank_stats.total_balance + EXCLUDED.total_balance,
+           updated_at = EXCLUDED.updated_at
+"""
+
+
+def finish_load(conn, schema):
+    """Ajustar secuencias (serial) o contadores de bank_stats (uuid) y actualizar estadísticas."""
+    cursor = conn.cursor()
+    if schema == SERIAL_SCHEMA:
+        for table, key in _SERIAL_KEYS.items():
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', '{key}'), "
+                f"(SELECT COALESCE(MAX({key}), 1) FROM {table}))"
+            )
+    else:
+        # Como bank_stats.reconcile(): los contadores pasan a cuadrar con las tablas
+        cursor.execute(_RECONCILE_STATS_SQL)
+    conn.commit()
+    cursor.close()
+
+    # ANALYZE no puede ir dentro de un bloque de transacción junto a lo anterior
+    conn.autocommit = True
+    cursor = conn.cursor()
+    for table in TABLES:
+        cursor.execute(f"ANALYZE {table}")
+    cursor.close()
@@ -0,0 +1,111 @@
+"""
+database/transfer_pipeline.py - Pipeline asíncrono de transferencias con workers particionados por cuenta
+
+Cada trabajo se asigna a un worker según hash(partition_key) — normalmente la
+cuenta origen — así que los trabajos con la misma clave se ejecutan en serie
+y en orden de llegada dentro del proceso, y los demás avanzan en paralelo.
+
+La partición no protege a la cuenta destino ni a otros procesos: dos
+transferencias de orígenes distintos hacia la misma cuenta pueden correr a la
+vez. La consistencia de los saldos la dan los locks de fila y las
+actualizaciones relativas de la propia transferencia, no el pool.
+"""
+import os
+import queue
+import threading
+import time
+import uuid
+import zlib
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+COMPLETED = 'completed'
+FAILED = 'failed'
+
+
+class PartitionedWorkerPool:
+    """Pool de hilos con una cola por worker y registro acotado del estado de los trabajos."""
+
+    def __init__(self, workers=None, max_jobs=None, job_ttl=3600.0):
+        self.workers = workers or int(os.getenv('TRANSFER_WORKERS', 8))
+        self.max_jobs = max_jobs or int(os.getenv('TRANSFER_MAX_JOBS', 10000))
+        self.job_ttl = job_ttl
+        self._queues = [queue.Queue() for _ in range(self.workers)]
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._started = False
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            for index, work_queue in enumerate(self._queues):
+                thread = threading.Thread(
+                    target=self._run, args=(work_queue,), name=f'transfer-worker-{index}', daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+            self._started = True
+
+    def partition(self, partition_key):
+        return zlib.crc32(str(partition_key).encode()) % self.workers
+
+    def submit(self, partition_key, fn, owner=None):
+        """Encola fn() en la partición de partition_key y devuelve el id del trabajo."""
+        if not self._started:
+            self._start()
+        job_id = uuid.uuid4().hex
+        job = {
+            'job_id': job_id,
+            'owner': owner,
+            'state': QUEUED,
+            'status_code': None,
+            'result': None,
+            'created_at': time.time(),
+            'finished_at': None,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            self._prune()
+        self._queues[self.partition(partition_key)].put((job, fn))
+        return job_id
+
+    def status(self, job_id):
+        """Copia del estado del trabajo, o None si no existe (o ya caducó)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self):
+        return sum(q.qsize() for q in self._queues)
+
+    def _prune(self):
+        # Los trabajos están en orden de creación: se descartan desde el más
+        # antiguo los terminados que hayan caducado o que sobren, y se para en
+        # el primero que deba conservarse.
+        now = time.time()
+        while self._jobs:
+            job_id, job = next(iter(self._jobs.items()))
+            finished = job['finished_at']
+            if finished is None:
+                break
+            if now - finished < self.job_ttl and len(self._jobs) <= self.max_jobs:
+                break
+            del self._jobs[job_id]
+
+    def _run(self, work_queue):
+        while True:
+            job, fn = work_queue.get()
+            job['state'] = RUNNING
+            try:
+                result, status_code = fn()
+                job.update(state=COMPLETED, result=result, status_code=status_code)
+            except Exception as e:
+                logger.error(f"Transfer job {job['job_id']} failed: {e}")
+                job.update(state=FAILED, result={'error': 'Transfer failed'}, status_code=500)
+            job['finished_at'] = time.time()
@@ -0,0 +1,59 @@
+"""
+benchmarks/bench_id_allocator.py - Microbenchmark del generador de ids de transacción
+
+Uso:
+    python benchmarks/bench_id_allocator.py --count 2000000 --threads 4
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.id_allocator import SnowflakeAllocator
+
+
+def measure(label, fn, count):
+    started = time.perf_counter()
+    fn(count)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {count / elapsed / 1e6:6.2f} M/s  ({elapsed * 1e9 / count:6.0f} ns/op)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    allocator = SnowflakeAllocator(1)
+
+    def ids(n):
+        next_id = allocator.next_id
+        for _ in range(n):
+            next_id()
+
+    def codes(n):
+        next_code = allocator.next_code
+        for _ in range(n):
+            next_code('TXN')
+
+    def threaded_ids(n):
+        per_thread = n // args.threads
+        threads = [threading.Thread(target=ids, args=(per_thread,)) for _ in range(args.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    measure("next_id (1 thread)", ids, args.count)
+    measure(f"next_id ({args.threads} threads)", threaded_ids, args.count)
+    measure("next_code (1 thread)", codes, args.count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+benchmarks/bench_import.py - Tiempo de importación en frío de la capa de datos y de las herramientas
+
+Cada módulo se importa --runs veces en un intérprete nuevo (como al arrancar
+un worker, una herramienta de línea de comandos o la recolección de tests) y
+se muestra la mediana. Con --top N se listan además los N imports más caros
+del primer módulo según python -X importtime.
+
+Uso:
+    python benchmarks/bench_import.py --runs 10
+    python benchmarks/bench_import.py --modules database.db_manager --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+DEFAULT_MODULES = [
+    'views.cli_view',
+    'database.db_manager',
+    'models.account',
+    'controllers.bank_controller',
+]
+
+
+def child_env():
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([ROOT, os.path.join(ROOT, 'backend'), env.get('PYTHONPATH', '')])
+    # Sin .pyc nuevos entre ejecuciones: todas miden lo mismo
+    env['PYTHONDONTWRITEBYTECODE'] = '1'
+    return env
+
+
+def measure(module, runs, env):
+    """Mediana en ms de importar module en un proceso nuevo, o None si no se puede importar."""
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            error = result.stderr.strip().splitlines()
+            print(f"{module:<32} cannot be imported: {error[-1] if error else result.returncode}")
+            return None
+        samples.append(float(result.stdout.strip().splitlines()[-1]) * 1000)
+    median = statistics.median(samples)
+    print(f"{module:<32} {median:8.1f} ms  (min {min(samples):.1f}, max {max(samples):.1f})")
+    return median
+
+
+def top_imports(module, count, env):
+    """Los imports con más tiempo propio según -X importtime."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            env=env, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = (part.strip() for part in line[len('import time:'):].split('|'))
+        rows.append((int(own), int(cumulative), name.strip()))
+    print(f"\nSlowest imports under {module} (self / cumulative ms):")
+    for own, cumulative, name in sorted(rows, reverse=True)[:count]:
+        print(f"  {own / 1000:8.1f} {cumulative / 1000:8.1f}  {name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--top', type=int, default=0)
+    args = parser.parse_args()
+
+    env = child_env()
+    started = time.perf_counter()
+    for module in args.modules:
+        measure(module, args.runs, env)
+    if args.top:
+        top_imports(args.modules[0], args.top, env)
+    print(f"\n{time.perf_counter() - started:.1f}s total")
+
+
+if __name__ == "__main__":
+    main()
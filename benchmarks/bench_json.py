@@ -0,0 +1,90 @@
+"""
+benchmarks/bench_json.py - Serialización de las respuestas de cuentas y transacciones
+
+Compara el camino anterior (to_dict() con float/isoformat por campo + json de
+la librería estándar) con database/json_codec.py sobre los tipos nativos de
+la fila (Decimal, UUID, datetime), con cada backend disponible.
+
+Uso:
+    python benchmarks/bench_json.py --accounts 100 --transactions 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import json_codec
+from database.json_codec import dumps, ORJSON, STDLIB
+
+
+def make_accounts(count):
+    user_id = uuid.uuid4()
+    now = datetime(2026, 1, 1)
+    return [{
+        'id': uuid.uuid4(), 'account_number': f'ACC{n:010d}', 'user_id': user_id,
+        'account_type': 'savings', 'balance': Decimal('1520.75'), 'currency': 'USD',
+        'status': 'active', 'created_at': now, 'updated_at': now + timedelta(minutes=n),
+    } for n in range(count)]
+
+
+def make_transactions(count):
+    account = uuid.uuid4()
+    now = datetime(2026, 1, 1)
+    return [{
+        'id': uuid.uuid4(), 'transaction_code': f'TXN{n:012d}', 'from_account_id': account,
+        'to_account_id': uuid.uuid4(), 'amount': Decimal('12.34'), 'transaction_type': 'transfer',
+        'description': 'benchmark', 'status': 'completed', 'created_at': now + timedelta(seconds=n),
+    } for n in range(count)]
+
+
+def to_dict(row):
+    """Conversión campo a campo como en los to_dict() de los modelos"""
+    return {
+        key: (str(value) if isinstance(value, uuid.UUID)
+              else float(value) if isinstance(value, Decimal)
+              else value.isoformat() if isinstance(value, datetime)
+              else value)
+        for key, value in row.items()
+    }
+
+
+def measure(label, fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        size = len(fn())
+        best = min(best, time.perf_counter() - started)
+    print(f"  {label:<30} {best * 1e3:8.2f} ms  ({size / 1024:8.1f} KiB)")
+
+
+def bench(name, rows, repeat):
+    print(f"{name} ({len(rows)} rows)")
+    measure("to_dict + json.dumps", lambda: json.dumps({name: [to_dict(row) for row in rows]}).encode(), repeat)
+    backends = [STDLIB] + ([ORJSON] if json_codec.orjson is not None else [])
+    for backend in backends:
+        measure(f"json_codec ({backend})", lambda: dumps({name: rows}, backend=backend), repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--accounts', type=int, default=100)
+    parser.add_argument('--transactions', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if json_codec.orjson is None:
+        print("orjson no está instalado: solo se mide la librería estándar")
+    bench('accounts', make_accounts(args.accounts), args.repeat)
+    bench('transactions', make_transactions(args.transactions), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+benchmarks/bench_projection.py - Serialización de listados: to_dict() por objeto vs proyección compilada
+
+Sin --database compara, sobre filas sintéticas, un to_dict() al estilo de los
+modelos (getattr + comprobaciones por fila) con el codificador precompilado de
+database/projection.py. Con --database mide además la consulta completa de
+historial de una cuenta (objetos ORM vs columnas) contra DATABASE_URL.
+
+Uso:
+    python benchmarks/bench_projection.py --rows 10000
+    python benchmarks/bench_projection.py --rows 10000 --database --account <uuid>
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.projection import compile_row_encoder, AS_IS, STR, ISO, FLOAT
+
+FIELDS = [
+    ('id', STR), ('transaction_code', AS_IS), ('from_account_id', STR), ('to_account_id', STR),
+    ('amount', FLOAT), ('transaction_type', AS_IS), ('description', AS_IS), ('status', AS_IS),
+    ('created_at', ISO),
+]
+
+
+class FakeTransaction:
+    """Objeto con atributos, como una instancia ORM ya hidratada"""
+
+    def __init__(self, row):
+        for (key, _), value in zip(FIELDS, row):
+            setattr(self, key, value)
+
+    def to_dict(self):
+        return {
+            'id': str(self.id),
+            'transaction_code': self.transaction_code,
+            'from_account_id': str(self.from_account_id) if self.from_account_id else None,
+            'to_account_id': str(self.to_account_id) if self.to_account_id else None,
+            'amount': float(self.amount) if self.amount else 0.0,
+            'transaction_type': self.transaction_type,
+            'description': self.description,
+            'status': self.status,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+        }
+
+
+def make_rows(count):
+    account = uuid.uuid4()
+    start = datetime(2026, 1, 1)
+    return [
+        (uuid.uuid4(), f'TXN{n:012d}', account if n % 2 else None, uuid.uuid4(),
+         Decimal('12.34'), 'transfer', 'benchmark', 'completed', start + timedelta(seconds=n))
+        for n in range(count)
+    ]
+
+
+def measure(label, fn, count, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1e3:8.2f} ms  ({best * 1e6 / count:6.2f} us/row)")
+
+
+def bench_database(args):
+    from database.db_manager import db_session
+    from controllers import history, projections
+
+    account_id = uuid.UUID(args.account)
+    with db_session(readonly=True) as session:
+        def orm():
+            return [txn.to_dict() for txn in history.account_history(session, account_id, args.rows)]
+
+        def columns():
+            encode = projections.TRANSACTION.encode
+            rows = history.account_history(session, account_id, args.rows,
+                                           columns=projections.TRANSACTION.columns)
+            return [encode(row) for row in rows]
+
+        count = max(len(columns()), 1)
+        measure("history: ORM objects + to_dict", orm, count, args.repeat)
+        measure("history: columns + encoder", columns, count, args.repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--database', action='store_true')
+    parser.add_argument('--account', help='UUID de la cuenta para --database')
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    objects = [FakeTransaction(row) for row in rows]
+    encode = compile_row_encoder(FIELDS, 'encode_transaction')
+
+    measure("to_dict() per object", lambda: [obj.to_dict() for obj in objects], args.rows, args.repeat)
+    measure("hydrate + to_dict()", lambda: [FakeTransaction(row).to_dict() for row in rows],
+            args.rows, args.repeat)
+    measure("compiled row encoder", lambda: [encode(row) for row in rows], args.rows, args.repeat)
+
+    if args.database:
+        if not args.account:
+            parser.error('--database requires --account')
+        bench_database(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Controlador asíncrono - Mismas operaciones que BankController para un servidor ASGI
+
+Cada método de AsyncBankController es una corrutina que ejecuta el método
+homónimo de BankController con database.async_support.run_bound(): la
+validación, los reintentos, las cachés y los eventos son exactamente los
+mismos, y las consultas van por el engine asíncrono (asyncpg) esperando en
+el event loop en lugar de ocupar un hilo por petición.
+
+Diferencias con la versión síncrona:
+- las lecturas van siempre al primario (las réplicas usan engines síncronos)
+- export_account_transactions devuelve un generador asíncrono de trozos
+"""
+
+import functools
+from database.async_support import run_bound
+from database.db_manager import get_async_sessionmaker
+from controllers.bank_controller import BankController
+
+
+def _mirror(method):
+    """Corrutina que ejecuta method (síncrono) ligado al engine asíncrono."""
+    @functools.wraps(method)
+    async def coroutine(*args, **kwargs):
+        return await run_bound(get_async_sessionmaker(), method, *args, **kwargs)
+    return staticmethod(coroutine)
+
+
+class AsyncBankController:
+    """Versión async/await de BankController (mismas firmas y respuestas)"""
+
+    create_user = _mirror(BankController.create_user)
+    get_user = _mirror(BankController.get_user)
+    create_account = _mirror(BankController.create_account)
+    get_account = _mirror(BankController.get_account)
+    enable_balance_striping = _mirror(BankController.enable_balance_striping)
+    disable_balance_striping = _mirror(BankController.disable_balance_striping)
+    get_account_balance_as_of = _mirror(BankController.get_account_balance_as_of)
+    transfer_funds = _mirror(BankController.transfer_funds)
+    transfer_funds_batch = _mirror(BankController.transfer_funds_batch)
+    deposit_funds = _mirror(BankController.deposit_funds)
+    withdraw_funds = _mirror(BankController.withdraw_funds)
+    get_user_accounts = _mirror(BankController.get_user_accounts)
+    get_account_transactions = _mirror(BankController.get_account_transactions)
+    get_bank_summary = _mirror(BankController.get_bank_summary)
+    reconcile_bank_stats = _mirror(BankController.reconcile_bank_stats)
+
+    # Sin base de datos: no hace falta pasar por el event loop
+    get_cache_stats = staticmethod(BankController.get_cache_stats)
+    get_retry_stats = staticmethod(BankController.get_retry_stats)
+
+    @staticmethod
+    async def export_account_transactions(account_id, fmt='ndjson'):
+        """Exportar el historial completo (generador asíncrono de trozos de texto, 200)
+
+        El generador síncrono mantiene abierto su cursor del lado del
+        servidor; cada trozo se pide dentro de run_bound() para que la
+        lectura espere en el event loop.
+        """
+        factory = get_async_sessionmaker()
+        result, status = await run_bound(factory, BankController.export_account_transactions, account_id, fmt)
+        if status != 200:
+            return result, status
+
+        done = object()
+
+        async def generate():
+            try:
+                while True:
+                    chunk = await run_bound(factory, next, result, done)
+                    if chunk is done:
+                        break
+                    yield chunk
+            finally:
+                await run_bound(factory, result.close)
+
+        return generate(), 200
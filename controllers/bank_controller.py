@@ -1,18 +1,166 @@
 # controllers/bank_controller.py
+import os
 import uuid
+import threading
+import zlib
+from contextlib import contextmanager
 from decimal import Decimal
 from datetime import datetime
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import and_, or_, desc
-from database.db_manager import db_session
+from sqlalchemy import and_, or_, desc, func, text, bindparam
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from database.db_manager import db_session, mark_write, recently_written
+from database.id_allocator import next_transaction_code
+from database.pagination import decode_cursor, paginate, clamp_page_size
+from database import bank_stats, export, events
+from database.async_support import wait_future
+from database.entity_cache import entity_cache
+from database.retry import run_transaction, retry_stats, set_retry_policy, RetryPolicy, RetryExhaustedError
+from controllers import ledger, history, projections
+from controllers.group_commit import DepositBatcher
 from models.transaction import Transaction
-from database.db_manager import db_session
 from models.user import User
 from models.account import Account
+from models.account_balance_slot import AccountBalanceSlot
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Máximo de transferencias aceptadas por llamada a transfer_funds_batch
+MAX_BATCH_TRANSFERS = 10000
+
+# Presupuestos de reintento específicos (el resto usa la política por defecto)
+set_retry_policy('transfer_funds_batch', RetryPolicy(max_attempts=3, max_elapsed=5.0))
+set_retry_policy('create_user', RetryPolicy(max_attempts=3))
+
+CONTENTION_ERROR = ({"error": "Database is busy, please retry"}, 503)
+
+# Modo libro mayor: los saldos no se modifican en accounts; cada movimiento
+# inserta un asiento inmutable y el saldo es snapshot + asientos posteriores.
+LEDGER_MODE = os.getenv('BANK_LEDGER_MODE', 'false').lower() == 'true'
+LEDGER_COMPACT_INTERVAL = float(os.getenv('BANK_LEDGER_COMPACT_INTERVAL', 60))
+LEDGER_COMPACT_MIN_POSTINGS = int(os.getenv('BANK_LEDGER_COMPACT_MIN_POSTINGS', 100))
+LEDGER_COMPACT_LAG = float(os.getenv('BANK_LEDGER_COMPACT_LAG', 30))
+
+_ledger_compactor = None
+
+# Saldo nuevo de la cuenta destino de una transferencia: solo para su evento
+# SSE; _publish_movement lo quita antes de responder al ordenante
+TO_BALANCE_KEY = '_to_new_balance'
+
+# Número de sub-saldos por defecto al activar el striping de una cuenta
+DEFAULT_BALANCE_SLOTS = int(os.getenv('BANK_BALANCE_SLOTS', 8))
+MAX_BALANCE_SLOTS = 64
+
+# Ruta de escritura directa: un único UPDATE condicional + INSERT por operación
+# en lugar de cargar la cuenta con el ORM, comparar en Python y hacer flush.
+DIRECT_BALANCE_UPDATES = os.getenv('BANK_DIRECT_UPDATES', 'false').lower() == 'true'
+
+# Group commit de depósitos (opt-in): las peticiones concurrentes se agrupan
+# durante GROUP_COMMIT_WINDOW_MS o hasta GROUP_COMMIT_MAX_ITEMS y se aplican
+# con un único commit.
+GROUP_COMMIT_ENABLED = os.getenv('BANK_GROUP_COMMIT', 'false').lower() == 'true'
+GROUP_COMMIT_WINDOW_MS = float(os.getenv('BANK_GROUP_COMMIT_WINDOW_MS', 2))
+GROUP_COMMIT_MAX_ITEMS = int(os.getenv('BANK_GROUP_COMMIT_MAX_ITEMS', 256))
+
+_deposit_batcher = None
+_deposit_batcher_lock = threading.Lock()
+
+# Columnas de la exportación del historial (mismas claves que Transaction.to_dict)
+EXPORT_FIELDS = (
+    'id', 'transaction_code', 'created_at', 'transaction_type', 'from_account_id',
+    'to_account_id', 'amount', 'description', 'status'
+)
+
+# Caché de entidades: los usuarios siempre; las cuentas (con su saldo) solo con
+# BANK_CACHE_BALANCES=true. Las escrituras invalidan las cuentas que tocan, pero
+# solo en este proceso: lo que escriban otros workers, backend/app.py o el SQL
+# directo no invalida nada aquí y el saldo cacheado puede estar obsoleto hasta
+# ENTITY_CACHE_TTL_SECONDS. Por eso get_account lee el saldo de la base de datos
+# salvo que se acepte ese retraso.
+CACHE_BALANCES = os.getenv('BANK_CACHE_BALANCES', 'false').lower() == 'true'
+
+_WITHDRAW_SQL = text("""
+    WITH debit AS (
+        UPDATE accounts
+           SET balance = balance - :amount, updated_at = :now
+         WHERE id = :account_id AND status = 'active' AND balance >= :amount
+           AND balance_slots = 0
+     RETURNING id, balance
+    ), txn AS (
+        INSERT INTO transactions (id, transaction_code, from_account_id, to_account_id, amount,
+                                  transaction_type, description, status, created_at)
+        SELECT :txn_id, :code, debit.id, NULL, :amount, 'withdrawal', :description, 'completed', :now
+          FROM debit
+     RETURNING id
+    )
+    SELECT debit.balance FROM debit, txn
+""").bindparams(
+    bindparam('account_id', type_=PG_UUID(as_uuid=True)),
+    bindparam('txn_id', type_=PG_UUID(as_uuid=True)),
+)
+
+# Las dos cuentas se bloquean primero, juntas y ordenadas por id (como
+# _lock_accounts): dos transferencias A->B y B->A concurrentes esperan en el
+# mismo orden en vez de bloquearse mutuamente. Las comprobaciones se hacen
+# sobre las filas bloqueadas y la consulta devuelve su estado, así que un
+# error (cuenta inexistente, inactiva, sin fondos) se diagnostica sin otra
+# consulta; new_balance (origen) y to_new_balance (destino) solo vienen
+# informados si la transferencia se aplicó.
+_TRANSFER_SQL = text("""
+    WITH locked AS (
+        SELECT id, status, balance, balance_slots
+          FROM accounts
+         WHERE id IN (:from_id, :to_id)
+         ORDER BY id
+           FOR UPDATE
+    ), allowed AS (
+        SELECT 1
+          FROM locked f, locked t
+         WHERE f.id = :from_id AND t.id = :to_id
+           AND f.status = 'active' AND t.status = 'active'
+           AND f.balance_slots = 0 AND t.balance_slots = 0
+           AND f.balance >= :amount
+    ), debit AS (
+        UPDATE accounts
+           SET balance = balance - :amount, updated_at = :now
+         WHERE id = :from_id AND EXISTS (SELECT 1 FROM allowed)
+     RETURNING id, balance
+    ), credit AS (
+        UPDATE accounts
+           SET balance = balance + :amount, updated_at = :now
+         WHERE id = :to_id AND EXISTS (SELECT 1 FROM allowed)
+     RETURNING id, balance
+    ), txn AS (
+        INSERT INTO transactions (id, transaction_code, from_account_id, to_account_id, amount,
+                                  transaction_type, description, status, created_at)
+        SELECT :txn_id, :code, debit.id, credit.id, :amount, 'transfer', :description, 'completed', :now
+          FROM debit, credit
+     RETURNING id
+    )
+    SELECT locked.id, locked.status, locked.balance_slots,
+           (SELECT debit.balance FROM debit, txn) AS new_balance,
+           (SELECT credit.balance FROM credit, txn) AS to_new_balance
+      FROM locked
+""").bindparams(
+    bindparam('from_id', type_=PG_UUID(as_uuid=True)),
+    bindparam('to_id', type_=PG_UUID(as_uuid=True)),
+    bindparam('txn_id', type_=PG_UUID(as_uuid=True)),
+)
+
+_CREDIT_SLOT_SQL = text("""
+    UPDATE account_balance_slots
+       SET balance = balance + :amount
+     WHERE account_id = :account_id AND slot = :slot
+""").bindparams(bindparam('account_id', type_=PG_UUID(as_uuid=True)))
+
+_ACCOUNT_STATE_SQL = text(
+    "SELECT id, status, balance, balance_slots FROM accounts WHERE id IN :ids"
+).bindparams(bindparam('ids', type_=PG_UUID(as_uuid=True), expanding=True))
+
+class _UseOrmPath(Exception):
+    """La ruta directa no admite la operación (saldo repartido); se repite con el cuerpo ORM en otra transacción."""
+
 class BankController:
     
     # ===== USER OPERATIONS =====
@@ -21,42 +169,20 @@ class BankController:
                    document_id=None, phone=None, is_admin=False):
         """Crear nuevo usuario"""
         try:
-            with db_session() as session:
-                # Verificar si el usuario ya existe
-                existing = session.query(User).filter(
-                    or_(User.username == username, User.email == email)
-                ).first()
-                
-                if existing:
-                    return {"error": "Username or email already exists"}, 409
-                
-                # Crear nuevo usuario
-                user = User(
-                    username=username,
-                    email=email,
-                    password_hash=password_hash,
-                    first_name=first_name,
-                    last_name=last_name,
-                    document_id=document_id,
-                    phone=phone,
-                    is_admin=is_admin
-                )
-                
-                session.add(user)
-                session.flush()  # Para obtener el ID sin hacer commit
-                
-                # Crear cuenta por defecto
-                default_account = Account(
-                    account_number=f"CHK-{str(user.id)[:8].upper()}",
-                    user_id=user.id,
-                    account_type='checking',
-                    balance=Decimal('0.00'),
-                    currency='USD'
-                )
-                session.add(default_account)
-                
-                return {"message": "User created successfully", "user": user.to_dict()}, 201
+            result = run_transaction(
+                lambda session: BankController._create_user_tx(
+                    session, username, email, password_hash, first_name, last_name,
+                    document_id, phone, is_admin
+                ),
+                operation='create_user'
+            )
+            if result[1] == 201:
+                # Read-your-writes: el usuario nuevo aún puede no estar en las réplicas
+                mark_write(result[0]["user"]["id"], username, email)
+            return result
                 
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
         except SQLAlchemyError as e:
             logger.error(f"Error creating user: {e}")
             return {"error": "Database error occurred"}, 500
@@ -65,22 +191,29 @@ class BankController:
     def get_user(user_id=None, username=None, email=None):
         """Obtener usuario por ID, username o email"""
         try:
-            with db_session() as session:
-                query = session.query(User)
-                
-                if user_id:
-                    user = query.filter(User.id == uuid.UUID(user_id)).first()
-                elif username:
-                    user = query.filter(User.username == username).first()
-                elif email:
-                    user = query.filter(User.email == email).first()
-                else:
-                    return {"error": "Must provide user_id, username or email"}, 400
-                
-                if not user:
-                    return {"error": "User not found"}, 404
-                
-                return {"user": user.to_dict()}, 200
+            if user_id:
+                key_name, key_value, condition = 'id', str(uuid.UUID(user_id)), User.id == uuid.UUID(user_id)
+            elif username:
+                key_name, key_value, condition = 'username', username, User.username == username
+            elif email:
+                key_name, key_value, condition = 'email', email, User.email == email
+            else:
+                return {"error": "Must provide user_id, username or email"}, 400
+            
+            def load():
+                # Tras create_user, las lecturas por id, username o email van al primario
+                with db_session(readonly=True, sticky_key=key_value) as session:
+                    user = session.query(User).filter(condition).first()
+                    return user.to_dict() if user else None
+            
+            user = entity_cache.get_or_load(
+                'user', key_name, key_value, load,
+                lambda data: (data['id'], {'username': data['username'], 'email': data['email']})
+            )
+            if not user:
+                return {"error": "User not found"}, 404
+            
+            return {"user": dict(user)}, 200
                 
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error getting user: {e}")
@@ -91,30 +224,21 @@ class BankController:
     def create_account(user_id, account_type='checking', initial_balance=0.0):
         """Crear nueva cuenta bancaria"""
         try:
-            with db_session() as session:
-                # Verificar que el usuario existe
-                user = session.query(User).filter(User.id == uuid.UUID(user_id)).first()
-                if not user:
-                    return {"error": "User not found"}, 404
-                
-                # Generar número de cuenta único
-                account_number = f"{account_type[:3].upper()}-{str(uuid.uuid4())[:8].upper()}"
-                
-                # Crear cuenta
-                account = Account(
-                    account_number=account_number,
-                    user_id=user.id,
-                    account_type=account_type,
-                    balance=Decimal(str(initial_balance)),
-                    currency='USD'
-                )
-                
-                session.add(account)
-                return {
-                    "message": "Account created successfully",
-                    "account": account.to_dict()
-                }, 201
+            user_uuid = uuid.UUID(user_id)
+            result = run_transaction(
+                lambda session: BankController._create_account_tx(
+                    session, user_uuid, account_type, Decimal(str(initial_balance))
+                ),
+                operation='create_account'
+            )
+            if result[1] == 201:
+                account = result[0]["account"]
+                mark_write(user_id, account["id"], account["account_number"])
+                events.publish(f"user:{account['user_id']}", 'account', account)
+            return result
                 
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error creating account: {e}")
             return {"error": "Invalid input or database error"}, 400
@@ -123,23 +247,102 @@ class BankController:
     def get_account(account_id=None, account_number=None):
         """Obtener cuenta por ID o número de cuenta"""
         try:
-            with db_session() as session:
-                query = session.query(Account)
-                
-                if account_id:
-                    account = query.filter(Account.id == uuid.UUID(account_id)).first()
-                elif account_number:
-                    account = query.filter(Account.account_number == account_number).first()
-                else:
-                    return {"error": "Must provide account_id or account_number"}, 400
+            if account_id:
+                key_name, key_value, condition = 'id', str(uuid.UUID(account_id)), Account.id == uuid.UUID(account_id)
+            elif account_number:
+                key_name, key_value, condition = 'account_number', account_number, Account.account_number == account_number
+            else:
+                return {"error": "Must provide account_id or account_number"}, 400
+            
+            def read(session):
+                account = projections.ACCOUNT.query(session).filter(condition).first()
+                if not account:
+                    return None
+                return BankController._account_dicts(session, [account], projections.ACCOUNT.encode)[0]
+            
+            def load():
+                return BankController._read_your_writes(
+                    read, sticky_key=key_value,
+                    written_keys=lambda data: [data['id']] if data else []
+                )
+            
+            if CACHE_BALANCES:
+                account = entity_cache.get_or_load(
+                    'account', key_name, key_value, load,
+                    lambda data: (data['id'], {'account_number': data['account_number']})
+                )
+            else:
+                account = load()
+            
+            if not account:
+                return {"error": "Account not found"}, 404
+            
+            return {"account": dict(account)}, 200
                 
+        except (ValueError, SQLAlchemyError) as e:
+            logger.error(f"Error getting account: {e}")
+            return {"error": "Invalid input or database error"}, 400
+    
+    @staticmethod
+    def enable_balance_striping(account_id, slots=None):
+        """Repartir los abonos de una cuenta muy concurrida (p. ej. business) entre varios sub-saldos"""
+        try:
+            slots = DEFAULT_BALANCE_SLOTS if slots is None else int(slots)
+            if not 1 < slots <= MAX_BALANCE_SLOTS:
+                return {"error": f"Slots must be between 2 and {MAX_BALANCE_SLOTS}"}, 400
+            
+            account_uuid = uuid.UUID(account_id)
+            with BankController._after_account_write(account_uuid):
+                return run_transaction(
+                    lambda session: BankController._set_balance_striping_tx(session, account_uuid, slots),
+                    operation='set_balance_striping'
+                )
+            
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
+        except (ValueError, SQLAlchemyError) as e:
+            logger.error(f"Error enabling balance striping: {e}")
+            return {"error": "Invalid input or database error"}, 400
+    
+    @staticmethod
+    def disable_balance_striping(account_id):
+        """Consolidar los sub-saldos de una cuenta en su saldo base"""
+        try:
+            account_uuid = uuid.UUID(account_id)
+            with BankController._after_account_write(account_uuid):
+                return run_transaction(
+                    lambda session: BankController._set_balance_striping_tx(session, account_uuid, 0),
+                    operation='set_balance_striping'
+                )
+            
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
+        except (ValueError, SQLAlchemyError) as e:
+            logger.error(f"Error disabling balance striping: {e}")
+            return {"error": "Invalid input or database error"}, 400
+    
+    @staticmethod
+    def get_account_balance_as_of(account_id, as_of):
+        """Obtener el saldo de una cuenta en un instante pasado (requiere modo libro mayor)"""
+        if not LEDGER_MODE:
+            return {"error": "Historical balances require ledger mode"}, 400
+        try:
+            if isinstance(as_of, str):
+                as_of = datetime.fromisoformat(as_of)
+            
+            with db_session(readonly=True, sticky_key=account_id) as session:
+                account = session.query(Account).filter(Account.id == uuid.UUID(account_id)).first()
                 if not account:
                     return {"error": "Account not found"}, 404
                 
-                return {"account": account.to_dict()}, 200
+                return {
+                    "account_id": account_id,
+                    "as_of": as_of.isoformat(),
+                    "balance": float(ledger.balance_as_of(session, account, as_of))
+                }, 200
                 
         except (ValueError, SQLAlchemyError) as e:
-            logger.error(f"Error getting account: {e}")
+            logger.error(f"Error getting historical balance: {e}")
             return {"error": "Invalid input or database error"}, 400
     
     # ===== TRANSACTION OPERATIONS =====
@@ -151,52 +354,93 @@ class BankController:
             if amount_decimal <= 0:
                 return {"error": "Amount must be positive"}, 400
             
-            with db_session() as session:
-                # Obtener cuentas con bloqueo para evitar race conditions
-                from_account = session.query(Account).filter(
-                    Account.id == uuid.UUID(from_account_id)
-                ).with_for_update().first()
-                
-                to_account = session.query(Account).filter(
-                    Account.id == uuid.UUID(to_account_id)
-                ).with_for_update().first()
-                
-                if not from_account or not to_account:
-                    return {"error": "One or both accounts not found"}, 404
-                
-                if from_account.status != 'active' or to_account.status != 'active':
-                    return {"error": "One or both accounts are not active"}, 400
-                
-                if from_account.balance < amount_decimal:
-                    return {"error": "Insufficient funds"}, 400
-                
-                # Realizar transferencia
-                from_account.balance -= amount_decimal
-                to_account.balance += amount_decimal
-                
-                # Crear registro de transacción
-                transaction = Transaction(
-                    transaction_code=f"TXN-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                    from_account_id=from_account.id,
-                    to_account_id=to_account.id,
-                    amount=amount_decimal,
-                    transaction_type='transfer',
-                    description=description,
-                    status='completed'
-                )
-                
-                session.add(transaction)
-                
-                return {
-                    "message": "Transfer completed successfully",
-                    "transaction": transaction.to_dict(),
-                    "new_balance": float(from_account.balance)
-                }, 200
+            from_uuid = uuid.UUID(from_account_id)
+            to_uuid = uuid.UUID(to_account_id)
+            if from_uuid == to_uuid:
+                return {"error": "Cannot transfer to the same account"}, 400
+            
+            def transfer(body):
+                return BankController._published(run_transaction(
+                    lambda session: body(session, from_uuid, to_uuid, amount_decimal, description),
+                    operation='transfer_funds'
+                ))
+            
+            with BankController._after_account_write(from_uuid, to_uuid):
+                if DIRECT_BALANCE_UPDATES and not LEDGER_MODE:
+                    try:
+                        return transfer(BankController._transfer_funds_direct_tx)
+                    except _UseOrmPath:
+                        pass
+                return transfer(BankController._transfer_funds_tx)
                 
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error transferring funds: {e}")
             return {"error": "Transfer failed"}, 500
     
+    @staticmethod
+    def transfer_funds_batch(transfers):
+        """Aplicar un lote de transferencias en una sola transacción.
+
+        Cada elemento es un dict con from_account_id, to_account_id, amount y
+        description (opcional). Todas las cuentas involucradas se bloquean con
+        una única consulta ordenada por id, de modo que dos lotes concurrentes
+        siempre adquieren los locks en el mismo orden y no pueden bloquearse
+        mutuamente. Las transferencias se aplican en el orden recibido y cada
+        una devuelve su propio resultado; un elemento inválido no aborta el lote.
+        """
+        if not isinstance(transfers, (list, tuple)) or not transfers:
+            return {"error": "Transfers must be a non-empty list"}, 400
+        
+        if len(transfers) > MAX_BATCH_TRANSFERS:
+            return {"error": f"Batch size exceeds the limit of {MAX_BATCH_TRANSFERS} transfers"}, 400
+        
+        # Validar los elementos antes de abrir la transacción
+        results = [None] * len(transfers)
+        pending = []
+        for index, item in enumerate(transfers):
+            try:
+                from_uuid = uuid.UUID(str(item['from_account_id']))
+                to_uuid = uuid.UUID(str(item['to_account_id']))
+                amount_decimal = Decimal(str(item['amount']))
+            except (KeyError, TypeError, ValueError, ArithmeticError):
+                results[index] = {"index": index, "status": 400, "error": "Invalid transfer data"}
+                continue
+            
+            if amount_decimal <= 0:
+                results[index] = {"index": index, "status": 400, "error": "Amount must be positive"}
+            elif from_uuid == to_uuid:
+                results[index] = {"index": index, "status": 400, "error": "Cannot transfer to the same account"}
+            else:
+                pending.append((index, from_uuid, to_uuid, amount_decimal, item.get('description', '')))
+        
+        try:
+            if pending:
+                touched = {p[1] for p in pending} | {p[2] for p in pending}
+                with BankController._after_account_write(*touched):
+                    applied = run_transaction(
+                        lambda session: BankController._transfer_funds_batch_tx(session, pending),
+                        operation='transfer_funds_batch'
+                    )
+                for result in applied:
+                    results[result["index"]] = result
+                    BankController._publish_movement(result)
+            
+            succeeded = sum(1 for r in results if r["status"] == 200)
+            return {
+                "message": "Batch processed",
+                "results": results,
+                "succeeded": succeeded,
+                "failed": len(results) - succeeded
+            }, 200
+            
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
+        except SQLAlchemyError as e:
+            logger.error(f"Error processing transfer batch: {e}")
+            return {"error": "Batch transfer failed"}, 500
+    
     @staticmethod
     def deposit_funds(account_id, amount, description=""):
         """Depositar fondos a una cuenta"""
@@ -205,39 +449,22 @@ class BankController:
             if amount_decimal <= 0:
                 return {"error": "Amount must be positive"}, 400
             
-            with db_session() as session:
-                account = session.query(Account).filter(
-                    Account.id == uuid.UUID(account_id)
-                ).with_for_update().first()
+            account_uuid = uuid.UUID(account_id)
+            with BankController._after_account_write(account_uuid):
+                if GROUP_COMMIT_ENABLED:
+                    return BankController._published(wait_future(BankController._get_deposit_batcher().submit(
+                        account_uuid, amount_decimal, description
+                    )))
                 
-                if not account:
-                    return {"error": "Account not found"}, 404
-                
-                if account.status != 'active':
-                    return {"error": "Account is not active"}, 400
-                
-                # Realizar depósito
-                account.balance += amount_decimal
-                
-                # Crear registro de transacción
-                transaction = Transaction(
-                    transaction_code=f"DEP-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                    from_account_id=None,
-                    to_account_id=account.id,
-                    amount=amount_decimal,
-                    transaction_type='deposit',
-                    description=description,
-                    status='completed'
-                )
-                
-                session.add(transaction)
-                
-                return {
-                    "message": "Deposit completed successfully",
-                    "transaction": transaction.to_dict(),
-                    "new_balance": float(account.balance)
-                }, 200
+                return BankController._published(run_transaction(
+                    lambda session: BankController._deposit_funds_tx(
+                        session, account_uuid, amount_decimal, description
+                    ),
+                    operation='deposit_funds'
+                ))
                 
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error depositing funds: {e}")
             return {"error": "Deposit failed"}, 500
@@ -250,42 +477,17 @@ class BankController:
             if amount_decimal <= 0:
                 return {"error": "Amount must be positive"}, 400
             
-            with db_session() as session:
-                account = session.query(Account).filter(
-                    Account.id == uuid.UUID(account_id)
-                ).with_for_update().first()
-                
-                if not account:
-                    return {"error": "Account not found"}, 404
-                
-                if account.status != 'active':
-                    return {"error": "Account is not active"}, 400
-                
-                if account.balance < amount_decimal:
-                    return {"error": "Insufficient funds"}, 400
-                
-                # Realizar retiro
-                account.balance -= amount_decimal
-                
-                # Crear registro de transacción
-                transaction = Transaction(
-                    transaction_code=f"WDL-{datetime.now().strftime('%Y%m%d%H%M%S')}",
-                    from_account_id=account.id,
-                    to_account_id=None,
-                    amount=amount_decimal,
-                    transaction_type='withdrawal',
-                    description=description,
-                    status='completed'
-                )
-                
-                session.add(transaction)
-                
-                return {
-                    "message": "Withdrawal completed successfully",
-                    "transaction": transaction.to_dict(),
-                    "new_balance": float(account.balance)
-                }, 200
+            account_uuid = uuid.UUID(account_id)
+            body = BankController._withdraw_funds_direct_tx if DIRECT_BALANCE_UPDATES and not LEDGER_MODE \
+                else BankController._withdraw_funds_tx
+            with BankController._after_account_write(account_uuid):
+                return BankController._published(run_transaction(
+                    lambda session: body(session, account_uuid, amount_decimal, description),
+                    operation='withdraw_funds'
+                ))
                 
+        except RetryExhaustedError:
+            return CONTENTION_ERROR
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error withdrawing funds: {e}")
             return {"error": "Withdrawal failed"}, 500
@@ -295,50 +497,98 @@ class BankController:
     def get_user_accounts(user_id):
         """Obtener todas las cuentas de un usuario"""
         try:
-            with db_session() as session:
-                accounts = session.query(Account).filter(Account.user_id == user_id).all()
-                return [acc.to_dict() for acc in accounts]
+            return BankController._read_your_writes(
+                lambda session: BankController._account_dicts(
+                    session,
+                    projections.ACCOUNT.query(session).filter(Account.user_id == user_id).all(),
+                    projections.ACCOUNT.encode
+                ),
+                sticky_key=user_id,
+                written_keys=lambda accounts: [account['id'] for account in accounts]
+            )
 
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error getting user accounts: {e}")
             return {"error": "Invalid input or database error"}, 400
     
     @staticmethod
-    def get_account_transactions(account_id, limit=50, offset=0):
-        """Obtener transacciones de una cuenta"""
+    def get_account_transactions(account_id, limit=50, offset=0, cursor=None):
+        """Obtener transacciones de una cuenta
+
+        Con cursor (el next_cursor de la página anterior) la consulta continúa
+        por keyset sobre (created_at, id) y offset se ignora: cualquier página
+        cuesta lo mismo que la primera.
+        """
         try:
-            with db_session() as session:
-                transactions = session.query(Transaction).filter(
-                    or_(
-                        Transaction.from_account_id == uuid.UUID(account_id),
-                        Transaction.to_account_id == uuid.UUID(account_id)
-                    )
-                ).order_by(desc(Transaction.created_at)).limit(limit).offset(offset).all()
+            limit = clamp_page_size(limit)
+            account_uuid = uuid.UUID(account_id)
+            before = None
+            if cursor:
+                created_at, txn_id = decode_cursor(cursor)
+                before = (created_at, uuid.UUID(txn_id))
+                offset = 0
+            with db_session(readonly=True, sticky_key=account_id) as session:
+                rows = history.account_history(
+                    session, account_uuid, limit + 1, before=before, offset=offset,
+                    columns=projections.TRANSACTION.columns
+                )
+                transactions, next_cursor = paginate(rows, limit, lambda row: (row.created_at, row.id))
                 
+                encode = projections.TRANSACTION.encode
                 return {
                     "account_id": account_id,
-                    "transactions": [txn.to_dict() for txn in transactions],
-                    "count": len(transactions)
+                    "transactions": [encode(row) for row in transactions],
+                    "count": len(transactions),
+                    "next_cursor": next_cursor
                 }, 200
                 
         except (ValueError, SQLAlchemyError) as e:
             logger.error(f"Error getting account transactions: {e}")
             return {"error": "Invalid input or database error"}, 400
     
+    @staticmethod
+    def export_account_transactions(account_id, fmt='ndjson'):
+        """Exportar el historial completo de una cuenta en NDJSON o CSV
+
+        Devuelve (generador de trozos de texto, 200) o (error, status). Las
+        filas se leen con un cursor del lado del servidor y se formatean por
+        trozos, así que la memoria no depende del tamaño del historial.
+        """
+        if fmt not in export.CONTENT_TYPES:
+            return {"error": f"Format must be one of: {', '.join(export.CONTENT_TYPES)}"}, 400
+        try:
+            account_uuid = uuid.UUID(account_id)
+            with db_session(readonly=True, sticky_key=account_id) as session:
+                if not session.query(Account.id).filter(Account.id == account_uuid).first():
+                    return {"error": "Account not found"}, 404
+        except (ValueError, SQLAlchemyError) as e:
+            logger.error(f"Error exporting account transactions: {e}")
+            return {"error": "Invalid input or database error"}, 400
+        
+        def generate():
+            with db_session(readonly=True, sticky_key=account_id) as session:
+                rows = history.account_history_stream(
+                    session, account_uuid, columns=projections.TRANSACTION.columns
+                )
+                encode = projections.TRANSACTION.encode
+                yield from export.stream_rows((encode(row) for row in rows), fmt, EXPORT_FIELDS)
+        
+        return generate(), 200
+    
     @staticmethod
     def get_bank_summary():
         """Obtener resumen general del banco"""
         try:
-            with db_session() as session:
-                from sqlalchemy import func
-                
-                total_users = session.query(func.count(User.id)).scalar()
-                total_accounts = session.query(func.count(Account.id)).scalar()
-                total_balance = session.query(func.sum(Account.balance)).scalar() or Decimal('0.00')
-                total_transactions = session.query(func.count(Transaction.id)).scalar()
+            with db_session(readonly=True) as session:
+                # Contadores mantenidos por cada escritura: lectura O(1)
+                stats = bank_stats.read(session)
+                total_users = stats['users']
+                total_accounts = stats['accounts']
+                total_balance = stats['total_balance']
+                total_transactions = stats['transactions']
                 
                 # Últimas transacciones
-                recent_transactions = session.query(Transaction).order_by(
+                recent_transactions = projections.TRANSACTION.query(session).order_by(
                     desc(Transaction.created_at)
                 ).limit(10).all()
                 
@@ -350,9 +600,659 @@ class BankController:
                         "total_transactions": total_transactions,
                         "average_balance": float(total_balance / total_accounts) if total_accounts > 0 else 0.0
                     },
-                    "recent_transactions": [txn.to_dict() for txn in recent_transactions]
+                    "recent_transactions": [projections.TRANSACTION.encode(row) for row in recent_transactions]
                 }, 200
                 
         except SQLAlchemyError as e:
             logger.error(f"Error getting bank summary: {e}")
             return {"error": "Database error occurred"}, 500
+    
+    @staticmethod
+    def start_ledger_compactor():
+        """Arrancar (una vez por proceso) el compactador de snapshots del libro mayor"""
+        global _ledger_compactor
+        if _ledger_compactor is None:
+            _ledger_compactor = ledger.LedgerCompactor(
+                db_session,
+                lambda session, account_id: session.query(Account).filter(Account.id == account_id).first(),
+                interval=LEDGER_COMPACT_INTERVAL,
+                min_postings=LEDGER_COMPACT_MIN_POSTINGS,
+                lag=LEDGER_COMPACT_LAG
+            )
+            _ledger_compactor.start()
+        return _ledger_compactor
+    
+    @staticmethod
+    def stop_ledger_compactor(timeout=5.0):
+        """Detener el compactador al apagar el proceso (no hace nada si no se arrancó)"""
+        global _ledger_compactor
+        if _ledger_compactor is not None:
+            _ledger_compactor.stop(timeout)
+            _ledger_compactor = None
+    
+    @staticmethod
+    def reconcile_bank_stats():
+        """Verificar los contadores globales contra un recorrido completo y corregir la deriva"""
+        try:
+            drift = bank_stats.reconcile(db_session)
+            return {
+                "message": "Bank stats reconciled",
+                "drift": {field: float(value) for field, value in drift.items()}
+            }, 200
+        except SQLAlchemyError as e:
+            logger.error(f"Error reconciling bank stats: {e}")
+            return {"error": "Database error occurred"}, 500
+    
+    @staticmethod
+    def get_cache_stats():
+        """Obtener las métricas de la caché de usuarios y cuentas"""
+        return {"cache": entity_cache.stats()}, 200
+    
+    @staticmethod
+    def get_retry_stats():
+        """Obtener los contadores de reintentos por operación"""
+        return {"retries": retry_stats.snapshot()}, 200
+    
+    # ===== TRANSACTION BODIES =====
+    # Cada cuerpo recibe la sesión abierta por run_transaction y puede
+    # ejecutarse varias veces si la base de datos pide reintentar.
+    @staticmethod
+    def _create_user_tx(session, username, email, password_hash, first_name, last_name,
+                        document_id, phone, is_admin):
+        # Verificar si el usuario ya existe
+        existing = session.query(User).filter(
+            or_(User.username == username, User.email == email)
+        ).first()
+        
+        if existing:
+            return {"error": "Username or email already exists"}, 409
+        
+        # Crear nuevo usuario
+        user = User(
+            username=username,
+            email=email,
+            password_hash=password_hash,
+            first_name=first_name,
+            last_name=last_name,
+            document_id=document_id,
+            phone=phone,
+            is_admin=is_admin
+        )
+        
+        session.add(user)
+        session.flush()  # Para obtener el ID sin hacer commit
+        
+        # Crear cuenta por defecto
+        default_account = Account(
+            account_number=f"CHK-{str(user.id)[:8].upper()}",
+            user_id=user.id,
+            account_type='checking',
+            balance=Decimal('0.00'),
+            currency='USD'
+        )
+        session.add(default_account)
+        bank_stats.record(session, users=1, accounts=1)
+        
+        return {"message": "User created successfully", "user": user.to_dict()}, 201
+    
+    @staticmethod
+    def _create_account_tx(session, user_uuid, account_type, initial_balance):
+        # Verificar que el usuario existe
+        user = session.query(User).filter(User.id == user_uuid).first()
+        if not user:
+            return {"error": "User not found"}, 404
+        
+        # Generar número de cuenta único
+        account_number = f"{account_type[:3].upper()}-{str(uuid.uuid4())[:8].upper()}"
+        
+        # Crear cuenta
+        account = Account(
+            account_number=account_number,
+            user_id=user.id,
+            account_type=account_type,
+            balance=initial_balance,
+            currency='USD'
+        )
+        
+        session.add(account)
+        session.flush()  # Para obtener el ID sin hacer commit
+        bank_stats.record(session, accounts=1, balance=initial_balance)
+        return {
+            "message": "Account created successfully",
+            "account": account.to_dict()
+        }, 201
+    
+    @staticmethod
+    def _transfer_funds_tx(session, from_uuid, to_uuid, amount_decimal, description):
+        # Obtener cuentas con bloqueo (orden por id) para evitar race conditions y deadlocks
+        locked = BankController._lock_accounts(session, [from_uuid], [to_uuid])
+        from_account = locked.get(from_uuid)
+        to_account = locked.get(to_uuid)
+        
+        if not from_account or not to_account:
+            return {"error": "One or both accounts not found"}, 404
+        
+        if from_account.status != 'active' or to_account.status != 'active':
+            return {"error": "One or both accounts are not active"}, 400
+        
+        # Realizar transferencia
+        transaction_code = next_transaction_code('TXN')
+        if not BankController._debit(session, from_account, amount_decimal, transaction_code):
+            return {"error": "Insufficient funds"}, 400
+        BankController._credit(session, to_account, amount_decimal, transaction_code)
+        
+        # Crear registro de transacción
+        transaction = Transaction(
+            transaction_code=transaction_code,
+            from_account_id=from_account.id,
+            to_account_id=to_account.id,
+            amount=amount_decimal,
+            transaction_type='transfer',
+            description=description,
+            status='completed'
+        )
+        
+        session.add(transaction)
+        session.flush()  # id y created_at para to_dict() (y el evento SSE)
+        bank_stats.record(session, transactions=1)
+        
+        return {
+            "message": "Transfer completed successfully",
+            "transaction": transaction.to_dict(),
+            "new_balance": float(BankController._current_balance(session, from_account)),
+            TO_BALANCE_KEY: float(BankController._current_balance(session, to_account))
+        }, 200
+    
+    @staticmethod
+    def _transfer_funds_batch_tx(session, pending):
+        accounts = BankController._lock_accounts(
+            session, {p[1] for p in pending}, {p[2] for p in pending}
+        )
+        
+        results = []
+        applied = []
+        
+        for index, from_uuid, to_uuid, amount_decimal, description in pending:
+            from_account = accounts.get(from_uuid)
+            to_account = accounts.get(to_uuid)
+            
+            if not from_account or not to_account:
+                results.append({"index": index, "status": 404, "error": "One or both accounts not found"})
+                continue
+            
+            if from_account.status != 'active' or to_account.status != 'active':
+                results.append({"index": index, "status": 400, "error": "One or both accounts are not active"})
+                continue
+            
+            transaction_code = next_transaction_code('TXN')
+            if not BankController._debit(session, from_account, amount_decimal, transaction_code):
+                results.append({"index": index, "status": 400, "error": "Insufficient funds"})
+                continue
+            BankController._credit(session, to_account, amount_decimal, transaction_code)
+            
+            transaction = Transaction(
+                transaction_code=transaction_code,
+                from_account_id=from_account.id,
+                to_account_id=to_account.id,
+                amount=amount_decimal,
+                transaction_type='transfer',
+                description=description,
+                status='completed'
+            )
+            session.add(transaction)
+            # El saldo devuelto es el de la cuenta origen justo después de esta transferencia
+            # (el del destino solo se publica a su propietario)
+            applied.append((
+                index, transaction,
+                float(BankController._current_balance(session, from_account)),
+                float(BankController._current_balance(session, to_account))
+            ))
+        
+        # Un único flush para todas las filas del lote
+        session.flush()
+        bank_stats.record(session, transactions=len(applied))
+        
+        for index, transaction, new_balance, to_new_balance in applied:
+            results.append({
+                "index": index,
+                "status": 200,
+                "transaction": transaction.to_dict(),
+                "new_balance": new_balance,
+                TO_BALANCE_KEY: to_new_balance
+            })
+        return results
+    
+    @staticmethod
+    def _deposit_funds_tx(session, account_uuid, amount_decimal, description):
+        account = BankController._lock_accounts(session, [], [account_uuid]).get(account_uuid)
+        
+        if not account:
+            return {"error": "Account not found"}, 404
+        
+        if account.status != 'active':
+            return {"error": "Account is not active"}, 400
+        
+        # Realizar depósito
+        transaction_code = next_transaction_code('DEP')
+        BankController._credit(session, account, amount_decimal, transaction_code)
+        
+        # Crear registro de transacción
+        transaction = Transaction(
+            transaction_code=transaction_code,
+            from_account_id=None,
+            to_account_id=account.id,
+            amount=amount_decimal,
+            transaction_type='deposit',
+            description=description,
+            status='completed'
+        )
+        
+        session.add(transaction)
+        session.flush()  # id y created_at para to_dict() (y el evento SSE)
+        bank_stats.record(session, transactions=1, balance=amount_decimal)
+        
+        return {
+            "message": "Deposit completed successfully",
+            "transaction": transaction.to_dict(),
+            "new_balance": float(BankController._current_balance(session, account))
+        }, 200
+    
+    @staticmethod
+    def _deposit_funds_batch_tx(session, requests):
+        """Aplicar un lote de depósitos del group commit; devuelve un resultado por petición."""
+        accounts = BankController._lock_accounts(session, [], {r.account_id for r in requests})
+        results = []
+        applied = []
+        
+        for position, request in enumerate(requests):
+            account = accounts.get(request.account_id)
+            if not account:
+                results.append(({"error": "Account not found"}, 404))
+                continue
+            
+            if account.status != 'active':
+                results.append(({"error": "Account is not active"}, 400))
+                continue
+            
+            # Los incrementos de una misma cuenta se acumulan en memoria y el
+            # flush emite un solo UPDATE por cuenta con el saldo agregado.
+            transaction_code = next_transaction_code('DEP')
+            BankController._credit(session, account, request.amount, transaction_code)
+            
+            transaction = Transaction(
+                transaction_code=transaction_code,
+                from_account_id=None,
+                to_account_id=account.id,
+                amount=request.amount,
+                transaction_type='deposit',
+                description=request.description,
+                status='completed'
+            )
+            session.add(transaction)
+            results.append(None)
+            applied.append((position, transaction, float(BankController._current_balance(session, account))))
+        
+        session.flush()
+        bank_stats.record(
+            session,
+            transactions=len(applied),
+            balance=sum((requests[position].amount for position, _, _ in applied), Decimal('0.00'))
+        )
+        
+        for position, transaction, new_balance in applied:
+            results[position] = ({
+                "message": "Deposit completed successfully",
+                "transaction": transaction.to_dict(),
+                "new_balance": new_balance
+            }, 200)
+        return results
+    
+    @staticmethod
+    def _withdraw_funds_tx(session, account_uuid, amount_decimal, description):
+        account = BankController._lock_accounts(session, [account_uuid]).get(account_uuid)
+        
+        if not account:
+            return {"error": "Account not found"}, 404
+        
+        if account.status != 'active':
+            return {"error": "Account is not active"}, 400
+        
+        # Realizar retiro
+        transaction_code = next_transaction_code('WDL')
+        if not BankController._debit(session, account, amount_decimal, transaction_code):
+            return {"error": "Insufficient funds"}, 400
+        
+        # Crear registro de transacción
+        transaction = Transaction(
+            transaction_code=transaction_code,
+            from_account_id=account.id,
+            to_account_id=None,
+            amount=amount_decimal,
+            transaction_type='withdrawal',
+            description=description,
+            status='completed'
+        )
+        
+        session.add(transaction)
+        session.flush()  # id y created_at para to_dict() (y el evento SSE)
+        bank_stats.record(session, transactions=1, balance=-amount_decimal)
+        
+        return {
+            "message": "Withdrawal completed successfully",
+            "transaction": transaction.to_dict(),
+            "new_balance": float(BankController._current_balance(session, account))
+        }, 200
+    
+    @staticmethod
+    def _set_balance_striping_tx(session, account_uuid, slots):
+        account = BankController._lock_accounts(session, [account_uuid]).get(account_uuid)
+        if not account:
+            return {"error": "Account not found"}, 404
+        
+        # Consolidar los slots actuales en el saldo base y crear los nuevos vacíos
+        if account.balance_slots:
+            for slot in BankController._lock_slots(session, account):
+                account.balance += slot.balance
+                session.delete(slot)
+            session.flush()
+        
+        for index in range(slots):
+            session.add(AccountBalanceSlot(account_id=account.id, slot=index, balance=Decimal('0.00')))
+        account.balance_slots = slots
+        session.flush()
+        
+        return {
+            "message": "Balance striping updated",
+            "account": BankController._account_dicts(session, [account])[0]
+        }, 200
+    
+    @staticmethod
+    def _withdraw_funds_direct_tx(session, account_uuid, amount_decimal, description):
+        """Retiro en un solo round trip; el éxito se decide por el número de filas devueltas."""
+        now = datetime.utcnow()
+        transaction_code = next_transaction_code('WDL')
+        txn_id = uuid.uuid4()
+        row = session.execute(_WITHDRAW_SQL, {
+            "account_id": account_uuid,
+            "amount": amount_decimal,
+            "now": now,
+            "txn_id": txn_id,
+            "code": transaction_code,
+            "description": description,
+        }).first()
+        
+        if row is None:
+            state = session.execute(_ACCOUNT_STATE_SQL, {"ids": [account_uuid]}).first()
+            if state is None:
+                return {"error": "Account not found"}, 404
+            if state.status != 'active':
+                return {"error": "Account is not active"}, 400
+            if state.balance_slots:
+                # Las cuentas con saldo repartido usan la ruta ORM
+                return BankController._withdraw_funds_tx(session, account_uuid, amount_decimal, description)
+            return {"error": "Insufficient funds"}, 400
+        
+        bank_stats.record(session, transactions=1, balance=-amount_decimal)
+        return {
+            "message": "Withdrawal completed successfully",
+            "transaction": BankController._direct_transaction_dict(
+                txn_id, transaction_code, account_uuid, None, amount_decimal,
+                'withdrawal', description, now
+            ),
+            "new_balance": float(row.balance)
+        }, 200
+    
+    @staticmethod
+    def _transfer_funds_direct_tx(session, from_uuid, to_uuid, amount_decimal, description):
+        """Transferencia en un solo round trip (débito, crédito e inserción en una sentencia)."""
+        now = datetime.utcnow()
+        transaction_code = next_transaction_code('TXN')
+        txn_id = uuid.uuid4()
+        states = {row.id: row for row in session.execute(_TRANSFER_SQL, {
+            "from_id": from_uuid,
+            "to_id": to_uuid,
+            "amount": amount_decimal,
+            "now": now,
+            "txn_id": txn_id,
+            "code": transaction_code,
+            "description": description,
+        })}
+        
+        if from_uuid not in states or to_uuid not in states:
+            return {"error": "One or both accounts not found"}, 404
+        new_balance = states[from_uuid].new_balance
+        if new_balance is None:
+            # No se ha modificado nada: el error se responde en esta misma transacción
+            if states[from_uuid].status != 'active' or states[to_uuid].status != 'active':
+                return {"error": "One or both accounts are not active"}, 400
+            if states[from_uuid].balance_slots or states[to_uuid].balance_slots:
+                # Las cuentas con saldo repartido usan la ruta ORM, en su propia
+                # transacción (run_transaction deshace esta al propagarse la excepción)
+                raise _UseOrmPath('striped account')
+            return {"error": "Insufficient funds"}, 400
+        
+        bank_stats.record(session, transactions=1)
+        return {
+            "message": "Transfer completed successfully",
+            "transaction": BankController._direct_transaction_dict(
+                txn_id, transaction_code, from_uuid, to_uuid, amount_decimal,
+                'transfer', description, now
+            ),
+            "new_balance": float(new_balance),
+            TO_BALANCE_KEY: float(states[from_uuid].to_new_balance)
+        }, 200
+    
+    # ===== INTERNAL HELPERS =====
+    @staticmethod
+    @contextmanager
+    def _after_account_write(*account_ids):
+        """Al terminar una escritura (haya fallado o no): invalidar las cuentas en la
+        caché y marcarlas para que las lecturas siguientes vayan al primario."""
+        try:
+            yield
+        finally:
+            for account_id in account_ids:
+                entity_cache.invalidate('account', account_id)
+            mark_write(*account_ids)
+    
+    @staticmethod
+    def _published(result):
+        """Publicar el movimiento de un resultado (body, status) ya confirmado y devolverlo."""
+        body, status = result
+        if status == 200:
+            BankController._publish_movement(body)
+        return result
+    
+    @staticmethod
+    def _publish_movement(body):
+        """Eventos SSE de un movimiento confirmado: la transacción a cada cuenta
+        involucrada y el saldo nuevo de cada lado (new_balance es el del origen,
+        o el del destino en depósitos; el del destino de una transferencia viaja
+        en TO_BALANCE_KEY, que se quita aquí para no devolverlo al ordenante)."""
+        to_new_balance = body.pop(TO_BALANCE_KEY, None)
+        txn = body.get("transaction")
+        if not txn:
+            return
+        for account_id in {txn["from_account_id"], txn["to_account_id"]} - {None}:
+            events.publish(f"account:{account_id}", 'transaction', txn)
+        balances = {}
+        if "new_balance" in body:
+            balances[txn["from_account_id"] or txn["to_account_id"]] = body["new_balance"]
+        if to_new_balance is not None:
+            balances[txn["to_account_id"]] = to_new_balance
+        for account_id, balance in balances.items():
+            events.publish(f"account:{account_id}", 'balance', {
+                "account_id": account_id,
+                "balance": balance
+            })
+    
+    @staticmethod
+    def _read_your_writes(read, sticky_key=None, written_keys=lambda result: ()):
+        """Ejecutar read(session) en una réplica; si el resultado incluye entidades
+        escritas hace poco por este proceso, repetir la lectura en el primario.
+
+        read debe devolver datos planos (dicts), no objetos ligados a la sesión.
+        """
+        with db_session(readonly=True, sticky_key=sticky_key) as session:
+            result = read(session)
+        if not recently_written(*written_keys(result)):
+            return result
+        with db_session() as session:
+            return read(session)
+    
+    @staticmethod
+    def _get_deposit_batcher():
+        """Crear (una vez por proceso) la cola de group commit de depósitos."""
+        global _deposit_batcher
+        with _deposit_batcher_lock:
+            if _deposit_batcher is None:
+                _deposit_batcher = DepositBatcher(
+                    lambda requests: run_transaction(
+                        lambda session: BankController._deposit_funds_batch_tx(session, requests),
+                        operation='deposit_funds_batch'
+                    ),
+                    window=GROUP_COMMIT_WINDOW_MS / 1000,
+                    max_items=GROUP_COMMIT_MAX_ITEMS
+                )
+        return _deposit_batcher
+    
+    @staticmethod
+    def _lock_accounts(session, debit_ids, credit_ids=()):
+        """Bloquear (FOR UPDATE) varias cuentas en una sola consulta, ordenadas por id.
+
+        Las cuentas que solo reciben abonos y tienen el saldo repartido en slots
+        (o todas, en modo libro mayor) no se bloquean: el abono se aplica en uno
+        de sus slots o como asiento nuevo. Devuelve un dict
+        {uuid: Account}; las cuentas inexistentes no aparecen.
+        """
+        debit_ids = set(debit_ids)
+        credit_only = set(credit_ids) - debit_ids
+        
+        condition = Account.id.in_(sorted(debit_ids))
+        if credit_only and not LEDGER_MODE:
+            condition = or_(
+                condition,
+                and_(Account.id.in_(sorted(credit_only)), Account.balance_slots == 0)
+            )
+        accounts = session.query(Account).filter(condition).order_by(Account.id).with_for_update().all()
+        locked = {account.id: account for account in accounts}
+        
+        missing = credit_only - locked.keys()
+        if missing:
+            for account in session.query(Account).filter(Account.id.in_(sorted(missing))).all():
+                locked[account.id] = account
+        return locked
+    
+    @staticmethod
+    def _credit(session, account, amount, slot_key):
+        """Abonar a una cuenta; en cuentas con striping el abono va a un slot elegido por hash."""
+        if LEDGER_MODE:
+            ledger.post(session, account.id, amount, slot_key)
+            return
+        if account.balance_slots:
+            slot = zlib.crc32(slot_key.encode()) % account.balance_slots
+            result = session.execute(_CREDIT_SLOT_SQL, {"account_id": account.id, "slot": slot, "amount": amount})
+            if result.rowcount:
+                return
+            # El striping cambió desde que se leyó la cuenta (slot eliminado):
+            # bloquear la fila y abonar al saldo base, que siempre es válido.
+            session.refresh(account, with_for_update=True)
+        account.balance += amount
+    
+    @staticmethod
+    def _debit(session, account, amount, transaction_code):
+        """Debitar de una cuenta bloqueada. Devuelve False si no hay saldo suficiente.
+
+        En cuentas con striping se bloquean todos los slots en orden y se
+        descuenta primero del saldo base y luego de los slots. En modo libro
+        mayor se inserta un asiento negativo.
+        """
+        if LEDGER_MODE:
+            if ledger.balance(session, account) < amount:
+                return False
+            ledger.post(session, account.id, -amount, transaction_code)
+            return True
+        
+        if not account.balance_slots:
+            if account.balance < amount:
+                return False
+            account.balance -= amount
+            return True
+        
+        slots = BankController._lock_slots(session, account)
+        if account.balance + sum(slot.balance for slot in slots) < amount:
+            return False
+        
+        remaining = amount
+        taken = min(account.balance, remaining)
+        account.balance -= taken
+        remaining -= taken
+        for slot in slots:
+            if not remaining:
+                break
+            taken = min(slot.balance, remaining)
+            slot.balance -= taken
+            remaining -= taken
+        return True
+    
+    @staticmethod
+    def _lock_slots(session, account):
+        # flush + populate_existing: los abonos a slots se hacen con SQL directo
+        # y el mapa de identidad de la sesión podría tener valores anteriores.
+        session.flush()
+        return session.query(AccountBalanceSlot).filter(
+            AccountBalanceSlot.account_id == account.id
+        ).order_by(AccountBalanceSlot.slot).with_for_update().populate_existing().all()
+    
+    @staticmethod
+    def _current_balance(session, account):
+        """Saldo reportado: el saldo base más la suma de los slots si la cuenta tiene striping."""
+        if LEDGER_MODE:
+            return ledger.balance(session, account)
+        if not account.balance_slots:
+            return account.balance
+        session.flush()
+        slots_total = session.query(func.sum(AccountBalanceSlot.balance)).filter(
+            AccountBalanceSlot.account_id == account.id
+        ).scalar() or Decimal('0.00')
+        return account.balance + slots_total
+    
+    @staticmethod
+    def _account_dicts(session, accounts, encode=None):
+        """to_dict() de varias cuentas con el saldo reportado (sumando slots cuando corresponde).
+
+        accounts pueden ser objetos Account o filas de projections.ACCOUNT;
+        en ese caso encode es projections.ACCOUNT.encode.
+        """
+        striped = [account.id for account in accounts if account.balance_slots]
+        slot_totals = {}
+        if striped and not LEDGER_MODE:
+            slot_totals = dict(session.query(
+                AccountBalanceSlot.account_id, func.sum(AccountBalanceSlot.balance)
+            ).filter(AccountBalanceSlot.account_id.in_(striped)).group_by(AccountBalanceSlot.account_id).all())
+        
+        result = []
+        for account in accounts:
+            data = encode(account) if encode else account.to_dict()
+            if LEDGER_MODE:
+                data['balance'] = float(ledger.balance(session, account))
+            elif account.id in slot_totals:
+                data['balance'] = float(account.balance + slot_totals[account.id])
+            result.append(data)
+        return result
+    
+    @staticmethod
+    def _direct_transaction_dict(txn_id, transaction_code, from_uuid, to_uuid, amount,
+                                 transaction_type, description, created_at):
+        """Misma forma que Transaction.to_dict() para las filas insertadas sin ORM."""
+        return {
+            'id': str(txn_id),
+            'transaction_code': transaction_code,
+            'from_account_id': str(from_uuid) if from_uuid else None,
+            'to_account_id': str(to_uuid) if to_uuid else None,
+            'amount': float(amount),
+            'transaction_type': transaction_type,
+            'description': description,
+            'status': 'completed',
+            'created_at': created_at.isoformat()
+        }
@@ -0,0 +1,107 @@
+# controllers/group_commit.py
+"""
+Cola de micro-lotes (group commit) para depósitos.
+
+Las peticiones concurrentes se encolan y un hilo de fondo las agrupa durante
+una ventana corta (p. ej. 2 ms o 256 elementos). Cada lote se aplica con una
+sola transacción y un solo commit; después se resuelve el Future de cada
+llamante con su propio resultado.
+"""
+import queue
+import threading
+import time
+import logging
+from collections import namedtuple
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+DepositRequest = namedtuple('DepositRequest', ['account_id', 'amount', 'description', 'future'])
+
+
+class DepositBatcher:
+    """Agrupa depósitos y los entrega a apply_batch(requests) -> lista de resultados.
+
+    apply_batch recibe la lista de DepositRequest en orden de llegada y debe
+    devolver un resultado por petición, en el mismo orden. Si lanza una
+    excepción, todas las peticiones del lote la reciben.
+    """
+
+    def __init__(self, apply_batch, window=0.002, max_items=256):
+        self._apply_batch = apply_batch
+        self.window = window
+        self.max_items = max_items
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, account_id, amount, description=""):
+        """Encola un depósito y devuelve un Future con su resultado."""
+        if self._closed:
+            raise RuntimeError("DepositBatcher is closed")
+        self._ensure_worker()
+        future = Future()
+        self._queue.put(DepositRequest(account_id, amount, description, future))
+        return future
+
+    def close(self, timeout=None):
+        """Procesa lo pendiente y detiene el hilo de fondo."""
+        self._closed = True
+        self._queue.put(None)
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "average_batch_size": self.items / self.batches if self.batches else 0.0
+        }
+
+    def _ensure_worker(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name='deposit-group-commit', daemon=True
+                    )
+                    self._thread.start()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_items:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if request is None:
+                # Reencolar la señal de cierre para salir tras este lote
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = self._collect(first)
+            self.batches += 1
+            self.items += len(batch)
+            try:
+                results = self._apply_batch(batch)
+            except Exception as e:
+                logger.error(f"Deposit batch of {len(batch)} failed: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            for request, result in zip(batch, results):
+                request.future.set_result(result)
@@ -0,0 +1,68 @@
+# controllers/history.py
+"""
+Consulta del historial de transacciones de una cuenta.
+
+En lugar de filtrar con from_account_id = X OR to_account_id = X y ordenar
+todo el resultado, la consulta se parte en dos ramas: los cargos (from) y los
+abonos (to). Cada rama recorre su índice compuesto (cuenta, created_at DESC,
+id DESC) ya en orden y se corta en el LIMIT, y el UNION ALL solo ordena esas
+dos ramas cortas. El coste depende del tamaño de página, no del histórico.
+
+Una transacción de la cuenta consigo misma aparecería en ambas ramas, así que
+la rama de abonos excluye las filas cuyo origen es la propia cuenta.
+"""
+from sqlalchemy import desc, tuple_
+from models.transaction import Transaction
+
+
+def _query(session, columns):
+    # Con columns se seleccionan tuplas (ver controllers/projections.py) en vez de objetos
+    return session.query(*columns) if columns else session.query(Transaction)
+
+
+def _branch(session, columns, limit, before, *criteria):
+    # Todos los filtros van antes de order_by/limit: Query no admite filter() tras limit()
+    query = _query(session, columns).filter(*criteria)
+    if before is not None:
+        query = query.filter(tuple_(Transaction.created_at, Transaction.id) < before)
+    return query.order_by(desc(Transaction.created_at), desc(Transaction.id)).limit(limit)
+
+
+def account_history(session, account_id, limit, before=None, offset=0, columns=None):
+    """Hasta limit transacciones de la cuenta, de la más reciente a la más antigua.
+
+    before: clave (created_at, id) exclusiva desde la que continuar (keyset).
+    offset: compatibilidad con la paginación clásica; cada rama tiene que
+    leer offset + limit filas, así que solo conviene para páginas cercanas.
+    """
+    branch_limit = offset + limit
+    debits = _branch(session, columns, branch_limit, before, Transaction.from_account_id == account_id)
+    credits = _branch(
+        session, columns, branch_limit, before,
+        Transaction.to_account_id == account_id,
+        Transaction.from_account_id.is_distinct_from(account_id)
+    )
+    query = debits.union_all(credits).order_by(
+        desc(Transaction.created_at), desc(Transaction.id)
+    ).limit(limit)
+    if offset:
+        query = query.offset(offset)
+    return query.all()
+
+
+def account_history_stream(session, account_id, batch_size=1000, columns=None):
+    """Todo el historial de la cuenta en orden cronológico, leído por lotes.
+
+    yield_per activa un cursor del lado del servidor: las filas llegan de
+    batch_size en batch_size y las ya consumidas se pueden liberar. Las dos
+    ramas salen ordenadas de sus índices y el planner las mezcla (Merge
+    Append) sin ordenar el historial completo.
+    """
+    debits = _query(session, columns).filter(Transaction.from_account_id == account_id)
+    credits = _query(session, columns).filter(
+        Transaction.to_account_id == account_id,
+        Transaction.from_account_id.is_distinct_from(account_id)
+    )
+    return debits.union_all(credits).order_by(
+        Transaction.created_at, Transaction.id
+    ).yield_per(batch_size)
@@ -0,0 +1,193 @@
+# controllers/ledger.py
+"""
+Libro mayor append-only.
+
+Cada movimiento inserta un asiento inmutable en ledger_postings; el saldo de
+una cuenta es su último snapshot (o accounts.balance como saldo de apertura)
+más la suma de los asientos posteriores. LedgerCompactor escribe snapshots
+nuevos en segundo plano para que ese rango de asientos siga siendo corto.
+
+Coordinación con el compactador: quien inserta asientos toma un advisory lock
+compartido de la cuenta (no se bloquean entre sí) y el compactador lo toma en
+exclusiva, de modo que un snapshot nunca omite un asiento aún sin confirmar.
+"""
+import threading
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import text, bindparam
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from models.ledger import LedgerPosting, BalanceSnapshot
+
+logger = logging.getLogger(__name__)
+
+_UUID = PG_UUID(as_uuid=True)
+
+_LOCK_SHARED_SQL = text(
+    "SELECT pg_advisory_xact_lock_shared(hashtextextended(CAST(:account_id AS text), 0))"
+).bindparams(bindparam('account_id', type_=_UUID))
+
+_LOCK_EXCLUSIVE_SQL = text(
+    "SELECT pg_advisory_xact_lock(hashtextextended(CAST(:account_id AS text), 0))"
+).bindparams(bindparam('account_id', type_=_UUID))
+
+_BALANCE_SQL = text("""
+    WITH snap AS (
+        SELECT balance, posting_id FROM balance_snapshots
+         WHERE account_id = :account_id
+         ORDER BY posting_id DESC LIMIT 1
+    )
+    SELECT COALESCE((SELECT balance FROM snap), :opening)
+         + COALESCE((SELECT SUM(amount) FROM ledger_postings
+                      WHERE account_id = :account_id
+                        AND id > COALESCE((SELECT posting_id FROM snap), 0)), 0)
+""").bindparams(bindparam('account_id', type_=_UUID))
+
+_BALANCE_AS_OF_SQL = text("""
+    WITH snap AS (
+        SELECT balance, posting_id FROM balance_snapshots
+         WHERE account_id = :account_id AND covered_at <= :as_of
+         ORDER BY posting_id DESC LIMIT 1
+    )
+    SELECT COALESCE((SELECT balance FROM snap), :opening)
+         + COALESCE((SELECT SUM(amount) FROM ledger_postings
+                      WHERE account_id = :account_id
+                        AND id > COALESCE((SELECT posting_id FROM snap), 0)
+                        AND created_at <= :as_of), 0)
+""").bindparams(bindparam('account_id', type_=_UUID))
+
+_PENDING_SQL = text("""
+    SELECT COALESCE(SUM(amount), 0) AS delta, MAX(id) AS last_id, MAX(created_at) AS covered_at
+      FROM ledger_postings
+     WHERE account_id = :account_id AND id > :after_id
+""").bindparams(bindparam('account_id', type_=_UUID))
+
+_ACTIVITY_SQL = text("""
+    SELECT account_id, COUNT(*) AS postings, MAX(id) AS last_id
+      FROM ledger_postings
+     WHERE id > :after_id AND created_at <= :cutoff
+     GROUP BY account_id
+""")
+
+
+def post(session, account_id, amount, transaction_code):
+    """Insertar un asiento (amount con signo) para la cuenta."""
+    session.execute(_LOCK_SHARED_SQL, {"account_id": account_id})
+    session.add(LedgerPosting(
+        account_id=account_id,
+        transaction_code=transaction_code,
+        amount=amount
+    ))
+
+
+def balance(session, account):
+    """Saldo actual: último snapshot + asientos posteriores."""
+    session.flush()
+    return session.execute(_BALANCE_SQL, {
+        "account_id": account.id,
+        "opening": account.balance or Decimal('0.00')
+    }).scalar()
+
+
+def balance_as_of(session, account, as_of):
+    """Saldo al instante as_of: búsqueda del snapshot por índice + suma acotada de asientos."""
+    if account.created_at and as_of < account.created_at:
+        return Decimal('0.00')
+    return session.execute(_BALANCE_AS_OF_SQL, {
+        "account_id": account.id,
+        "opening": account.balance or Decimal('0.00'),
+        "as_of": as_of
+    }).scalar()
+
+
+def snapshot_account(session, account):
+    """Escribir un snapshot que incluya todos los asientos confirmados de la cuenta.
+
+    Devuelve el BalanceSnapshot creado, o None si no había asientos nuevos.
+    """
+    session.execute(_LOCK_EXCLUSIVE_SQL, {"account_id": account.id})
+    latest = session.query(BalanceSnapshot).filter(
+        BalanceSnapshot.account_id == account.id
+    ).order_by(BalanceSnapshot.posting_id.desc()).first()
+
+    base = latest.balance if latest else (account.balance or Decimal('0.00'))
+    after_id = latest.posting_id if latest else 0
+    pending = session.execute(_PENDING_SQL, {"account_id": account.id, "after_id": after_id}).first()
+    if pending.last_id is None:
+        return None
+
+    snapshot = BalanceSnapshot(
+        account_id=account.id,
+        posting_id=pending.last_id,
+        balance=base + pending.delta,
+        covered_at=pending.covered_at,
+        created_at=datetime.utcnow()
+    )
+    session.add(snapshot)
+    return snapshot
+
+
+class LedgerCompactor:
+    """Hilo de fondo que escribe snapshots para las cuentas con muchos asientos nuevos.
+
+    Solo consulta los asientos posteriores a la última marca vista, así que
+    cada ciclo cuesta proporcional a la actividad reciente y no al histórico.
+
+    Los ids de ledger_postings se asignan al insertar, no al confirmar: un
+    asiento con id menor puede hacerse visible después de otro con id mayor.
+    Por eso la marca solo avanza sobre asientos creados hace más de `lag`
+    segundos, que debe superar la duración máxima de una transacción (más el
+    desfase de reloj entre servidores, created_at lo pone la aplicación).
+    """
+
+    def __init__(self, session_factory, account_loader, interval=60.0, min_postings=100, lag=30.0):
+        self._session_factory = session_factory
+        self._account_loader = account_loader
+        self.interval = interval
+        self.min_postings = min_postings
+        self.lag = lag
+        self._watermark = 0
+        self._pending = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self.snapshots_written = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='ledger-compactor', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def run_once(self):
+        """Un ciclo de compactación; devuelve el número de snapshots escritos."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.lag)
+        with self._session_factory() as session:
+            for row in session.execute(_ACTIVITY_SQL, {"after_id": self._watermark, "cutoff": cutoff}):
+                self._pending[row.account_id] = self._pending.get(row.account_id, 0) + row.postings
+                self._watermark = max(self._watermark, row.last_id)
+
+        due = [account_id for account_id, count in self._pending.items() if count >= self.min_postings]
+        written = 0
+        for account_id in due:
+            # Una transacción corta por cuenta: el lock exclusivo se libera enseguida
+            with self._session_factory() as session:
+                account = self._account_loader(session, account_id)
+                if account is not None and snapshot_account(session, account) is not None:
+                    written += 1
+            self._pending.pop(account_id, None)
+
+        self.snapshots_written += written
+        return written
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                written = self.run_once()
+                if written:
+                    logger.info(f"Ledger compactor wrote {written} snapshots")
+            except Exception as e:
+                logger.error(f"Ledger compaction failed: {e}")
@@ -0,0 +1,48 @@
+# controllers/projections.py
+"""
+Proyecciones de solo lectura para los endpoints de listado.
+
+Cada proyección fija las columnas que se seleccionan (como tuplas, sin
+hidratar objetos ORM ni sus relaciones) y un codificador precompilado que
+produce exactamente el mismo dict que el to_dict() del modelo.
+"""
+from database.projection import compile_row_encoder, AS_IS, STR, ISO, FLOAT
+from models.transaction import Transaction
+from models.account import Account
+
+
+class Projection:
+    """Columnas a seleccionar + codificador de fila; extra son columnas auxiliares al final."""
+
+    def __init__(self, name, fields, extra=()):
+        self.columns = [column for _, column, _ in fields] + list(extra)
+        self.encode = compile_row_encoder([(key, conversion) for key, _, conversion in fields], name)
+
+    def query(self, session):
+        return session.query(*self.columns)
+
+
+TRANSACTION = Projection('encode_transaction', [
+    ('id', Transaction.id, STR),
+    ('transaction_code', Transaction.transaction_code, AS_IS),
+    ('from_account_id', Transaction.from_account_id, STR),
+    ('to_account_id', Transaction.to_account_id, STR),
+    ('amount', Transaction.amount, FLOAT),
+    ('transaction_type', Transaction.transaction_type, AS_IS),
+    ('description', Transaction.description, AS_IS),
+    ('status', Transaction.status, AS_IS),
+    ('created_at', Transaction.created_at, ISO),
+])
+
+# balance_slots no forma parte del dict: decide si hay que sumar sub-saldos
+ACCOUNT = Projection('encode_account', [
+    ('id', Account.id, STR),
+    ('account_number', Account.account_number, AS_IS),
+    ('user_id', Account.user_id, STR),
+    ('account_type', Account.account_type, AS_IS),
+    ('balance', Account.balance, FLOAT),
+    ('currency', Account.currency, AS_IS),
+    ('status', Account.status, AS_IS),
+    ('created_at', Account.created_at, ISO),
+    ('updated_at', Account.updated_at, ISO),
+], extra=[Account.balance_slots])
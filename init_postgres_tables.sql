@@ -26,11 +26,45 @@ CREATE TABLE IF NOT EXISTS transactions (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Versión de la cuenta para ETag / If-None-Match (database/etag.py): el
+-- trigger la incrementa en cada UPDATE que cambia la fila. Toda transacción
+-- actualiza el saldo de sus cuentas, así que también cubre el historial.
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION bump_account_version() RETURNS trigger AS $$
+BEGIN
+    NEW.version := OLD.version + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_accounts_version ON accounts;
+CREATE TRIGGER trg_accounts_version
+    BEFORE UPDATE ON accounts
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION bump_account_version();
+
+-- Respuestas guardadas por Idempotency-Key (database/idempotency.py).
+-- status_code NULL = petición en curso; expires_at es entonces una reserva
+-- corta y, con la respuesta guardada, el TTL completo.
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR(512) PRIMARY KEY,
+    fingerprint VARCHAR(64) NOT NULL,
+    status_code INTEGER,
+    response_body TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
 -- Índices para mejor performance
 CREATE INDEX IF NOT EXISTS idx_accounts_owner ON accounts(owner_id);
-CREATE INDEX IF NOT EXISTS idx_transactions_from ON transactions(from_account_id);
-CREATE INDEX IF NOT EXISTS idx_transactions_to ON transactions(to_account_id);
+-- Historial por cuenta: una rama por índice, leída en orden y cortada en el LIMIT
+CREATE INDEX IF NOT EXISTS idx_transactions_from_created ON transactions(from_account_id, created_at DESC, transaction_id DESC);
+CREATE INDEX IF NOT EXISTS idx_transactions_to_created ON transactions(to_account_id, created_at DESC, transaction_id DESC);
+DROP INDEX IF EXISTS idx_transactions_from;
+DROP INDEX IF EXISTS idx_transactions_to;
 CREATE INDEX IF NOT EXISTS idx_transactions_created ON transactions(created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires ON idempotency_keys(expires_at);
 
 -- Mostrar estructura
 SELECT '=== ESTRUCTURA DE TABLAS ===' as info;
@@ -2,7 +2,7 @@
 import uuid
 from datetime import datetime
 from decimal import Decimal
-from sqlalchemy import Column, String, Boolean, DateTime, DECIMAL, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, DECIMAL, ForeignKey, Integer
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from database.db_manager import Base
@@ -17,6 +17,7 @@ class Account(Base):
     balance = Column(DECIMAL(15, 2), default=Decimal('0.00'))
     currency = Column(String(3), default='USD')
     status = Column(String(20), default='active')  # active, suspended, closed
+    balance_slots = Column(Integer, nullable=False, default=0, server_default='0')  # 0 = sin striping
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -0,0 +1,21 @@
+# models/account_balance_slot.py
+from decimal import Decimal
+from sqlalchemy import Column, SmallInteger, DECIMAL, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from database.db_manager import Base
+
+class AccountBalanceSlot(Base):
+    """Sub-saldo de una cuenta con saldo repartido (striping).
+
+    El saldo reportado de la cuenta es accounts.balance + la suma de sus slots.
+    Los abonos caen en un único slot, así que abonos concurrentes a la misma
+    cuenta no compiten por el mismo lock de fila.
+    """
+    __tablename__ = 'account_balance_slots'
+    
+    account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.id', ondelete='CASCADE'), primary_key=True)
+    slot = Column(SmallInteger, primary_key=True)
+    balance = Column(DECIMAL(15, 2), nullable=False, default=Decimal('0.00'))
+    
+    def __repr__(self):
+        return f"<AccountBalanceSlot {self.account_id}#{self.slot} {self.balance}>"
@@ -0,0 +1,23 @@
+# models/bank_stats.py
+from datetime import datetime
+from decimal import Decimal
+from sqlalchemy import Column, SmallInteger, BigInteger, DECIMAL, DateTime
+from database.db_manager import Base
+
+class BankStats(Base):
+    """Una fila de los contadores globales del banco (ver database/bank_stats.py).
+
+    Los totales son la suma de todas las filas; cada escritura actualiza una
+    sola fila elegida al azar.
+    """
+    __tablename__ = 'bank_stats'
+    
+    slot = Column(SmallInteger, primary_key=True)
+    users = Column(BigInteger, nullable=False, default=0)
+    accounts = Column(BigInteger, nullable=False, default=0)
+    transactions = Column(BigInteger, nullable=False, default=0)
+    total_balance = Column(DECIMAL(20, 2), nullable=False, default=Decimal('0.00'))
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<BankStats #{self.slot}>"
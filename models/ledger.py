@@ -0,0 +1,41 @@
+# models/ledger.py
+from datetime import datetime
+from sqlalchemy import Column, BigInteger, String, DateTime, DECIMAL, ForeignKey, Index
+from sqlalchemy.dialects.postgresql import UUID
+from database.db_manager import Base
+
+class LedgerPosting(Base):
+    """Asiento inmutable del libro mayor: importe con signo (+ abono, - cargo)."""
+    __tablename__ = 'ledger_postings'
+    
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.id'), nullable=False)
+    transaction_code = Column(String(50), nullable=False)
+    amount = Column(DECIMAL(15, 2), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_ledger_postings_account_id', 'account_id', 'id'),
+        Index('idx_ledger_postings_account_created', 'account_id', 'created_at'),
+    )
+    
+    def __repr__(self):
+        return f"<LedgerPosting {self.id} {self.account_id} {self.amount}>"
+
+
+class BalanceSnapshot(Base):
+    """Saldo materializado de una cuenta que incluye todos los asientos hasta posting_id."""
+    __tablename__ = 'balance_snapshots'
+    
+    account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.id'), primary_key=True)
+    posting_id = Column(BigInteger, primary_key=True)
+    balance = Column(DECIMAL(15, 2), nullable=False)
+    covered_at = Column(DateTime, nullable=False)  # created_at del último asiento incluido
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index('idx_balance_snapshots_account_covered', 'account_id', 'covered_at'),
+    )
+    
+    def __repr__(self):
+        return f"<BalanceSnapshot {self.account_id}@{self.posting_id} {self.balance}>"
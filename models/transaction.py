@@ -1,46 +1,43 @@
-# models/account.py
+# models/transaction.py
 import uuid
 from datetime import datetime
-from decimal import Decimal
-from sqlalchemy import Column, String, Boolean, DateTime, DECIMAL, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, DateTime, DECIMAL, ForeignKey, Text, Index
 from sqlalchemy.dialects.postgresql import UUID
 from database.db_manager import Base
 
-class Account(Base):
-    __tablename__ = 'accounts'
-    
+class Transaction(Base):
+    __tablename__ = 'transactions'
+
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    account_number = Column(String(20), unique=True, nullable=False)
-    user_id = Column(UUID(as_uuid=True), ForeignKey('users.id'), nullable=False)
-    account_type = Column(String(20), nullable=False)  # checking, savings, business
-    balance = Column(DECIMAL(15, 2), default=Decimal('0.00'))
-    currency = Column(String(3), default='USD')
-    status = Column(String(20), default='active')  # active, suspended, closed
+    transaction_code = Column(String(50), unique=True, nullable=False)
+    from_account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.id'), nullable=True)
+    to_account_id = Column(UUID(as_uuid=True), ForeignKey('accounts.id'), nullable=True)
+    amount = Column(DECIMAL(15, 2), nullable=False)
+    transaction_type = Column(String(20), nullable=False)  # deposit, withdrawal, transfer, payment
+    description = Column(Text)
+    status = Column(String(20), default='completed')  # pending, completed, failed, cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    
-    # Relaciones
-    user = relationship("User", backref="accounts")
-    sent_transactions = relationship("Transaction", 
-                                     foreign_keys="Transaction.from_account_id",
-                                     backref="from_account")
-    received_transactions = relationship("Transaction",
-                                        foreign_keys="Transaction.to_account_id",
-                                        backref="to_account")
-    
+
+    # Historial por cuenta: cada rama (cargos / abonos) se lee ya ordenada del índice
+    __table_args__ = (
+        Index('idx_transactions_from_created', from_account_id, created_at.desc(), id.desc()),
+        Index('idx_transactions_to_created', to_account_id, created_at.desc(), id.desc()),
+    )
+
+    # Las relaciones from_account / to_account se definen como backref en Account
+
     def __repr__(self):
-        return f"<Account {self.account_number} ({self.account_type})>"
-    
+        return f"<Transaction {self.transaction_code} ({self.transaction_type})>"
+
     def to_dict(self):
         return {
             'id': str(self.id),
-            'account_number': self.account_number,
-            'user_id': str(self.user_id),
-            'account_type': self.account_type,
-            'balance': float(self.balance) if self.balance else 0.0,
-            'currency': self.currency,
+            'transaction_code': self.transaction_code,
+            'from_account_id': str(self.from_account_id) if self.from_account_id else None,
+            'to_account_id': str(self.to_account_id) if self.to_account_id else None,
+            'amount': float(self.amount) if self.amount else 0.0,
+            'transaction_type': self.transaction_type,
+            'description': self.description,
             'status': self.status,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+            'created_at': self.created_at.isoformat() if self.created_at else None
         }
@@ -0,0 +1,109 @@
+"""
+Tests de la aplicación Flask de api/app.py (blueprints registrados)
+
+Las peticiones que leen la base de datos necesitan PostgreSQL
+(TEST_DATABASE_URL, esquema UUID de db_manager.init_db()); si no está, se omiten.
+"""
+
+import unittest
+import os
+import sys
+import uuid
+from unittest import mock
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+os.environ.setdefault('JWT_SECRET', 'test-secret-for-api-app-tests-0123456789')
+
+try:
+    from api.app import app
+    from api.middleware.auth import generate_token
+    from controllers.bank_controller import BankController
+except ImportError as e:
+    app = None
+    MISSING = f'missing dependency: {e.name}'
+else:
+    MISSING = None
+
+
+def new_user():
+    suffix = uuid.uuid4().hex[:10]
+    result, _ = BankController.create_user(f'user_{suffix}', f'{suffix}@test.com', 'hash', 'Test', 'User')
+    return result['user']['id'], f'user_{suffix}'
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestEventRoutes(unittest.TestCase):
+    """Tests para /api/events en la app de api/app.py"""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_requires_token(self):
+        """Test: sin token el stream responde 401"""
+        response = self.client.get('/api/events')
+        self.assertEqual(response.status_code, 401)
+
+    @unittest.skipUnless(TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+    def test_stream_opens(self):
+        """Test: con token (?token= para EventSource) se abre el stream SSE"""
+        user_id, username = new_user()
+        response = self.client.get(f'/api/events?token={generate_token(user_id, username)}', buffered=False)
+        try:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.mimetype, 'text/event-stream')
+        finally:
+            response.close()
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestInternalRoutes(unittest.TestCase):
+    """Tests para /api/internal/* en la app de api/app.py"""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_requires_token(self):
+        """Test: los endpoints internos piden token"""
+        for path in ('/api/internal/pool', '/api/internal/queries'):
+            self.assertIn(self.client.get(path).status_code, (401, 403, 404))
+
+    @mock.patch.dict(os.environ, {'INTERNAL_API_TOKEN': 'internal-test-token'})
+    def test_user_token_is_rejected(self):
+        """Test: el token de un usuario no basta para /api/internal/pool ni /api/internal/queries"""
+        headers = {'Authorization': f'Bearer {generate_token(str(uuid.uuid4()), "someone")}'}
+        for path in ('/api/internal/pool', '/api/internal/queries'):
+            self.assertEqual(self.client.get(path, headers=headers).status_code, 403)
+            self.assertEqual(self.client.get(path, headers={**headers, 'X-Internal-Token': 'wrong'}).status_code, 403)
+
+    def test_pool_hidden_without_internal_token(self):
+        """Test: sin INTERNAL_API_TOKEN configurado el endpoint no existe"""
+        with mock.patch.dict(os.environ):
+            os.environ.pop('INTERNAL_API_TOKEN', None)
+            response = self.client.get('/api/internal/pool', headers={'X-Internal-Token': ''})
+        self.assertEqual(response.status_code, 404)
+
+    @unittest.skipUnless(TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+    @mock.patch.dict(os.environ, {'INTERNAL_API_TOKEN': 'internal-test-token'})
+    def test_pool_and_queries(self):
+        """Test: estado del pool y métricas SQL por endpoint a través del test client"""
+        new_user()
+        headers = {'X-Internal-Token': 'internal-test-token'}
+
+        response = self.client.get('/api/internal/pool', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('primary', response.get_json()['pools'])
+
+        response = self.client.get('/api/internal/queries', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('endpoints', response.get_json())
+
+
+if __name__ == '__main__':
+    unittest.main()
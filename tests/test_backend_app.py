@@ -0,0 +1,240 @@
+"""
+Tests de la aplicación Flask de backend/app.py (esquema SERIAL de init_postgres_tables.sql)
+
+Necesitan PostgreSQL con ese esquema en TEST_SERIAL_DATABASE_URL (distinto del
+esquema UUID de TEST_DATABASE_URL); si no está, se omiten.
+"""
+
+import unittest
+import os
+import sys
+import time
+import uuid
+import datetime
+from unittest import mock
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+TEST_SERIAL_DATABASE_URL = os.getenv('TEST_SERIAL_DATABASE_URL')
+os.environ.setdefault('SECRET_KEY', 'test-secret-for-backend-app-tests-0123456789')
+
+MISSING = None if TEST_SERIAL_DATABASE_URL else 'TEST_SERIAL_DATABASE_URL is not set'
+if not MISSING:
+    try:
+        import jwt
+        from werkzeug.test import EnvironBuilder
+        # backend/app.py lee DATABASE_URL al importarse; el resto de tests usa el esquema UUID
+        previous = os.environ.get('DATABASE_URL')
+        os.environ['DATABASE_URL'] = TEST_SERIAL_DATABASE_URL
+        try:
+            import app as backend_app
+        finally:
+            if previous is None:
+                os.environ.pop('DATABASE_URL')
+            else:
+                os.environ['DATABASE_URL'] = previous
+    except ImportError as e:
+        MISSING = f'missing dependency: {e.name}'
+
+
+class BackendAppCase(unittest.TestCase):
+    """Usuario con token, una cuenta origen con saldo 100 y una cuenta destino de otro usuario"""
+
+    def setUp(self):
+        self.client = backend_app.app.test_client()
+        self.user_id, self.headers = self.new_user()
+        self.source = self.new_account(self.user_id, 100)
+        self.target = self.new_account(self.new_user()[0], 0)
+
+    def new_user(self):
+        suffix = uuid.uuid4().hex[:10]
+        with backend_app.db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                'INSERT INTO users (username, password_hash, email) VALUES (%s, %s, %s) RETURNING user_id',
+                (f'user_{suffix}', 'hash', f'{suffix}@test.com')
+            )
+            user_id = cur.fetchone()['user_id']
+            conn.commit()
+        token = jwt.encode({
+            'user_id': user_id,
+            'username': f'user_{suffix}',
+            'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)
+        }, backend_app.app.config['SECRET_KEY'])
+        return user_id, {'Authorization': f'Bearer {token}'}
+
+    def new_account(self, owner_id, balance):
+        with backend_app.db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO accounts (owner_id, account_type, balance) VALUES (%s, 'Ahorros', %s) "
+                "RETURNING account_number",
+                (owner_id, balance)
+            )
+            account_number = cur.fetchone()['account_number']
+            conn.commit()
+        return account_number
+
+    def balance(self, account_number):
+        with backend_app.db_connection() as conn:
+            cur = conn.cursor()
+            cur.execute('SELECT balance FROM accounts WHERE account_number = %s', (account_number,))
+            return float(cur.fetchone()['balance'])
+
+    def transfer(self, amount, **headers):
+        return self.client.post('/api/transfer', headers=dict(self.headers, **headers), json={
+            'from_account': self.source, 'to_account': self.target, 'amount': amount
+        })
+
+    def poll(self, status_url, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            response = self.client.get(status_url, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            if response.get_json()['status'] in ('completed', 'failed'):
+                return response.get_json()
+            time.sleep(0.01)
+        self.fail(f'{status_url} did not finish')
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestTransferEndpoint(BackendAppCase):
+    """Tests para /api/transfer y /api/transfers/<job_id>"""
+
+    def test_sync_transfer(self):
+        """Test: sin Prefer la transferencia se hace en la petición"""
+        response = self.transfer(40)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.get_json()['transaction']['transaction_id'])
+        self.assertEqual((self.balance(self.source), self.balance(self.target)), (60.0, 40.0))
+
+    def test_async_transfer_is_queued_and_polled(self):
+        """Test: con Prefer: respond-async se responde 202 y el estado se consulta en status_url"""
+        response = self.transfer(40, Prefer='respond-async')
+        self.assertEqual(response.status_code, 202)
+        body = response.get_json()
+        self.assertEqual(response.headers['Location'], body['status_url'])
+
+        job = self.poll(body['status_url'])
+        self.assertEqual((job['status'], job['status_code']), ('completed', 200))
+        self.assertEqual(job['result']['transaction']['amount'], 40)
+        self.assertEqual((self.balance(self.source), self.balance(self.target)), (60.0, 40.0))
+
+        # Otro usuario no ve el trabajo
+        _, other = self.new_user()
+        self.assertEqual(self.client.get(body['status_url'], headers=other).status_code, 404)
+
+    def test_async_transfer_insufficient_funds(self):
+        """Test: el error de negocio queda en el estado del trabajo"""
+        job = self.poll(self.transfer(500, Prefer='respond-async').get_json()['status_url'])
+        self.assertEqual((job['status'], job['status_code']), ('completed', 400))
+        self.assertEqual(self.balance(self.source), 100.0)
+
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestAccountEndpoint(BackendAppCase):
+    """Tests para /api/accounts/<account_number> (ETag con accounts.version)"""
+
+    def get(self, account_number, **headers):
+        return self.client.get(f'/api/accounts/{account_number}', headers=dict(self.headers, **headers))
+
+    def test_not_modified_until_account_changes(self):
+        """Test: 304 con el mismo ETag; una transferencia cambia la versión y el ETag"""
+        first = self.get(self.source)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()['account']['balance'], 100)
+        etag = first.headers['ETag']
+
+        cached = self.get(self.source, **{'If-None-Match': etag})
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.get_data(), b'')
+
+        self.assertEqual(self.transfer(10).status_code, 200)
+        changed = self.get(self.source, **{'If-None-Match': etag})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers['ETag'], etag)
+        self.assertEqual(changed.get_json()['account']['balance'], 90)
+
+    def test_other_users_account(self):
+        """Test: la cuenta de otro usuario no existe para este usuario"""
+        self.assertEqual(self.get(self.target).status_code, 404)
+        self.assertEqual(self.get(0).status_code, 404)
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestInternalPoolEndpoint(BackendAppCase):
+    """Tests para /api/internal/pool (solo con el token interno)"""
+
+    def test_user_token_is_rejected(self):
+        """Test: con el JWT de un usuario cualquiera se responde 403"""
+        with mock.patch.dict(os.environ, {'INTERNAL_API_TOKEN': 'internal-test-token'}):
+            response = self.client.get('/api/internal/pool', headers=self.headers)
+        self.assertEqual(response.status_code, 403)
+
+    def test_internal_token(self):
+        """Test: con X-Internal-Token se devuelven las estadísticas del pool"""
+        with mock.patch.dict(os.environ, {'INTERNAL_API_TOKEN': 'internal-test-token'}):
+            response = self.client.get('/api/internal/pool', headers={'X-Internal-Token': 'internal-test-token'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('primary', response.get_json()['pools'])
+
+    def test_disabled_without_token(self):
+        """Test: sin INTERNAL_API_TOKEN configurado el endpoint responde 404"""
+        with mock.patch.dict(os.environ):
+            os.environ.pop('INTERNAL_API_TOKEN', None)
+            response = self.client.get('/api/internal/pool', headers=self.headers)
+        self.assertEqual(response.status_code, 404)
+
+@unittest.skipIf(MISSING, MISSING)
+class TestExportEndpoint(BackendAppCase):
+    """Tests para /api/transactions/export (conexiones del pool)"""
+
+    def export(self):
+        """Llamada WSGI directa: devuelve el iterable sin consumirlo, como lo recibe el servidor"""
+        environ = EnvironBuilder(
+            path='/api/transactions/export', query_string={'account': self.source}, headers=self.headers
+        ).get_environ()
+        started = []
+        body = backend_app.app(environ, lambda status, headers, exc_info=None: started.append(status))
+        self.assertEqual(started, ['200 OK'])
+        return body
+
+    def in_use(self):
+        # Huecos del pool ocupados: una conexión perdida sin close() sigue contando en size
+        stats = backend_app.db_pool.stats()
+        return stats['size'] - stats['idle']
+
+    def test_unread_response_holds_no_connection(self):
+        """Test: una respuesta que nunca se itera no deja una conexión prestada"""
+        before = self.in_use()
+        body = self.export()
+        self.assertEqual(self.in_use(), before)
+        body.close()
+        self.assertEqual(self.in_use(), before)
+
+    def test_disconnect_mid_stream_releases_connection(self):
+        """Test: si el cliente corta a mitad, la conexión vuelve al pool"""
+        self.transfer(1)
+        self.transfer(2)
+        before = self.in_use()
+        body = self.export()
+        next(iter(body))
+        self.assertEqual(self.in_use(), before + 1)
+        body.close()
+        self.assertEqual(self.in_use(), before)
+
+    def test_full_export(self):
+        """Test: la exportación completa tiene una línea por transacción"""
+        self.transfer(1)
+        self.transfer(2)
+        body = self.export()
+        self.assertEqual(len(b''.join(body).splitlines()), 2)
+        body.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Tests para database/conn_pool.py (pool de conexiones DB-API)
+"""
+
+import unittest
+import os
+import sys
+import gc
+import time
+import threading
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.conn_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """Conexión DB-API mínima que registra rollbacks y cierres"""
+
+    def __init__(self, number):
+        self.number = number
+        self.closed = 0
+        self.rollbacks = 0
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = 1
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Tests para ConnectionPool"""
+
+    def setUp(self):
+        self.opened = []
+        self.clock = FakeClock()
+        self.pings = []
+
+    def connect(self):
+        conn = FakeConnection(len(self.opened))
+        self.opened.append(conn)
+        return conn
+
+    def make_pool(self, **kwargs):
+        kwargs.setdefault('ping', self.pings.append)
+        kwargs.setdefault('clock', self.clock)
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_reuses_connections(self):
+        """Test: close() devuelve la conexión (con rollback) y se reutiliza"""
+        pool = self.make_pool(max_size=2)
+        conn = pool.acquire()
+        first = conn.number
+        conn.close()
+        self.assertEqual(self.opened[0].rollbacks, 1)
+        with pool.connection() as again:
+            self.assertEqual(again.number, first)
+        self.assertEqual(len(self.opened), 1)
+        self.assertEqual(pool.stats()['connects'], 1)
+        self.assertEqual(pool.stats()['acquired'], 2)
+
+    def test_timeout_when_exhausted(self):
+        """Test: sin huecos libres acquire() espera y lanza PoolTimeoutError"""
+        pool = self.make_pool(max_size=1, clock=time.monotonic)
+        held = pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire(timeout=0.05)
+        self.assertEqual(pool.stats()['timeouts'], 1)
+        held.close()
+
+    def test_waiter_gets_released_connection(self):
+        """Test: una conexión devuelta despierta a quien espera"""
+        pool = self.make_pool(max_size=1, clock=time.monotonic)
+        held = pool.acquire()
+        got = []
+        waiter = threading.Thread(target=lambda: got.append(pool.acquire(timeout=2)))
+        waiter.start()
+        held.close()
+        waiter.join()
+        self.assertEqual(got[0].number, 0)
+        got[0].close()
+
+    def test_context_manager_returns_on_error(self):
+        """Test: connection() devuelve la conexión aunque el bloque falle"""
+        pool = self.make_pool(max_size=1)
+        with self.assertRaises(RuntimeError):
+            with pool.connection():
+                raise RuntimeError('boom')
+        self.assertEqual(pool.stats()['in_use'], 0)
+        self.assertEqual(pool.stats()['idle'], 1)
+
+    def test_health_check_and_lifetime(self):
+        """Test: las ociosas se comprueban y las que fallan o caducan se sustituyen"""
+        def ping(conn):
+            raise OSError('server closed the connection')
+        pool = self.make_pool(health_check_after=10, max_lifetime=100, ping=ping)
+        pool.acquire().close()
+        self.clock.now = 11
+        with self.assertLogs('database.conn_pool', level='WARNING'):
+            with pool.connection() as conn:
+                self.assertEqual(conn.number, 1)
+        self.assertTrue(self.opened[0].closed)
+        self.assertEqual(pool.stats()['health_check_failures'], 1)
+
+        pool = self.make_pool(health_check_after=None, max_lifetime=100)
+        pool.acquire().close()
+        self.clock.now = 200
+        with pool.connection() as conn:
+            self.assertEqual(conn.number, 3)
+
+    def test_leak_detection(self):
+        """Test: leaks() señala las retenidas y un proxy olvidado libera su hueco"""
+        pool = self.make_pool(max_size=1, leak_timeout=30)
+        conn = pool.acquire()
+        self.clock.now = 31
+        leaks = pool.leaks()
+        self.assertEqual(len(leaks), 1)
+        self.assertIn('test_leak_detection', leaks[0]['stack'])
+
+        with self.assertLogs('database.conn_pool', level='WARNING'):
+            del conn
+            gc.collect()
+        stats = pool.stats()
+        self.assertEqual((stats['in_use'], stats['size'], stats['leaks_reclaimed']), (0, 0, 1))
+        pool.acquire().close()
+
+    def test_fill_and_idle_trim(self):
+        """Test: fill() abre min_size y las ociosas de sobra se cierran tras max_idle"""
+        pool = self.make_pool(min_size=1, max_size=3, max_idle=60)
+        pool.fill()
+        self.assertEqual(pool.stats()['size'], 1)
+        first, second = pool.acquire(), pool.acquire()
+        first.close()
+        self.clock.now = 100
+        second.close()
+        self.assertEqual(pool.stats()['size'], 1)
+        self.assertEqual(pool.stats()['discarded'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
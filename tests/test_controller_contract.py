@@ -0,0 +1,235 @@
+"""
+Tests de contrato compartidos por BankController y AsyncBankController
+
+Las mismas pruebas se ejecutan contra las dos versiones del controlador y
+deben dar las mismas respuestas. Necesitan PostgreSQL (TEST_DATABASE_URL,
+con el esquema UUID de los modelos ORM, el que crea db_manager.init_db()) y
+sqlalchemy[asyncio] + asyncpg; si falta algo, se omiten.
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import threading
+import uuid
+from unittest import mock
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+try:
+    import greenlet  # noqa: F401
+    import asyncpg  # noqa: F401
+    from controllers import bank_controller
+    from controllers.bank_controller import BankController
+    from database.retry import retry_stats
+    from database import events
+    from controllers.async_bank_controller import AsyncBankController
+    MISSING = None if TEST_DATABASE_URL else 'TEST_DATABASE_URL is not set'
+except ImportError as e:
+    MISSING = f'missing dependency: {e.name}'
+
+
+class ControllerContract:
+    """Pruebas comunes; call() ejecuta un método del controlador y devuelve (dict, status)"""
+
+    def call(self, name, *args, **kwargs):
+        raise NotImplementedError
+
+    def new_user(self):
+        suffix = uuid.uuid4().hex[:10]
+        result, status = self.call(
+            'create_user', f'user_{suffix}', f'{suffix}@test.com', 'hash', 'Test', 'User'
+        )
+        self.assertEqual(status, 201)
+        return result['user']['id']
+
+    def new_account(self, user_id, balance=100.0):
+        result, status = self.call('create_account', user_id, 'checking', balance)
+        self.assertEqual(status, 201)
+        return result['account']['id']
+
+    def balance(self, account_id):
+        return self.call('get_account', account_id=account_id)[0]['account']['balance']
+
+    def test_create_and_get_account(self):
+        """Test: crear una cuenta y leerla por id"""
+        user_id = self.new_user()
+        account_id = self.new_account(user_id, 50.0)
+        result, status = self.call('get_account', account_id=account_id)
+        self.assertEqual(status, 200)
+        self.assertEqual(result['account']['balance'], 50.0)
+        self.assertEqual(result['account']['user_id'], user_id)
+
+    def test_get_account_not_found(self):
+        """Test: una cuenta inexistente devuelve 404"""
+        _, status = self.call('get_account', account_id=str(uuid.uuid4()))
+        self.assertEqual(status, 404)
+
+    def test_deposit_and_withdraw(self):
+        """Test: depósito y retiro actualizan el saldo"""
+        account_id = self.new_account(self.new_user(), 100.0)
+        result, status = self.call('deposit_funds', account_id, 25.5)
+        self.assertEqual(status, 200)
+        # La transacción ya está en la base de datos: id y fecha reales (se publican por SSE)
+        uuid.UUID(result['transaction']['id'])
+        self.assertIsNotNone(result['transaction']['created_at'])
+        self.assertEqual(self.call('withdraw_funds', account_id, 10)[1], 200)
+        self.assertEqual(self.balance(account_id), 115.5)
+
+    def test_withdraw_insufficient_funds(self):
+        """Test: no se puede retirar más que el saldo"""
+        account_id = self.new_account(self.new_user(), 10.0)
+        _, status = self.call('withdraw_funds', account_id, 20)
+        self.assertEqual(status, 400)
+
+    def test_transfer(self):
+        """Test: una transferencia mueve el importe entre cuentas"""
+        user_id = self.new_user()
+        source, target = self.new_account(user_id, 100.0), self.new_account(user_id, 0.0)
+        _, status = self.call('transfer_funds', source, target, 40, 'contract')
+        self.assertEqual(status, 200)
+        self.assertEqual(self.balance(source), 60.0)
+        self.assertEqual(self.balance(target), 40.0)
+
+    def test_transfer_publishes_both_balances(self):
+        """Test: una transferencia publica el saldo nuevo de origen y destino; el del destino no va en la respuesta"""
+        user_id = self.new_user()
+        source, target = self.new_account(user_id, 100.0), self.new_account(user_id, 0.0)
+        with events.event_bus.subscribe(f'account:{source}', f'account:{target}') as subscription:
+            result, status = self.call('transfer_funds', source, target, 40)
+            self.assertEqual(status, 200)
+            received = [subscription.get(timeout=2) for _ in range(4)]
+        self.assertNotIn(bank_controller.TO_BALANCE_KEY, result)
+        balances = {event['data']['account_id']: event['data']['balance']
+                    for event in received if event['type'] == 'balance'}
+        self.assertEqual(balances, {source: 60.0, target: 40.0})
+
+    def test_transfer_invalid_amount(self):
+        """Test: importes no positivos se rechazan"""
+        user_id = self.new_user()
+        source, target = self.new_account(user_id), self.new_account(user_id)
+        self.assertEqual(self.call('transfer_funds', source, target, -5)[1], 400)
+
+    def test_direct_transfer_falls_back(self):
+        """Test: con BANK_DIRECT_UPDATES los casos que no aplica el UPDATE directo pasan por la ruta ORM"""
+        user_id = self.new_user()
+        source, target = self.new_account(user_id, 100.0), self.new_account(user_id, 0.0)
+        with mock.patch.object(bank_controller, 'DIRECT_BALANCE_UPDATES', True):
+            # Sin fondos se responde en la misma transacción, sin pasar por la ruta ORM
+            with mock.patch.object(BankController, '_transfer_funds_tx') as orm_path:
+                self.assertEqual(self.call('transfer_funds', source, target, 500)[1], 400)
+            orm_path.assert_not_called()
+            self.assertEqual(self.balance(source), 100.0)
+
+            self.assertEqual(BankController.enable_balance_striping(target, 2)[1], 200)
+            self.assertEqual(self.call('transfer_funds', source, target, 40)[1], 200)
+        self.assertEqual(self.balance(source), 60.0)
+        self.assertEqual(self.balance(target), 40.0)
+
+    def test_user_accounts_and_history(self):
+        """Test: listado de cuentas del usuario e historial de la cuenta"""
+        user_id = self.new_user()
+        account_id = self.new_account(user_id, 0.0)
+        self.call('deposit_funds', account_id, 5)
+        # Éxito: lista de cuentas (create_user ya abre una cuenta corriente); error: (dict, status)
+        accounts = self.call('get_user_accounts', user_id)
+        self.assertIsInstance(accounts, list)
+        self.assertIn(account_id, [account['id'] for account in accounts])
+        history, status = self.call('get_account_transactions', account_id)
+        self.assertEqual(status, 200)
+        self.assertEqual(len(history['transactions']), 1)
+
+    def test_history_pages(self):
+        """Test: el historial (UNION ALL de cargos y abonos) pagina por cursor sin repetir filas"""
+        user_id = self.new_user()
+        account_id, other = self.new_account(user_id, 100.0), self.new_account(user_id, 100.0)
+        self.call('deposit_funds', account_id, 5)
+        self.call('transfer_funds', account_id, other, 10)
+        self.call('transfer_funds', other, account_id, 20)
+
+        first, status = self.call('get_account_transactions', account_id, limit=2)
+        self.assertEqual(status, 200)
+        self.assertEqual([txn['amount'] for txn in first['transactions']], [20.0, 10.0])
+        rest, status = self.call('get_account_transactions', account_id, limit=2, cursor=first['next_cursor'])
+        self.assertEqual(status, 200)
+        self.assertEqual([txn['amount'] for txn in rest['transactions']], [5.0])
+        self.assertIsNone(rest['next_cursor'])
+
+    def test_export(self):
+        """Test: la exportación NDJSON contiene una línea por transacción"""
+        account_id = self.new_account(self.new_user(), 0.0)
+        self.call('deposit_funds', account_id, 1)
+        self.call('deposit_funds', account_id, 2)
+        lines = self.export_lines(account_id)
+        self.assertEqual(len(lines), 2)
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestBankControllerContract(ControllerContract, unittest.TestCase):
+    """Contrato contra BankController (síncrono)"""
+
+    def call(self, name, *args, **kwargs):
+        return getattr(BankController, name)(*args, **kwargs)
+
+    def test_direct_opposite_transfers_do_not_deadlock(self):
+        """Test: transferencias directas A->B y B->A concurrentes bloquean en el mismo orden"""
+        user_id = self.new_user()
+        first, second = self.new_account(user_id, 1000.0), self.new_account(user_id, 1000.0)
+        statuses = []
+
+        def work(source, target):
+            for _ in range(50):
+                statuses.append(self.call('transfer_funds', source, target, 1)[1])
+
+        retry_stats.reset()
+        with mock.patch.object(bank_controller, 'DIRECT_BALANCE_UPDATES', True):
+            threads = [threading.Thread(target=work, args=pair)
+                       for pair in ((first, second), (second, first)) * 4]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(statuses, [200] * 400)
+        self.assertEqual(self.balance(first) + self.balance(second), 2000.0)
+        self.assertNotIn('40P01', retry_stats.snapshot()['transfer_funds']['by_sqlstate'])
+
+    def export_lines(self, account_id):
+        chunks, status = BankController.export_account_transactions(account_id)
+        self.assertEqual(status, 200)
+        return ''.join(chunks).splitlines()
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestAsyncBankControllerContract(ControllerContract, unittest.TestCase):
+    """Contrato contra AsyncBankController (un event loop para toda la clase)"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Las conexiones de asyncpg del pool quedan ligadas al loop que las abrió
+        cls.loop = asyncio.new_event_loop()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.loop.close()
+
+    def call(self, name, *args, **kwargs):
+        return self.loop.run_until_complete(getattr(AsyncBankController, name)(*args, **kwargs))
+
+    def export_lines(self, account_id):
+        async def collect():
+            chunks, status = await AsyncBankController.export_account_transactions(account_id)
+            self.assertEqual(status, 200)
+            return ''.join([chunk async for chunk in chunks])
+        return self.loop.run_until_complete(collect()).splitlines()
+
+
+if __name__ == '__main__':
+    unittest.main()
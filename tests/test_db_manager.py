@@ -0,0 +1,89 @@
+"""
+Tests para la construcción perezosa de database/db_manager.py (necesitan SQLAlchemy)
+"""
+
+import unittest
+import os
+import subprocess
+import sys
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+try:
+    from sqlalchemy import create_engine, text
+    from database import db_manager
+except ImportError:
+    db_manager = None
+
+
+@unittest.skipIf(db_manager is None, 'sqlalchemy is not installed')
+class TestLazyEngine(unittest.TestCase):
+    """Tests para configure() y el engine perezoso"""
+
+    def setUp(self):
+        self.saved = db_manager._database
+
+    def tearDown(self):
+        db_manager._database = self.saved
+
+    def test_import_does_not_create_engine(self):
+        """Test: importar el módulo y un modelo no crea engines ni configura logging"""
+        code = (
+            "import logging, sys\n"
+            "from database import db_manager\n"
+            "import models.account\n"
+            "assert db_manager._database is None\n"
+            "assert not logging.getLogger().handlers\n"
+            "assert 'pg8000' not in sys.modules\n"
+        )
+        path = [ROOT, os.path.join(ROOT, 'backend'), os.environ.get('PYTHONPATH', '')]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+        result = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_configure_injects_engine(self):
+        """Test: db_session() usa el engine inyectado con configure()"""
+        local = create_engine('sqlite://')
+        self.assertIs(db_manager.configure(engine=local), local)
+        self.assertIs(db_manager.engine, local)
+        self.assertIs(db_manager.get_engine(), local)
+        self.assertIsNone(db_manager.replica_router)
+
+        with db_manager.db_session() as session:
+            self.assertEqual(session.execute(text("SELECT 1")).scalar(), 1)
+        self.assertIn('primary', db_manager.pool_stats()['pools'])
+
+    def test_read_your_writes_marker(self):
+        """Test: tras una escritura la respuesta lleva la marca y las lecturas con ella van al primario"""
+        try:
+            from flask import Flask, jsonify
+        except ImportError:
+            self.skipTest('flask is not installed')
+        from database.replicas import Replica, ReplicaRouter, WRITE_MARKER_HEADER
+
+        db_manager.configure(engine=create_engine('sqlite://'))
+        router = ReplicaRouter([Replica('r0', lambda: 0.0)], sticky_seconds=30)
+        router.refresh()
+        db_manager._db().replica_router = router
+
+        app = db_manager.install_read_your_writes(Flask(__name__))
+        app.add_url_rule('/write', 'write', lambda: (db_manager.mark_write('account-1'), jsonify({}))[1])
+        app.add_url_rule('/read', 'read', lambda: jsonify({'replica': router.choose()}))
+
+        self.assertEqual(app.test_client().get('/read').get_json(), {'replica': 0})
+        marker = app.test_client().get('/write').headers[WRITE_MARKER_HEADER]
+        # Otro cliente (otro worker, sin la marca en memoria) con la cabecera recibida
+        read = app.test_client().get('/read', headers={WRITE_MARKER_HEADER: marker})
+        self.assertEqual(read.get_json(), {'replica': None})
+
+    def test_unknown_attribute(self):
+        """Test: los atributos perezosos no ocultan errores de nombre"""
+        with self.assertRaises(AttributeError):
+            db_manager.not_an_attribute
+
+
+if __name__ == '__main__':
+    unittest.main()
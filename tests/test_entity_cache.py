@@ -0,0 +1,117 @@
+"""
+Tests para database/entity_cache.py (caché de usuarios y cuentas)
+"""
+
+import unittest
+import os
+import sys
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.entity_cache import EntityCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def user(user_id, username):
+    return {'id': user_id, 'username': username, 'email': f'{username}@bank.com'}
+
+
+def index_user(data):
+    return data['id'], {'username': data['username'], 'email': data['email']}
+
+
+class TestEntityCache(unittest.TestCase):
+    """Tests para EntityCache"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = EntityCache(max_entries=3, ttl=30, clock=self.clock)
+        self.loads = 0
+
+    def loader(self, value):
+        def load():
+            self.loads += 1
+            return value
+        return load
+
+    def test_read_through_by_any_key(self):
+        """Test: tras una carga la entidad se encuentra por id, username y email"""
+        alice = user('u1', 'alice')
+        self.cache.get_or_load('user', 'username', 'alice', self.loader(alice), index_user)
+
+        self.assertEqual(self.cache.get('user', 'id', 'u1'), alice)
+        self.assertEqual(self.cache.get('user', 'email', 'alice@bank.com'), alice)
+        self.cache.get_or_load('user', 'username', 'alice', self.loader(alice), index_user)
+        self.assertEqual(self.loads, 1)
+
+    def test_negative_results_not_cached(self):
+        """Test: una entidad inexistente se vuelve a consultar"""
+        for _ in range(2):
+            self.cache.get_or_load('user', 'username', 'ghost', self.loader(None), index_user)
+        self.assertEqual(self.loads, 2)
+
+    def test_ttl_expiry(self):
+        """Test: una entrada caducada cuenta como fallo y se recarga"""
+        self.cache.put('user', 'u1', user('u1', 'alice'), username='alice')
+        self.clock.now += 31
+        self.assertIsNone(self.cache.get('user', 'username', 'alice'))
+        self.assertEqual(self.cache.stats()['entries'], 0)
+
+    def test_lru_eviction(self):
+        """Test: al superar el límite se descarta la menos usada junto con sus alias"""
+        for n in range(3):
+            self.cache.put('user', f'u{n}', user(f'u{n}', f'user{n}'), username=f'user{n}')
+        self.cache.get('user', 'id', 'u0')
+        self.cache.put('user', 'u3', user('u3', 'user3'), username='user3')
+
+        self.assertIsNotNone(self.cache.get('user', 'id', 'u0'))
+        self.assertIsNone(self.cache.get('user', 'username', 'user1'))
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+
+    def test_invalidate_removes_aliases(self):
+        """Test: invalidar por id también elimina las claves alternativas"""
+        self.cache.put('account', 'a1', {'id': 'a1'}, account_number='CHK-1')
+        self.cache.invalidate('account', 'a1')
+        self.assertIsNone(self.cache.get('account', 'account_number', 'CHK-1'))
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_load_racing_invalidation_is_not_stored(self):
+        """Test: un valor leído antes de invalidar su entidad no se guarda"""
+        def stale_load():
+            # Una escritura concurrente invalida la cuenta mientras se carga
+            self.cache.invalidate('account', 'a1')
+            return {'id': 'a1', 'balance': 10}
+
+        self.cache.get_or_load('account', 'id', 'a1', stale_load, lambda d: (d['id'], {}))
+        self.assertIsNone(self.cache.get('account', 'id', 'a1'))
+
+        # Invalidaciones de otras entidades no impiden guardar
+        def load_other():
+            self.cache.invalidate('account', 'a2')
+            return {'id': 'a1', 'balance': 20}
+
+        self.cache.get_or_load('account', 'id', 'a1', load_other, lambda d: (d['id'], {}))
+        self.assertEqual(self.cache.get('account', 'id', 'a1')['balance'], 20)
+
+    def test_stats(self):
+        """Test: las métricas cuentan aciertos y fallos"""
+        self.cache.put('user', 'u1', user('u1', 'alice'))
+        self.cache.get('user', 'id', 'u1')
+        self.cache.get('user', 'id', 'u2')
+        stats = self.cache.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+        self.assertEqual(stats['hit_ratio'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
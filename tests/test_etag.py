@@ -0,0 +1,58 @@
+"""
+Tests para database/etag.py (ETag / If-None-Match)
+"""
+
+import unittest
+import os
+import sys
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.etag import make_etag, etag_matches
+
+
+class TestMakeEtag(unittest.TestCase):
+    """Tests para make_etag"""
+
+    def test_stable_and_quoted(self):
+        """Test: las mismas partes dan el mismo ETag, entre comillas"""
+        etag = make_etag(7, 3, 'transactions', None, 50)
+        self.assertEqual(etag, make_etag(7, 3, 'transactions', None, 50))
+        self.assertTrue(etag.startswith('"') and etag.endswith('"'))
+
+    def test_changes_with_version_and_params(self):
+        """Test: cambiar la versión o los parámetros cambia el ETag"""
+        base = make_etag(7, 3, 'transactions', None, 50)
+        self.assertNotEqual(base, make_etag(7, 4, 'transactions', None, 50))
+        self.assertNotEqual(base, make_etag(7, 3, 'transactions', 'cursor', 50))
+        self.assertNotEqual(base, make_etag(7, 3, 'details'))
+
+
+class TestEtagMatches(unittest.TestCase):
+    """Tests para etag_matches"""
+
+    def setUp(self):
+        self.etag = make_etag('accounts', 1)
+
+    def test_exact_and_list(self):
+        """Test: coincide con el ETag exacto o dentro de una lista"""
+        self.assertTrue(etag_matches(self.etag, self.etag))
+        self.assertTrue(etag_matches(f'"other", {self.etag}', self.etag))
+        self.assertFalse(etag_matches('"other"', self.etag))
+
+    def test_weak_and_wildcard(self):
+        """Test: la comparación ignora W/ y '*' coincide siempre"""
+        self.assertTrue(etag_matches(f'W/{self.etag}', self.etag))
+        self.assertTrue(etag_matches('*', self.etag))
+
+    def test_missing_header(self):
+        """Test: sin cabecera no hay coincidencia"""
+        self.assertFalse(etag_matches(None, self.etag))
+        self.assertFalse(etag_matches('', self.etag))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,192 @@
+"""
+Tests para database/events.py (pub/sub en proceso, SSE y puente LISTEN/NOTIFY)
+"""
+
+import unittest
+import os
+import sys
+import json
+import threading
+from collections import deque
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.events import EventBus, LocalBridge, PostgresBridge, format_sse, sse_stream, RESYNC
+
+
+class FakeNotifyServer:
+    """Canal NOTIFY en memoria compartido por varias conexiones (estilo pg8000)"""
+
+    def __init__(self):
+        self.listeners = []
+        self.lock = threading.Lock()
+
+    def connect(self):
+        return FakeConnection(self)
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        server = self.conn.server
+        with server.lock:
+            if sql.startswith('LISTEN'):
+                server.listeners.append(self.conn)
+            elif 'pg_notify' in sql:
+                for listener in server.listeners:
+                    listener.notifications.append((0, params[0], params[1]))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.notifications = deque()
+        self.autocommit = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class TestEventBus(unittest.TestCase):
+    """Tests para EventBus y Subscription"""
+
+    def setUp(self):
+        self.bus = EventBus()
+
+    def test_topic_delivery(self):
+        """Test: cada suscripción recibe solo los eventos de sus temas"""
+        first = self.bus.subscribe('account:1')
+        second = self.bus.subscribe('account:2')
+        self.assertEqual(self.bus.publish('account:1', 'balance', {'balance': 10}), 1)
+        self.assertEqual(first.get(timeout=0)['data'], {'balance': 10})
+        self.assertIsNone(second.get(timeout=0))
+
+    def test_overflow_requests_resync(self):
+        """Test: un consumidor atrasado pierde eventos viejos y recibe RESYNC"""
+        subscription = self.bus.subscribe('account:1', max_pending=3)
+        for n in range(5):
+            self.bus.publish('account:1', 'transaction', n)
+        self.assertEqual(subscription.get(timeout=0)['type'], RESYNC)
+        self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(self.bus.stats()['overflows'], 2)
+
+    def test_close_unsubscribes(self):
+        """Test: al cerrar la suscripción desaparecen sus temas"""
+        subscription = self.bus.subscribe('account:1', 'user:1')
+        subscription.subscribe('account:2')
+        self.assertEqual(self.bus.stats()['topics'], 3)
+        subscription.close()
+        self.assertEqual(self.bus.stats()['topics'], 0)
+        self.assertEqual(self.bus.publish('account:1', 'balance'), 0)
+
+
+class TestSSE(unittest.TestCase):
+    """Tests para format_sse y sse_stream"""
+
+    def test_format(self):
+        """Test: formato SSE con id, tipo y datos JSON"""
+        self.assertEqual(
+            format_sse('balance', {'balance': 1.5}, 7),
+            'id: 7\nevent: balance\ndata: {"balance":1.5}\n\n'
+        )
+
+    def test_stream_heartbeat_events_and_close(self):
+        """Test: el stream envía retry, latidos sin eventos y cierra la suscripción al terminar"""
+        bus = EventBus()
+        subscription = bus.subscribe('account:1')
+        seen = []
+        stream = sse_stream(subscription, heartbeat=0.01, on_event=seen.append)
+        self.assertTrue(next(stream).startswith('retry:'))
+        self.assertEqual(next(stream), ': keep-alive\n\n')
+        bus.publish('account:1', 'transaction', {'id': 'x'})
+        self.assertIn('event: transaction', next(stream))
+        self.assertEqual(len(seen), 1)
+        stream.close()
+        self.assertTrue(subscription.closed)
+        self.assertEqual(bus.stats()['subscriptions'], 0)
+
+
+class TestBridges(unittest.TestCase):
+    """Tests para LocalBridge y PostgresBridge"""
+
+    def test_local_bridge(self):
+        """Test: el puente local entrega en el bus del proceso"""
+        bus = EventBus()
+        subscription = bus.subscribe('user:1')
+        LocalBridge(bus).publish('user:1', 'account', {'id': 'a'})
+        self.assertEqual(subscription.get(timeout=0)['type'], 'account')
+
+    def test_postgres_bridge_between_workers(self):
+        """Test: un NOTIFY de un worker llega a las suscripciones de todos los workers"""
+        server = FakeNotifyServer()
+        buses = [EventBus(), EventBus()]
+        bridges = [PostgresBridge(bus, server.connect, poll_interval=0.01) for bus in buses]
+        subscriptions = [bus.subscribe('account:1') for bus in buses]
+        for bridge in bridges:
+            bridge.start()
+        try:
+            while len(server.listeners) < 2:
+                threading.Event().wait(0.01)
+            bridges[0].publish('account:1', 'balance', {'balance': 5})
+            for subscription in subscriptions:
+                event = subscription.get(timeout=2)
+                self.assertEqual((event['type'], event['data']), ('balance', {'balance': 5}))
+        finally:
+            for bridge in bridges:
+                bridge.stop()
+
+    def test_oversized_payload_drops_data(self):
+        """Test: si los datos no caben en NOTIFY se envía el evento sin datos"""
+        server = FakeNotifyServer()
+        listener = server.connect()
+        listener.cursor().execute('LISTEN "bank_events"')
+        bridge = PostgresBridge(EventBus(), server.connect, poll_interval=0.01)
+        bridge.start()
+        bridge.publish('account:1', 'transaction', 'x' * 10000)
+        # stop() envía lo que quede en la cola
+        bridge.stop()
+        _, _, payload = listener.notifications.popleft()
+        self.assertIsNone(json.loads(payload)['data'])
+
+    def test_publish_does_not_wait_for_notify(self):
+        """Test: publish() vuelve aunque la conexión de NOTIFY esté bloqueada; el evento sale después"""
+        server = FakeNotifyServer()
+        listener = server.connect()
+        listener.cursor().execute('LISTEN "bank_events"')
+        released = threading.Event()
+
+        def slow_connect():
+            released.wait(5)
+            return server.connect()
+
+        bridge = PostgresBridge(EventBus(), slow_connect, poll_interval=0.01, max_queued=2)
+        bridge.start()
+        try:
+            for balance in range(4):
+                bridge.publish('account:1', 'balance', {'balance': balance})
+            self.assertEqual(len(listener.notifications), 0)
+        finally:
+            released.set()
+            bridge.stop()
+        # Con la cola llena (2 en cola y a lo sumo 1 en curso) el último se descarta
+        delivered = [json.loads(payload)['data'] for _, _, payload in listener.notifications]
+        self.assertIn(len(delivered), (2, 3))
+        self.assertEqual(delivered[0], {'balance': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
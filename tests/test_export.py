@@ -0,0 +1,88 @@
+"""
+Tests para database/export.py (exportación NDJSON / CSV en streaming)
+"""
+
+import unittest
+import os
+import sys
+import csv
+import io
+import json
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.export import stream_rows, attachment_name, CSV, NDJSON
+
+FIELDS = ('id', 'amount', 'created_at', 'description')
+
+
+def rows(count):
+    for n in range(count):
+        yield {
+            'id': n,
+            'amount': Decimal('10.05'),
+            'created_at': datetime(2026, 1, 1, 12, 0, n % 60),
+            'description': f'Pago, "factura" {n}',
+            'ignored': 'x'
+        }
+
+
+class TestStreamRows(unittest.TestCase):
+    """Tests para stream_rows"""
+
+    def test_ndjson(self):
+        """Test: una línea JSON por fila, solo con los campos pedidos"""
+        text = ''.join(stream_rows(rows(3), NDJSON, FIELDS))
+        lines = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(list(lines[0]), list(FIELDS))
+        self.assertEqual(lines[0]['amount'], '10.05')
+        self.assertEqual(lines[0]['created_at'], '2026-01-01T12:00:00')
+
+    def test_csv(self):
+        """Test: cabecera y filas CSV con escapado correcto"""
+        text = ''.join(stream_rows(rows(2), CSV, FIELDS))
+        parsed = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(parsed[0], list(FIELDS))
+        self.assertEqual(parsed[2][3], 'Pago, "factura" 1')
+
+    def test_chunking(self):
+        """Test: las filas se agrupan en trozos de chunk_rows y no se pierde ninguna"""
+        chunks = list(stream_rows(rows(25), NDJSON, FIELDS, chunk_rows=10))
+        self.assertEqual([chunk.count('\n') for chunk in chunks], [10, 10, 5])
+
+    def test_rows_consumed_lazily(self):
+        """Test: el primer trozo sale antes de leer todas las filas"""
+        consumed = []
+
+        def source():
+            for row in rows(1000):
+                consumed.append(row['id'])
+                yield row
+
+        first = next(stream_rows(source(), NDJSON, FIELDS, chunk_rows=10))
+        self.assertEqual(first.count('\n'), 10)
+        self.assertLess(len(consumed), 1000)
+
+    def test_uuid_and_empty(self):
+        """Test: los UUID se exportan como texto y sin filas el CSV solo lleva cabecera"""
+        value = uuid.uuid4()
+        text = ''.join(stream_rows([{'id': value}], NDJSON, ('id',)))
+        self.assertEqual(json.loads(text)['id'], str(value))
+        self.assertEqual(''.join(stream_rows([], CSV, FIELDS)).strip(), ','.join(FIELDS))
+
+    def test_unknown_format(self):
+        """Test: un formato desconocido es un ValueError"""
+        with self.assertRaises(ValueError):
+            list(stream_rows(rows(1), 'xml', FIELDS))
+        self.assertEqual(attachment_name('transactions-1', CSV), 'transactions-1.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
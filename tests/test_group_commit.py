@@ -0,0 +1,85 @@
+"""
+Tests para controllers/group_commit.py (micro-lotes de depósitos)
+"""
+
+import unittest
+import os
+import sys
+import threading
+from decimal import Decimal
+
+# Añadir el directorio padre al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from controllers.group_commit import DepositBatcher
+
+
+class TestDepositBatcher(unittest.TestCase):
+    """Tests para DepositBatcher con una función de aplicación simulada"""
+
+    def setUp(self):
+        self.batches = []
+        self.balances = {}
+
+        def apply_batch(requests):
+            self.batches.append(len(requests))
+            results = []
+            for r in requests:
+                self.balances[r.account_id] = self.balances.get(r.account_id, Decimal('0')) + r.amount
+                results.append(({"new_balance": self.balances[r.account_id]}, 200))
+            return results
+
+        self.batcher = DepositBatcher(apply_batch, window=0.05, max_items=64)
+
+    def tearDown(self):
+        self.batcher.close(timeout=2)
+
+    def test_each_caller_gets_own_result(self):
+        """Test: cada Future recibe el resultado de su propio depósito"""
+        futures = [self.batcher.submit('acc-1', Decimal('1.00')) for _ in range(10)]
+        balances = [f.result(timeout=2)[0]["new_balance"] for f in futures]
+        self.assertEqual(balances, [Decimal(i) for i in range(1, 11)])
+
+    def test_concurrent_requests_are_coalesced(self):
+        """Test: peticiones concurrentes se agrupan en pocos lotes"""
+        futures = []
+        lock = threading.Lock()
+
+        def client(account):
+            future = self.batcher.submit(account, Decimal('2.50'))
+            with lock:
+                futures.append(future)
+
+        threads = [threading.Thread(target=client, args=(f"acc-{i % 4}",)) for i in range(40)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for f in futures:
+            self.assertEqual(f.result(timeout=2)[1], 200)
+
+        self.assertEqual(sum(self.batches), 40)
+        self.assertLess(len(self.batches), 40)
+        self.assertEqual(sum(self.balances.values()), Decimal('100.00'))
+
+    def test_max_items_limits_batch(self):
+        """Test: ningún lote supera max_items"""
+        futures = [self.batcher.submit('acc-1', Decimal('1')) for _ in range(200)]
+        for f in futures:
+            f.result(timeout=2)
+        self.assertLessEqual(max(self.batches), 64)
+
+    def test_failure_propagates_to_all(self):
+        """Test: un error en el lote llega a todos sus llamantes"""
+        def failing(requests):
+            raise RuntimeError("db down")
+
+        batcher = DepositBatcher(failing, window=0.01)
+        future = batcher.submit('acc-1', Decimal('1'))
+        with self.assertRaises(RuntimeError):
+            future.result(timeout=2)
+        batcher.close(timeout=2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""
+Tests para database/id_allocator.py (códigos de transacción únicos y ordenables)
+"""
+
+import unittest
+import os
+import sys
+import threading
+from unittest import mock
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import id_allocator
+from database.id_allocator import (
+    SnowflakeAllocator, WorkerLease, LeasedAllocator, SEQUENCE_BITS, MAX_SEQUENCE, MAX_WORKER_ID,
+    format_code
+)
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+class FixedClock:
+    """Reloj controlable para simular varias llamadas en el mismo milisegundo"""
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self):
+        return int(self.seconds * 1e9)
+
+
+class TestSnowflakeAllocator(unittest.TestCase):
+    """Tests para SnowflakeAllocator"""
+
+    def test_ids_strictly_increasing(self):
+        """Test: ids crecientes aunque el reloj no avance"""
+        allocator = SnowflakeAllocator(7, clock=FixedClock(1800000000.0))
+        ids = [allocator.next_id() for _ in range(10000)]
+        self.assertEqual(ids, sorted(set(ids)))
+
+    def test_sequence_overflow_borrows_next_ms(self):
+        """Test: al agotar la secuencia se usa el milisegundo siguiente"""
+        allocator = SnowflakeAllocator(1, clock=FixedClock(1800000000.0))
+        ids = [allocator.next_id() for _ in range(MAX_SEQUENCE + 2)]
+        self.assertEqual(ids[-1] & MAX_SEQUENCE, 0)
+        self.assertGreater(ids[-1], ids[-2])
+
+    def test_clock_going_backwards(self):
+        """Test: un retroceso del reloj no rompe la monotonía"""
+        clock = FixedClock(1800000000.0)
+        allocator = SnowflakeAllocator(1, clock=clock)
+        first = allocator.next_id()
+        clock.seconds -= 5
+        self.assertGreater(allocator.next_id(), first)
+
+    def test_worker_id_embedded(self):
+        """Test: el worker id ocupa sus bits y distingue procesos"""
+        clock = FixedClock(1800000000.0)
+        a = SnowflakeAllocator(3, clock=clock).next_id()
+        b = SnowflakeAllocator(4, clock=clock).next_id()
+        self.assertNotEqual(a, b)
+        self.assertEqual((a >> SEQUENCE_BITS) & MAX_WORKER_ID, 3)
+
+    def test_invalid_worker_id(self):
+        """Test: worker id fuera de rango"""
+        with self.assertRaises(ValueError):
+            SnowflakeAllocator(MAX_WORKER_ID + 1)
+
+    def test_unique_across_threads(self):
+        """Test: sin duplicados con varios hilos"""
+        allocator = SnowflakeAllocator(9)
+        results = []
+
+        def worker():
+            results.extend(allocator.next_id() for _ in range(5000))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(set(results)), 8 * 5000)
+
+    def test_increasing_per_thread(self):
+        """Test: cada hilo recibe ids estrictamente crecientes aunque se intercalen bloques"""
+        allocator = SnowflakeAllocator(3, clock=FixedClock(1800000000.0), block_size=16)
+        per_thread = [[] for _ in range(4)]
+
+        def worker(out):
+            out.extend(allocator.next_id() for _ in range(3000))
+
+        threads = [threading.Thread(target=worker, args=(out,)) for out in per_thread]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for ids in per_thread:
+            self.assertEqual(ids, sorted(set(ids)))
+        self.assertEqual(len(set().union(*per_thread)), 4 * 3000)
+
+    def test_codes_sort_like_ids(self):
+        """Test: los códigos se ordenan como texto igual que los ids"""
+        allocator = SnowflakeAllocator(2)
+        codes = [allocator.next_code('DEP') for _ in range(1000)]
+        self.assertEqual(codes, sorted(codes))
+        self.assertTrue(codes[0].startswith('DEP-'))
+        self.assertLessEqual(len(codes[0]), 50)  # columna transaction_code VARCHAR(50)
+
+    def test_code_fixed_width(self):
+        """Test: ancho fijo de la codificación"""
+        self.assertEqual(format_code('TXN', 0), 'TXN-' + '0' * 16)
+        self.assertEqual(len(format_code('TXN', (1 << 63) - 1)), 20)
+        self.assertLess(format_code('TXN', 15), format_code('TXN', 16))
+
+
+
+class TestWorkerIdSelection(unittest.TestCase):
+    """Tests para la elección del worker id del asignador del proceso"""
+
+    def setUp(self):
+        id_allocator.set_allocator(None)
+        self.addCleanup(id_allocator.set_allocator, None)
+
+    def test_configured_worker_id(self):
+        """Test: ID_WORKER_ID fija el worker id"""
+        with mock.patch.dict(os.environ, {'ID_WORKER_ID': '42', 'FLASK_ENV': 'production'}):
+            self.assertEqual(id_allocator.get_allocator().worker_id, 42)
+
+    def test_production_requires_worker_id(self):
+        """Test: en producción no se usa un worker id derivado que podría repetirse"""
+        env = {'ID_WORKER_ID': '', 'ID_WORKER_LEASE': 'false', 'FLASK_ENV': 'production'}
+        with mock.patch.dict(os.environ, env):
+            with self.assertRaises(RuntimeError):
+                id_allocator.next_transaction_id()
+
+    def test_derived_outside_production(self):
+        """Test: fuera de producción se deriva el worker id"""
+        env = {'ID_WORKER_ID': '', 'ID_WORKER_LEASE': 'false', 'FLASK_ENV': 'development'}
+        with mock.patch.dict(os.environ, env):
+            self.assertEqual(id_allocator.get_allocator().worker_id, id_allocator.derive_worker_id())
+
+
+@unittest.skipIf(not TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+class TestWorkerLease(unittest.TestCase):
+    """Tests para WorkerLease contra PostgreSQL (tabla de la migración 006)"""
+
+    def setUp(self):
+        try:
+            import psycopg2
+        except ImportError:
+            self.skipTest('missing dependency: psycopg2')
+        self.connect = lambda: psycopg2.connect(TEST_DATABASE_URL)
+        path = os.path.join(ROOT, 'backend', 'database', 'migrations', '006_id_worker_leases.sql')
+        conn = self.connect()
+        with conn, conn.cursor() as cur:
+            cur.execute(open(path).read())
+        conn.close()
+
+    def test_leases_are_distinct(self):
+        """Test: dos procesos vivos nunca reciben el mismo worker id y al liberar se reutiliza"""
+        first, second = WorkerLease(self.connect, ttl=30), WorkerLease(self.connect, ttl=30)
+        self.addCleanup(second.release)
+        allocator = LeasedAllocator(first)
+        self.assertNotEqual(second.acquire(), allocator.worker_id)
+        self.assertTrue(first.renew())
+        allocator.next_id()
+        first.release()
+
+    def test_lost_lease_stops_allocation(self):
+        """Test: si otro proceso se queda el worker id, el asignador deja de generar ids"""
+        lease = WorkerLease(self.connect, ttl=30)
+        allocator = LeasedAllocator(lease)
+        self.addCleanup(lease.release)
+        conn = self.connect()
+        with conn, conn.cursor() as cur:
+            cur.execute("UPDATE id_worker_leases SET owner = 'other' WHERE worker_id = %s", (lease.worker_id,))
+        conn.close()
+        self.assertFalse(lease.renew())
+        with self.assertRaises(RuntimeError):
+            allocator.next_id()
+
+
+if __name__ == '__main__':
+    unittest.main()
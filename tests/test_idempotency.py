@@ -0,0 +1,168 @@
+"""
+Tests para database/idempotency.py (almacén de Idempotency-Key)
+"""
+
+import unittest
+import os
+import sys
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.idempotency import (
+    IdempotencyStore, SQLIdempotencyBackend, request_fingerprint, NEW, REPLAY, IN_PROGRESS, MISMATCH
+)
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeBackend:
+    """Backend en memoria con la misma interfaz que SQLIdempotencyBackend"""
+    def __init__(self):
+        self.rows = {}
+        self.claims = 0
+
+    def claim(self, key, fingerprint, lease):
+        self.claims += 1
+        if key in self.rows:
+            return self.rows[key]
+        self.rows[key] = (fingerprint, None, None)
+        return None
+
+    def save(self, key, status, body, ttl):
+        self.rows[key] = (self.rows[key][0], status, body)
+
+    def release(self, key):
+        if self.rows.get(key, (None, 1))[1] is None:
+            self.rows.pop(key, None)
+
+
+class TestIdempotencyStore(unittest.TestCase):
+    """Tests para IdempotencyStore"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.store = IdempotencyStore(max_entries=3, ttl=60, lease=5, clock=self.clock)
+        self.fp = request_fingerprint('POST', '/api/transfer', b'{"amount": 10}')
+
+    def test_first_request_is_new_then_replayed(self):
+        """Test: la segunda petición recibe la respuesta guardada"""
+        self.assertEqual(self.store.begin('k1', self.fp), (NEW, None))
+        self.store.complete('k1', self.fp, 200, '{"ok": true}')
+        self.assertEqual(self.store.begin('k1', self.fp), (REPLAY, (200, '{"ok": true}')))
+
+    def test_concurrent_duplicate_in_progress(self):
+        """Test: un duplicado mientras la primera sigue en curso"""
+        self.store.begin('k1', self.fp)
+        self.assertEqual(self.store.begin('k1', self.fp)[0], IN_PROGRESS)
+
+    def test_different_body_same_key(self):
+        """Test: misma clave con otro contenido"""
+        self.store.begin('k1', self.fp)
+        self.store.complete('k1', self.fp, 200, '{}')
+        other = request_fingerprint('POST', '/api/transfer', b'{"amount": 99}')
+        self.assertEqual(self.store.begin('k1', other)[0], MISMATCH)
+
+    def test_abandon_allows_retry(self):
+        """Test: tras un fallo la clave puede volver a usarse"""
+        self.store.begin('k1', self.fp)
+        self.store.abandon('k1')
+        self.assertEqual(self.store.begin('k1', self.fp)[0], NEW)
+
+    def test_ttl_expiry(self):
+        """Test: las entradas caducan"""
+        self.store.begin('k1', self.fp)
+        self.store.complete('k1', self.fp, 200, '{}')
+        self.clock.now += 61
+        self.assertEqual(self.store.begin('k1', self.fp)[0], NEW)
+
+    def test_in_progress_lease_expires(self):
+        """Test: una clave en curso que nunca se completa se libera tras la reserva corta"""
+        self.store.begin('k1', self.fp)
+        self.clock.now += 6
+        self.assertEqual(self.store.begin('k1', self.fp)[0], NEW)
+
+    def test_lru_bounded(self):
+        """Test: el LRU no supera max_entries"""
+        for i in range(10):
+            self.store.begin(f'k{i}', self.fp)
+            self.store.complete(f'k{i}', self.fp, 200, '{}')
+        self.assertEqual(self.store.stats()['entries'], 3)
+        self.assertEqual(self.store.stats()['evictions'], 7)
+
+    def test_backend_shared_between_processes(self):
+        """Test: otro proceso (otro LRU) ve la respuesta a través del backend"""
+        backend = FakeBackend()
+        worker_a = IdempotencyStore(backend=backend, ttl=60)
+        worker_b = IdempotencyStore(backend=backend, ttl=60)
+
+        self.assertEqual(worker_a.begin('k1', self.fp)[0], NEW)
+        self.assertEqual(worker_b.begin('k1', self.fp)[0], IN_PROGRESS)
+        worker_a.complete('k1', self.fp, 201, '{"id": 1}')
+        self.assertEqual(worker_b.begin('k1', self.fp), (REPLAY, (201, '{"id": 1}')))
+
+        # La siguiente consulta en worker_b sale del LRU sin tocar el backend
+        claims = backend.claims
+        worker_b.begin('k1', self.fp)
+        self.assertEqual(backend.claims, claims)
+
+
+
+@unittest.skipIf(not TEST_DATABASE_URL, 'TEST_DATABASE_URL is not set')
+class TestSQLIdempotencyBackend(unittest.TestCase):
+    """Tests para SQLIdempotencyBackend contra PostgreSQL (migraciones 003 y 007)"""
+
+    def setUp(self):
+        try:
+            import psycopg2
+        except ImportError:
+            self.skipTest('missing dependency: psycopg2')
+        migrations = os.path.join(ROOT, 'backend', 'database', 'migrations')
+        conn = psycopg2.connect(TEST_DATABASE_URL)
+        with conn, conn.cursor() as cur:
+            for name in ('003_idempotency_keys.sql', '007_idempotency_lease.sql'):
+                cur.execute(open(os.path.join(migrations, name)).read())
+        conn.close()
+        # Sesión en una zona horaria lejos de UTC: las fechas no deben depender de ella
+        self.backend = SQLIdempotencyBackend(
+            lambda: psycopg2.connect(TEST_DATABASE_URL, options='-c timezone=Pacific/Kiritimati')
+        )
+        self.key = f'test:{os.urandom(8).hex()}'
+        self.addCleanup(self.backend._run, 'DELETE FROM idempotency_keys WHERE key = %s', (self.key,))
+
+    def expire(self):
+        self.backend._run(
+            "UPDATE idempotency_keys SET expires_at = now() - interval '1 second' WHERE key = %s", (self.key,)
+        )
+
+    def test_claim_blocks_duplicates_until_lease_ends(self):
+        """Test: la reserva frena duplicados y, si el proceso muere, caduca sin esperar el TTL"""
+        self.assertIsNone(self.backend.claim(self.key, 'fp', 60))
+        self.assertEqual(self.backend.claim(self.key, 'fp', 60), ('fp', None, None))
+        self.expire()
+        self.assertIsNone(self.backend.claim(self.key, 'fp', 60))
+
+    def test_saved_response_uses_full_ttl(self):
+        """Test: al guardar la respuesta la clave dura el TTL completo"""
+        self.assertIsNone(self.backend.claim(self.key, 'fp', 1))
+        self.backend.save(self.key, 200, '{}', 3600)
+        remaining = self.backend._run(
+            'SELECT EXTRACT(EPOCH FROM expires_at - now()) FROM idempotency_keys WHERE key = %s',
+            (self.key,), fetch=True
+        )[0]
+        self.assertGreater(remaining, 3500)
+        self.assertEqual(self.backend.claim(self.key, 'fp', 1), ('fp', 200, '{}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
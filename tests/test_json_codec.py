@@ -0,0 +1,79 @@
+"""
+Tests para database/json_codec.py (serialización JSON de respuestas)
+"""
+
+import unittest
+import os
+import sys
+import json
+import uuid
+from datetime import datetime, date
+from decimal import Decimal
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import json_codec
+from database.json_codec import dumps, loads, ORJSON, STDLIB
+
+ACCOUNT_ID = uuid.UUID('12345678-1234-5678-1234-567812345678')
+
+PAYLOAD = {
+    'id': ACCOUNT_ID,
+    'balance': Decimal('1500.25'),
+    'created_at': datetime(2026, 3, 4, 5, 6, 7, 890000),
+    'opened_on': date(2026, 3, 4),
+    'owner': 'José',
+    'tags': [1, None, True],
+}
+
+EXPECTED = {
+    'id': str(ACCOUNT_ID),
+    'balance': 1500.25,
+    'created_at': '2026-03-04T05:06:07.890000',
+    'opened_on': '2026-03-04',
+    'owner': 'José',
+    'tags': [1, None, True],
+}
+
+
+class TestStdlibBackend(unittest.TestCase):
+    """Tests para el backend de la librería estándar"""
+
+    def test_native_types(self):
+        """Test: Decimal, UUID, datetime y date se codifican sin conversión previa"""
+        data = dumps(PAYLOAD, backend=STDLIB)
+        self.assertIsInstance(data, bytes)
+        self.assertEqual(json.loads(data), EXPECTED)
+
+    def test_compact_utf8(self):
+        """Test: salida compacta y en UTF-8 sin escapar"""
+        data = dumps({'a': 'ñ', 'b': 1}, sort_keys=True, backend=STDLIB)
+        self.assertEqual(data, '{"a":"ñ","b":1}'.encode('utf-8'))
+        self.assertEqual(loads(data, backend=STDLIB), {'a': 'ñ', 'b': 1})
+
+    def test_unsupported_type(self):
+        """Test: un tipo no serializable es un TypeError"""
+        with self.assertRaises(TypeError):
+            dumps({'x': object()}, backend=STDLIB)
+
+
+@unittest.skipIf(json_codec.orjson is None, "orjson no está instalado")
+class TestOrjsonBackend(unittest.TestCase):
+    """Tests para el backend orjson"""
+
+    def test_same_result_as_stdlib(self):
+        """Test: orjson produce el mismo documento que la librería estándar"""
+        self.assertEqual(json.loads(dumps(PAYLOAD, backend=ORJSON)), EXPECTED)
+        self.assertEqual(dumps({'b': 1, 'a': 2}, sort_keys=True, backend=ORJSON), b'{"a":2,"b":1}')
+
+    def test_unsupported_type(self):
+        """Test: un tipo no serializable es un TypeError"""
+        with self.assertRaises(TypeError):
+            dumps({'x': object()}, backend=ORJSON)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Tests para controllers/ledger.py (compactador de snapshots del libro mayor)
+
+Necesitan PostgreSQL (TEST_DATABASE_URL, esquema UUID de db_manager.init_db());
+si no está, se omiten.
+"""
+
+import unittest
+import os
+import sys
+import uuid
+from decimal import Decimal
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+if TEST_DATABASE_URL:
+    os.environ['DATABASE_URL'] = TEST_DATABASE_URL
+
+try:
+    from controllers import ledger
+    from controllers.bank_controller import BankController
+    from database.db_manager import db_session
+    from models.account import Account
+    MISSING = None if TEST_DATABASE_URL else 'TEST_DATABASE_URL is not set'
+except ImportError as e:
+    MISSING = f'missing dependency: {e.name}'
+
+
+@unittest.skipIf(MISSING, MISSING)
+class TestLedgerCompactor(unittest.TestCase):
+    """Tests para LedgerCompactor contra PostgreSQL"""
+
+    def setUp(self):
+        suffix = uuid.uuid4().hex[:10]
+        user, status = BankController.create_user(f'user_{suffix}', f'{suffix}@test.com', 'hash', 'T', 'U')
+        self.assertEqual(status, 201)
+        account, status = BankController.create_account(user['user']['id'], 'checking', 0.0)
+        self.assertEqual(status, 201)
+        self.account_id = uuid.UUID(account['account']['id'])
+        self.compactor = ledger.LedgerCompactor(
+            db_session,
+            lambda session, account_id: session.get(Account, account_id),
+            min_postings=2,
+            lag=30
+        )
+        # Solo cuenta la actividad nueva de este test
+        with db_session() as session:
+            self.compactor._watermark = session.execute(
+                ledger.text("SELECT COALESCE(MAX(id), 0) FROM ledger_postings")
+            ).scalar()
+
+    def test_late_commit_is_not_skipped(self):
+        """Test: un asiento con id menor confirmado después de otro mayor acaba en el snapshot"""
+        with db_session() as late:
+            ledger.post(late, self.account_id, Decimal('5.00'), 'LATE')
+            late.flush()  # id asignado, aún sin confirmar
+            with db_session() as early:
+                ledger.post(early, self.account_id, Decimal('7.00'), 'EARLY')
+
+            # Los asientos recientes no mueven la marca mientras el primero sigue abierto
+            watermark = self.compactor._watermark
+            self.assertEqual(self.compactor.run_once(), 0)
+            self.assertEqual(self.compactor._watermark, watermark)
+
+        self.compactor.lag = 0  # ya han pasado `lag` segundos
+        self.assertEqual(self.compactor.run_once(), 1)
+        with db_session() as session:
+            account = session.get(Account, self.account_id)
+            self.assertEqual(ledger.balance(session, account), Decimal('12.00'))
+            snapshot = session.query(ledger.BalanceSnapshot).filter_by(account_id=self.account_id).one()
+            self.assertEqual(snapshot.balance, Decimal('12.00'))
+
+    def test_start_and_stop(self):
+        """Test: el compactador del proceso se arranca una vez y se detiene al apagar"""
+        compactor = BankController.start_ledger_compactor()
+        self.assertIs(BankController.start_ledger_compactor(), compactor)
+        BankController.stop_ledger_compactor()
+        self.assertFalse(compactor._thread.is_alive())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+"""
+Tests para database/pagination.py (cursores de paginación por keyset)
+"""
+
+import unittest
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.pagination import (
+    encode_cursor, decode_cursor, paginate, clamp_page_size, InvalidCursorError, MAX_PAGE_SIZE
+)
+
+
+class TestCursor(unittest.TestCase):
+    """Tests para la codificación de cursores"""
+
+    def test_round_trip_uuid(self):
+        """Test: un cursor con id UUID se decodifica a la misma clave"""
+        created_at = datetime(2026, 3, 1, 12, 30, 15, 123456)
+        txn_id = uuid.uuid4()
+        decoded = decode_cursor(encode_cursor(created_at, txn_id))
+        self.assertEqual(decoded, (created_at, str(txn_id)))
+
+    def test_round_trip_integer(self):
+        """Test: un cursor con id entero (esquema SERIAL) se decodifica como texto"""
+        created_at = datetime(2026, 3, 1)
+        self.assertEqual(decode_cursor(encode_cursor(created_at, 42)), (created_at, '42'))
+
+    def test_cursor_is_url_safe(self):
+        """Test: el cursor se puede usar tal cual en una query string"""
+        cursor = encode_cursor(datetime.utcnow(), uuid.uuid4())
+        self.assertNotIn('=', cursor)
+        self.assertNotIn('+', cursor)
+        self.assertNotIn('/', cursor)
+
+    def test_invalid_cursor(self):
+        """Test: un cursor manipulado lanza InvalidCursorError (un ValueError)"""
+        for bad in ('not-a-cursor', '', 'e30', encode_cursor(datetime.utcnow(), 1)[:-3]):
+            with self.assertRaises(InvalidCursorError):
+                decode_cursor(bad)
+        self.assertTrue(issubclass(InvalidCursorError, ValueError))
+
+
+class TestPaginate(unittest.TestCase):
+    """Tests para paginate y clamp_page_size"""
+
+    def setUp(self):
+        start = datetime(2026, 1, 1)
+        self.rows = [(start - timedelta(seconds=i), i) for i in range(7)]
+
+    def test_last_page_has_no_cursor(self):
+        """Test: si no sobra ninguna fila no hay página siguiente"""
+        page, cursor = paginate(self.rows[:5], 5, lambda r: r)
+        self.assertEqual(len(page), 5)
+        self.assertIsNone(cursor)
+
+    def test_extra_row_produces_cursor(self):
+        """Test: la fila extra se descarta y el cursor apunta a la última devuelta"""
+        page, cursor = paginate(self.rows[:6], 5, lambda r: r)
+        self.assertEqual(page, self.rows[:5])
+        self.assertEqual(decode_cursor(cursor), (self.rows[4][0], '4'))
+
+    def test_clamp_page_size(self):
+        """Test: el tamaño de página se limita a [1, MAX_PAGE_SIZE]"""
+        self.assertEqual(clamp_page_size(None), 50)
+        self.assertEqual(clamp_page_size(0), 1)
+        self.assertEqual(clamp_page_size(10 ** 6), MAX_PAGE_SIZE)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""
+Tests para database/pool_stats.py (métricas del pool de SQLAlchemy)
+"""
+
+import unittest
+import os
+import sys
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.pool_stats import PoolStats
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestPoolStats(unittest.TestCase):
+    """Tests para PoolStats"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.stats = PoolStats(window=10, clock=self.clock)
+
+    def test_wait_times(self):
+        """Test: media y máximo de espera por checkout en milisegundos"""
+        self.stats.record_checkout(0.002)
+        self.stats.record_checkout(0.004)
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['checkouts'], 2)
+        self.assertEqual(snapshot['avg_wait_ms'], 3.0)
+        self.assertEqual(snapshot['max_wait_ms'], 4.0)
+
+    def test_connect_rate_window(self):
+        """Test: connects_per_second solo cuenta las conexiones dentro de la ventana"""
+        for _ in range(5):
+            self.stats.record_connect()
+        self.clock.now = 5
+        self.assertEqual(self.stats.snapshot()['connects_per_second'], 1.0)
+        self.clock.now = 20
+        self.stats.record_connect()
+        snapshot = self.stats.snapshot()
+        self.assertEqual(snapshot['connects'], 6)
+        self.assertEqual(snapshot['connects_per_second'], 0.1)
+
+    def test_pool_state_passthrough(self):
+        """Test: el estado del pool se incluye tal cual en el snapshot"""
+        self.stats.record_invalidate()
+        snapshot = self.stats.snapshot(size=5, checked_out=2, overflow=1)
+        self.assertEqual((snapshot['size'], snapshot['checked_out'], snapshot['overflow']), (5, 2, 1))
+        self.assertEqual(snapshot['invalidations'], 1)
+        self.assertEqual(snapshot['avg_wait_ms'], 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Tests para database/projection.py (codificadores precompilados de filas)
+"""
+
+import unittest
+import os
+import sys
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.projection import compile_row_encoder, AS_IS, STR, ISO, FLOAT
+
+FIELDS = [('id', STR), ('code', AS_IS), ('amount', FLOAT), ('created_at', ISO)]
+
+
+def to_dict(row):
+    """Equivalente a mano de un to_dict() del modelo"""
+    return {
+        'id': str(row[0]) if row[0] else None,
+        'code': row[1],
+        'amount': float(row[2]) if row[2] else 0.0,
+        'created_at': row[3].isoformat() if row[3] else None,
+    }
+
+
+class TestCompileRowEncoder(unittest.TestCase):
+    """Tests para compile_row_encoder"""
+
+    def setUp(self):
+        self.encode = compile_row_encoder(FIELDS, 'encode_test')
+
+    def test_same_output_as_to_dict(self):
+        """Test: el codificador produce el mismo dict (claves, orden y tipos) que to_dict()"""
+        row = (uuid.uuid4(), 'TXN-1', Decimal('10.50'), datetime(2026, 1, 2, 3, 4, 5))
+        result = self.encode(row)
+        self.assertEqual(result, to_dict(row))
+        self.assertEqual(list(result), [key for key, _ in FIELDS])
+        self.assertIsInstance(result['amount'], float)
+
+    def test_nulls(self):
+        """Test: columnas nulas se codifican como None (y el importe como 0.0)"""
+        self.assertEqual(self.encode((None, None, None, None)), {
+            'id': None, 'code': None, 'amount': 0.0, 'created_at': None
+        })
+
+    def test_extra_columns_ignored(self):
+        """Test: las columnas auxiliares al final de la fila no aparecen en el dict"""
+        row = (1, 'A', Decimal('1'), None, 'extra', 42)
+        self.assertEqual(set(self.encode(row)), {'id', 'code', 'amount', 'created_at'})
+
+    def test_unknown_conversion(self):
+        """Test: una conversión desconocida es un ValueError al compilar"""
+        with self.assertRaises(ValueError):
+            compile_row_encoder([('id', 'hex')])
+        self.assertIn('def encode_test(row', self.encode.__source__)
+
+
+if __name__ == '__main__':
+    unittest.main()
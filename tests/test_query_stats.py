@@ -0,0 +1,199 @@
+"""
+Tests para database/query_stats.py (métricas SQL por petición y consultas lentas)
+"""
+
+import unittest
+import os
+import sys
+import threading
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import query_stats
+from database.query_stats import QueryMetrics, SlowQueryLog, analyzable, make_explainer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql, params=None):
+        self.conn.executed.append((sql, params))
+
+    def fetchall(self):
+        return [('Seq Scan on accounts',), ('  Buffers: shared hit=4',)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+        self.rolled_back = False
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+
+class TestRequestStats(unittest.TestCase):
+    """Tests para el conteo por petición"""
+
+    def setUp(self):
+        self.saved = query_stats.metrics, query_stats.slow_log
+        query_stats.metrics = QueryMetrics()
+        query_stats.slow_log = SlowQueryLog(threshold=10)
+
+    def tearDown(self):
+        query_stats.metrics, query_stats.slow_log = self.saved
+
+    def test_counts_queries_of_current_request(self):
+        """Test: número de consultas, tiempo total y la más lenta"""
+        token = query_stats.begin('get_account')
+        query_stats.record('SELECT 1', (), 0.002)
+        query_stats.record('SELECT 2', (), 0.005)
+        stats = query_stats.finish(token)
+
+        self.assertEqual(stats.queries, 2)
+        self.assertAlmostEqual(stats.total, 0.007)
+        self.assertEqual(stats.slowest_statement, 'SELECT 2')
+        self.assertEqual(stats.headers()['X-DB-Query-Count'], '2')
+        self.assertEqual(stats.headers()['X-DB-Slowest-Ms'], '5.00')
+        self.assertIsNone(query_stats.current())
+
+    def test_metrics_per_endpoint(self):
+        """Test: las métricas acumulan peticiones por endpoint"""
+        for queries in (1, 3):
+            token = query_stats.begin('history')
+            for _ in range(queries):
+                query_stats.record('SELECT 1', (), 0.001)
+            query_stats.finish(token)
+        query_stats.record('SELECT outside', (), 0.001)
+
+        snapshot = query_stats.metrics.snapshot()
+        self.assertEqual(snapshot['queries'], 5)
+        self.assertEqual(snapshot['endpoints']['history']['requests'], 2)
+        self.assertEqual(snapshot['endpoints']['history']['avg_queries'], 2)
+        self.assertEqual(snapshot['endpoints']['history']['max_queries'], 3)
+
+    def test_requests_in_threads_are_independent(self):
+        """Test: cada hilo cuenta solo sus consultas"""
+        results = {}
+
+        def worker(name, queries):
+            token = query_stats.begin(name)
+            for _ in range(queries):
+                query_stats.record('SELECT 1', (), 0.001)
+            results[name] = query_stats.finish(token).queries
+
+        threads = [threading.Thread(target=worker, args=(f'r{n}', n)) for n in range(1, 4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, {'r1': 1, 'r2': 2, 'r3': 3})
+
+
+class TestSlowQueryLog(unittest.TestCase):
+    """Tests para SlowQueryLog"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.explained = []
+
+    def explain(self, statement, parameters):
+        self.explained.append((statement, parameters))
+        return 'plan'
+
+    def log(self, **kwargs):
+        kwargs.setdefault('threshold', 0.1)
+        return SlowQueryLog(clock=self.clock, **kwargs)
+
+    def test_below_threshold_is_ignored(self):
+        """Test: las consultas rápidas no entran en el log"""
+        log = self.log()
+        self.assertIsNone(log.record('SELECT 1', (), 0.05, explain=self.explain))
+        self.assertEqual(log.recent(), [])
+
+    def test_slow_query_captures_plan(self):
+        """Test: una consulta lenta se registra con su plan"""
+        log = self.log()
+        with self.assertLogs('database.slow_queries', level='WARNING'):
+            entry = log.record('SELECT *  FROM accounts\n WHERE id = %s', ('x',), 0.25, 'get_account', self.explain)
+            log.wait_idle()
+        self.assertEqual(entry['statement'], 'SELECT * FROM accounts WHERE id = %s')
+        self.assertEqual(entry['duration_ms'], 250.0)
+        self.assertEqual(entry['plan'], 'plan')
+        self.assertEqual(self.explained, [('SELECT *  FROM accounts\n WHERE id = %s', ('x',))])
+        self.assertEqual(log.stats()['explains'], 1)
+
+    def test_explain_rate_limited(self):
+        """Test: no más de explains_per_minute planes por minuto, y uno por sentencia en el cooldown"""
+        log = self.log(explains_per_minute=2, cooldown=600)
+        with self.assertLogs('database.slow_queries', level='WARNING'):
+            for statement in ('SELECT a', 'SELECT a', 'SELECT b', 'SELECT c'):
+                log.record(statement, (), 0.2, explain=self.explain)
+            log.wait_idle()
+            self.assertEqual([s for s, _ in self.explained], ['SELECT a', 'SELECT b'])
+
+            self.clock.now += 61
+            log.record('SELECT c', (), 0.2, explain=self.explain)
+            log.record('SELECT a', (), 0.2, explain=self.explain)
+            log.wait_idle()
+        self.assertEqual([s for s, _ in self.explained], ['SELECT a', 'SELECT b', 'SELECT c'])
+        self.assertEqual(log.stats()['slow_queries'], 6)
+
+
+class TestExplainer(unittest.TestCase):
+    """Tests para make_explainer"""
+
+    def test_analyzable(self):
+        """Test: ANALYZE solo para SELECT sin bloqueos ni funciones con efectos"""
+        self.assertTrue(analyzable('  select * from accounts'))
+        self.assertTrue(analyzable(
+            "SELECT count(*), COALESCE(sum(amount), 0) FROM transactions "
+            "WHERE account_id IN (SELECT id FROM accounts) AND description <> 'pg_sleep(1)'"
+        ))
+        self.assertFalse(analyzable('SELECT * FROM accounts WHERE id = %s FOR UPDATE'))
+        self.assertFalse(analyzable('SELECT * FROM accounts FOR NO KEY UPDATE'))
+        self.assertFalse(analyzable('UPDATE accounts SET balance = 0'))
+        self.assertFalse(analyzable('SELECT pg_advisory_xact_lock(%s)'))
+        self.assertFalse(analyzable('SELECT nextval(%s), random()'))
+        self.assertFalse(analyzable('SELECT * INTO copy FROM accounts'))
+        self.assertFalse(analyzable('WITH moved AS (DELETE FROM accounts RETURNING *) SELECT * FROM moved'))
+
+    def test_explain_uses_own_connection_and_rolls_back(self):
+        """Test: el plan se pide en una conexión nueva con timeout y se hace rollback"""
+        conn = FakeConnection()
+        explain = make_explainer(lambda: conn, timeout_ms=1000)
+
+        plan = explain('SELECT * FROM accounts WHERE id = %s', ('x',))
+        self.assertEqual(plan, 'Seq Scan on accounts\n  Buffers: shared hit=4')
+        self.assertEqual(conn.executed[0][0], 'SET LOCAL statement_timeout = 1000')
+        self.assertEqual(conn.executed[1], ('EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM accounts WHERE id = %s', ('x',)))
+        self.assertTrue(conn.rolled_back and conn.closed)
+
+        explain('UPDATE accounts SET balance = %s', (1,))
+        self.assertEqual(conn.executed[-1][0], 'EXPLAIN UPDATE accounts SET balance = %s')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""
+Tests para database/replicas.py (selección de réplica de lectura)
+"""
+
+import unittest
+import os
+import sys
+import time
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import replicas
+from database.replicas import Replica, ReplicaRouter, LEAST_CONNECTIONS
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeReplica:
+    """Réplica simulada con retraso y conexiones configurables"""
+
+    def __init__(self, lag=0.0, in_use=0):
+        self.lag = lag
+        self.in_use = in_use
+        self.probes = 0
+        self.fail = False
+
+    def probe(self):
+        self.probes += 1
+        if self.fail:
+            raise ConnectionError("replica unreachable")
+        return self.lag
+
+    def as_replica(self, name):
+        return Replica(name, self.probe, in_use=lambda: self.in_use)
+
+
+class TestReplicaRouter(unittest.TestCase):
+    """Tests para ReplicaRouter"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.fakes = [FakeReplica(), FakeReplica(), FakeReplica()]
+
+    def router(self, **kwargs):
+        replicas = [fake.as_replica(f'r{n}') for n, fake in enumerate(self.fakes)]
+        kwargs.setdefault('max_lag', 5.0)
+        router = ReplicaRouter(replicas, clock=self.clock, wall_clock=self.clock, **kwargs)
+        router.refresh()
+        return router
+
+    def test_round_robin(self):
+        """Test: las lecturas se reparten por turnos"""
+        router = self.router()
+        self.assertEqual([router.choose() for _ in range(6)], [0, 1, 2, 0, 1, 2])
+
+    def test_least_connections(self):
+        """Test: se elige la réplica con menos conexiones en uso"""
+        self.fakes[0].in_use, self.fakes[1].in_use, self.fakes[2].in_use = 5, 1, 3
+        router = self.router(strategy=LEAST_CONNECTIONS)
+        self.assertEqual(router.choose(), 1)
+
+    def test_lagging_replica_skipped(self):
+        """Test: una réplica con más retraso del tolerado no se elige"""
+        self.fakes[1].lag = 30.0
+        router = self.router()
+        self.assertNotIn(1, [router.choose() for _ in range(6)])
+
+    def test_all_lagging_falls_back_to_primary(self):
+        """Test: si ninguna réplica está al día se lee del primario"""
+        for fake in self.fakes:
+            fake.lag = 30.0
+        router = self.router()
+        self.assertIsNone(router.choose())
+        self.assertEqual(router.stats()['primary_reads'], 1)
+
+    def test_choose_does_not_probe(self):
+        """Test: elegir réplica no mide el retraso; lo hace refresh() (el hilo de fondo)"""
+        router = self.router(lag_check_interval=1.0)
+        for _ in range(9):
+            router.choose()
+        self.assertEqual([fake.probes for fake in self.fakes], [1, 1, 1])
+        router.refresh()
+        self.assertEqual([fake.probes for fake in self.fakes], [2, 2, 2])
+
+    def test_unmeasured_or_stale_lag_uses_primary(self):
+        """Test: sin medida, o con una medida antigua, no se confía en la réplica"""
+        replicas_ = [fake.as_replica(f'r{n}') for n, fake in enumerate(self.fakes)]
+        router = ReplicaRouter(replicas_, clock=self.clock, max_lag=5.0, lag_check_interval=1.0)
+        self.assertIsNone(router.choose())
+        router.refresh()
+        self.assertIsNotNone(router.choose())
+        self.clock.now += 6
+        self.assertIsNone(router.choose())
+
+    def test_background_refresher(self):
+        """Test: start() mide el retraso en un hilo hasta stop()"""
+        router = ReplicaRouter([fake.as_replica(f'r{n}') for n, fake in enumerate(self.fakes)],
+                               lag_check_interval=0.01)
+        router.start()
+        try:
+            deadline = time.monotonic() + 2
+            while self.fakes[0].probes < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+        finally:
+            router.stop(timeout=1)
+        self.assertGreaterEqual(self.fakes[0].probes, 3)
+        self.assertIsNotNone(router.choose())
+
+    def test_failed_probe_marks_down(self):
+        """Test: una réplica inalcanzable se excluye durante el cooldown"""
+        self.fakes[0].fail = True
+        router = self.router(down_cooldown=30.0)
+        self.assertNotIn(0, [router.choose() for _ in range(6)])
+
+        self.fakes[0].fail = False
+        self.clock.now += 31
+        router.refresh()
+        self.assertIn(0, [router.choose() for _ in range(3)])
+
+    def test_read_your_writes(self):
+        """Test: tras una escritura, las lecturas con la misma clave van al primario"""
+        router = self.router(sticky_seconds=2.0)
+        router.mark_write('user-1')
+
+        self.assertIsNone(router.choose(sticky_key='user-1'))
+        self.assertIsNotNone(router.choose(sticky_key='user-2'))
+        self.assertTrue(router.wrote_recently('user-1'))
+
+        self.clock.now += 2.0
+        self.assertIsNotNone(router.choose(sticky_key='user-1'))
+        self.assertFalse(router.wrote_recently('user-1'))
+
+    def test_read_your_writes_across_workers(self):
+        """Test: la marca que devuelve el cliente manda sus lecturas al primario en cualquier worker"""
+        worker_a, worker_b = self.router(sticky_seconds=2.0), self.router(sticky_seconds=2.0)
+
+        token = replicas.begin_request(None)
+        replicas.note_write(wall_clock=self.clock)
+        marker = replicas.request_write_marker()
+        self.assertIsNone(worker_a.choose())
+        replicas.end_request(token)
+
+        # Siguiente petición del mismo cliente en otro worker, con la marca recibida
+        token = replicas.begin_request(str(marker))
+        try:
+            self.assertIsNone(worker_b.choose())
+            self.clock.now += 2.0
+            self.assertIsNotNone(worker_b.choose())
+        finally:
+            replicas.end_request(token)
+
+        token = replicas.begin_request('not-a-number')
+        try:
+            self.assertIsNotNone(worker_b.choose())
+        finally:
+            replicas.end_request(token)
+
+    def test_invalid_strategy(self):
+        """Test: una estrategia desconocida es un error de configuración"""
+        with self.assertRaises(ValueError):
+            self.router(strategy='random')
+
+
+if __name__ == '__main__':
+    unittest.main()
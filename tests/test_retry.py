@@ -0,0 +1,109 @@
+"""
+Tests para database/retry.py (reintentos ante deadlocks y fallos de serialización)
+"""
+
+import unittest
+import os
+import sys
+from contextlib import contextmanager
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.retry import (
+    RetryPolicy, RetryExhaustedError, get_sqlstate, is_retryable,
+    run_transaction, retry_stats
+)
+
+
+class FakeDriverError(Exception):
+    """Imita una excepción de psycopg2 con pgcode"""
+    def __init__(self, pgcode):
+        super().__init__(pgcode)
+        self.pgcode = pgcode
+
+
+class FakeWrappedError(Exception):
+    """Imita un DBAPIError de SQLAlchemy que envuelve al driver en .orig"""
+    def __init__(self, orig):
+        super().__init__(str(orig))
+        self.orig = orig
+
+
+@contextmanager
+def fake_session():
+    yield object()
+
+
+class TestSqlstate(unittest.TestCase):
+    """Tests para la clasificación de errores"""
+
+    def test_psycopg2_pgcode(self):
+        """Test: SQLSTATE desde pgcode envuelto por SQLAlchemy"""
+        self.assertEqual(get_sqlstate(FakeWrappedError(FakeDriverError('40P01'))), '40P01')
+
+    def test_pg8000_dict_args(self):
+        """Test: SQLSTATE desde el dict de argumentos de pg8000"""
+        exc = Exception({'C': '40001', 'M': 'could not serialize access'})
+        self.assertEqual(get_sqlstate(exc), '40001')
+
+    def test_non_retryable(self):
+        """Test: una violación de unicidad no se reintenta"""
+        self.assertFalse(is_retryable(FakeWrappedError(FakeDriverError('23505'))))
+        self.assertFalse(is_retryable(ValueError("bad input")))
+
+
+class TestRunTransaction(unittest.TestCase):
+    """Tests para run_transaction"""
+
+    def setUp(self):
+        retry_stats.reset()
+        self.policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002, max_elapsed=1.0)
+
+    def test_retries_until_success(self):
+        """Test: un deadlock transitorio se reintenta y se cuenta"""
+        calls = []
+
+        def body(session):
+            calls.append(session)
+            if len(calls) < 3:
+                raise FakeWrappedError(FakeDriverError('40P01'))
+            return "ok"
+
+        result = run_transaction(body, operation='op', policy=self.policy,
+                                 session_factory=fake_session, sleep=lambda s: None)
+        self.assertEqual(result, "ok")
+        stats = retry_stats.snapshot()['op']
+        self.assertEqual(stats['retries'], 2)
+        self.assertEqual(stats['by_sqlstate'], {'40P01': 2})
+        self.assertEqual(stats['exhausted'], 0)
+
+    def test_budget_exhausted(self):
+        """Test: se agota el presupuesto de intentos"""
+        def body(session):
+            raise FakeWrappedError(FakeDriverError('40001'))
+
+        with self.assertRaises(RetryExhaustedError) as context:
+            run_transaction(body, operation='op', policy=self.policy,
+                            session_factory=fake_session, sleep=lambda s: None)
+        self.assertEqual(context.exception.attempts, 3)
+        self.assertEqual(retry_stats.snapshot()['op']['exhausted'], 1)
+
+    def test_non_retryable_propagates(self):
+        """Test: los errores no reintentables se propagan al primer intento"""
+        calls = []
+
+        def body(session):
+            calls.append(1)
+            raise FakeWrappedError(FakeDriverError('23505'))
+
+        with self.assertRaises(FakeWrappedError):
+            run_transaction(body, operation='op', policy=self.policy,
+                            session_factory=fake_session, sleep=lambda s: None)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""
+Tests para database/synthetic.py (generador de datos sintéticos y formato COPY)
+"""
+
+import unittest
+import os
+import sys
+import uuid
+from collections import Counter
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database import synthetic
+from database.synthetic import DatasetSpec, CopyStream, copy_line, USERS, ACCOUNTS, TRANSACTIONS
+
+
+def spec(**kwargs):
+    kwargs.setdefault('users', 500)
+    kwargs.setdefault('transactions', 5000)
+    kwargs.setdefault('end', 1700000000.0)
+    return DatasetSpec(**kwargs)
+
+
+class TestGenerator(unittest.TestCase):
+    """Tests para los generadores de filas"""
+
+    def test_deterministic_and_shardable(self):
+        """Test: los trozos generados por separado coinciden con la tabla completa"""
+        gen = synthetic.generator('uuid', spec())
+        for table, total in ((USERS, 500), (ACCOUNTS, 1000)):
+            whole = list(gen.rows(table, 0, total))
+            pieces = [row for lo, hi in synthetic.shards(total, 300) for row in gen.rows(table, lo, hi)]
+            self.assertEqual([row[0] for row in whole], [row[0] for row in pieces])
+        again = synthetic.generator('uuid', spec())
+        self.assertEqual(list(gen.rows(TRANSACTIONS, 100, 200)), list(again.rows(TRANSACTIONS, 100, 200)))
+
+    def test_uuid_references_are_consistent(self):
+        """Test: las claves foráneas apuntan a filas generadas y los ids son únicos"""
+        gen = synthetic.generator('uuid', spec())
+        users = {row[0] for row in gen.rows(USERS, 0, 500)}
+        accounts = list(gen.rows(ACCOUNTS, 0, 1000))
+        account_ids = {row[0] for row in accounts}
+        self.assertEqual(len(users), 500)
+        self.assertEqual(len(account_ids), 1000)
+        self.assertTrue({row[2] for row in accounts} <= users)
+        uuid.UUID(next(iter(account_ids)))
+
+        transactions = list(gen.rows(TRANSACTIONS, 0, 5000))
+        self.assertEqual(len({row[1] for row in transactions}), 5000)
+        for row in transactions:
+            self.assertTrue(row[2] is None or row[2] in account_ids)
+            self.assertTrue(row[3] is None or row[3] in account_ids)
+            self.assertNotEqual(row[2], row[3])
+            self.assertGreater(float(row[4]), 0)
+
+    def test_serial_ids_follow_offsets(self):
+        """Test: esquema SERIAL numera a continuación de los ids existentes"""
+        gen = synthetic.generator('serial', spec(), offsets={USERS: 10, ACCOUNTS: 20, TRANSACTIONS: 30})
+        self.assertEqual([row[0] for row in gen.rows(USERS, 0, 3)], [11, 12, 13])
+        accounts = list(gen.rows(ACCOUNTS, 0, 1000))
+        self.assertEqual(accounts[0][0], 21)
+        self.assertTrue(all(11 <= row[1] <= 510 for row in accounts))
+        self.assertTrue(all(row[2] in ('Ahorros', 'Corriente', 'Inversión') for row in accounts))
+        transactions = list(gen.rows(TRANSACTIONS, 0, 100))
+        self.assertEqual(transactions[0][0], 31)
+        self.assertTrue(all(row[4] in ('DEPOSITO', 'RETIRO', 'TRANSFER', 'PAGO') for row in transactions))
+
+    def test_activity_is_skewed(self):
+        """Test: el 1% de cuentas más activas concentra mucha más actividad que su parte"""
+        gen = synthetic.generator('serial', spec(users=2000, transactions=20000, merchant_share=0))
+        activity = Counter()
+        for row in gen.rows(TRANSACTIONS, 0, 20000):
+            activity.update(account for account in row[1:3] if account is not None)
+        total = sum(activity.values())
+        top = sum(count for _, count in activity.most_common(40))  # 1% de 4000 cuentas
+        self.assertGreater(top / total, 0.1)
+
+    def test_hot_merchants(self):
+        """Test: los pagos van a un grupo pequeño de comercios"""
+        dataset = spec(users=2000, transactions=10000, merchant_ratio=0.005)
+        gen = synthetic.generator('uuid', dataset)
+        payees = Counter(row[3] for row in gen.rows(TRANSACTIONS, 0, 10000) if row[5] == 'payment')
+        self.assertLessEqual(len(payees), dataset.merchants)
+        self.assertGreater(sum(payees.values()), 2500)
+
+    def test_transactions_in_time_order(self):
+        """Test: las fechas crecen con el índice dentro de la ventana de days"""
+        gen = synthetic.generator('uuid', spec(days=30))
+        dates = [row[8] for row in gen.rows(TRANSACTIONS, 0, 5000)]
+        self.assertEqual(dates, sorted(dates))
+        self.assertGreaterEqual(dates[0], '2023-10-15')
+        self.assertLessEqual(dates[-1], '2023-11-14 22:13:20')
+
+
+class TestCopyFormat(unittest.TestCase):
+    """Tests para el formato de texto de COPY"""
+
+    def test_copy_line_escapes(self):
+        """Test: NULL, tabuladores, saltos de línea y barras invertidas"""
+        self.assertEqual(copy_line((1, None, 'a\tb\nc\\d', '12.50')), '1\t\\N\ta\\tb\\nc\\\\d\t12.50\n')
+
+    def test_stream_reads_in_chunks(self):
+        """Test: read(size) entrega el mismo contenido que las filas codificadas"""
+        rows = [(str(n), f"row {n}") for n in range(2500)]
+        stream = CopyStream(rows, batch=100)
+        chunks = []
+        while True:
+            chunk = stream.read(1000)
+            if not chunk:
+                break
+            self.assertLessEqual(len(chunk), 1000)
+            chunks.append(chunk)
+        self.assertEqual(b''.join(chunks).decode(), ''.join(copy_line(row) for row in rows))
+        self.assertEqual(stream.rows, 2500)
+
+    def test_copy_sql(self):
+        """Test: la sentencia COPY lista las columnas del esquema"""
+        self.assertEqual(
+            synthetic.copy_sql('serial', USERS),
+            "COPY users (user_id, username, password_hash, email, created_at) FROM STDIN"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
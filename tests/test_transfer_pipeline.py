@@ -0,0 +1,101 @@
+"""
+Tests para database/transfer_pipeline.py (workers particionados por cuenta)
+"""
+
+import unittest
+import os
+import sys
+import time
+import threading
+
+# Añadir el directorio padre y backend/ (paquete database) al path
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'backend'))
+
+from database.transfer_pipeline import PartitionedWorkerPool, COMPLETED, FAILED
+
+
+def wait_for(pool, job_id, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = pool.status(job_id)
+        if job['state'] in (COMPLETED, FAILED):
+            return job
+        time.sleep(0.005)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+class TestPartitionedWorkerPool(unittest.TestCase):
+    """Tests para PartitionedWorkerPool"""
+
+    def test_same_partition_runs_serially(self):
+        """Test: los trabajos de una misma cuenta nunca se solapan y respetan el orden"""
+        pool = PartitionedWorkerPool(workers=4)
+        active = []
+        order = []
+        overlap = []
+        lock = threading.Lock()
+
+        def work(n):
+            with lock:
+                active.append(n)
+                if len(active) > 1:
+                    overlap.append(n)
+            time.sleep(0.002)
+            with lock:
+                active.remove(n)
+                order.append(n)
+            return {'n': n}, 200
+
+        job_ids = [pool.submit(1001, lambda n=n: work(n)) for n in range(20)]
+        for job_id in job_ids:
+            wait_for(pool, job_id)
+
+        self.assertEqual(overlap, [])
+        self.assertEqual(order, list(range(20)))
+
+    def test_status_reports_result(self):
+        """Test: el estado del trabajo expone el resultado y el código HTTP"""
+        pool = PartitionedWorkerPool(workers=2)
+        job_id = pool.submit(7, lambda: ({'message': 'ok'}, 200), owner='user-1')
+
+        job = wait_for(pool, job_id)
+        self.assertEqual(job['state'], COMPLETED)
+        self.assertEqual(job['status_code'], 200)
+        self.assertEqual(job['result'], {'message': 'ok'})
+        self.assertEqual(job['owner'], 'user-1')
+
+    def test_failure_is_recorded(self):
+        """Test: una excepción marca el trabajo como fallido sin detener el worker"""
+        pool = PartitionedWorkerPool(workers=1)
+
+        def boom():
+            raise RuntimeError('lock timeout')
+
+        failed = wait_for(pool, pool.submit(1, boom))
+        self.assertEqual(failed['state'], FAILED)
+        self.assertEqual(failed['status_code'], 500)
+
+        ok = wait_for(pool, pool.submit(1, lambda: ({}, 200)))
+        self.assertEqual(ok['state'], COMPLETED)
+
+    def test_finished_jobs_are_bounded(self):
+        """Test: el registro descarta los trabajos terminados más antiguos"""
+        pool = PartitionedWorkerPool(workers=1, max_jobs=5)
+        job_ids = [pool.submit(1, lambda: ({}, 200)) for _ in range(5)]
+        for job_id in job_ids:
+            wait_for(pool, job_id)
+
+        pool.submit(1, lambda: ({}, 200))
+        self.assertIsNone(pool.status(job_ids[0]))
+        self.assertIsNotNone(pool.status(job_ids[-1]))
+
+    def test_unknown_job(self):
+        """Test: un id desconocido devuelve None"""
+        pool = PartitionedWorkerPool(workers=1)
+        self.assertIsNone(pool.status('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()